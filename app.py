@@ -1,9 +1,23 @@
-from flask import Flask, render_template, request, jsonify, send_file, make_response, redirect, url_for, session
+from flask import Flask, render_template, request, jsonify, make_response, redirect, url_for, session, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from utils.scrape_sanctions import scrape_sanctions_update
-from utils.parse_sanctions import parse_sanctions_text
-from utils.process_entries import extract_entries, process_entry, extract_regimes
+from utils.parse_sanctions import tokenize_sanctions_text
+from utils.process_entries import extract_entries, process_entry, extract_regimes, process_entries_concurrently, TokenUsage, iter_sdn_csv, sdn_date_from_url, DEFAULT_CONCURRENCY, DEFAULT_BATCH_SIZE
+from utils import process_entries as process_entries_module
 from utils.entity_list_parser import fetch_entity_list_xml, parse_entity_list
-from utils.csv_generator import generate_entity_list_csv
+from utils.csv_generator import iter_entity_list_csv
+from utils.entry_cache import EntryCache
+from utils.entity_index import EntityIndex
+from utils.cache import create_cache
+from utils.http_client import get_response_cache
+from utils.jobs import JobQueue, JobQueueFull
+from utils.progress import ProgressBroker
+from utils.partial_results import PartialResultStore
+from utils.bulk_ingest import ingest_actions, combine_actions
+from utils.entity_backfill import backfill_entity_list, find_entity_list_documents
+from utils.metrics import REGISTRY
+from utils.result_store import ResultStore, filter_frame, summarize, to_csv_bytes, to_parquet_bytes, KINDS
+from utils.records import EntityRecord, SdnRecord, entity_records, sdn_records, json_default
 import os
 import pandas as pd
 import json
@@ -12,6 +26,7 @@ import io
 from dotenv import load_dotenv
 import anthropic
 import functools
+import hashlib
 import time
 import uuid
 import threading
@@ -22,7 +37,17 @@ import re
 # Load environment variables
 load_dotenv()
 
+class RecordJSONProvider(DefaultJSONProvider):
+    """JSON provider that writes entity and SDN records in their JSON form (jsonify, tojson)"""
+    
+    @staticmethod
+    def default(o):
+        if isinstance(o, (EntityRecord, SdnRecord)):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
 app = Flask(__name__)
+app.json = RecordJSONProvider(app)
 # Use a fixed secret key from environment variables, fallback to random if not set
 app.secret_key = os.getenv('FLASK_SECRET_KEY', os.urandom(24))
 
@@ -38,8 +63,47 @@ except Exception as e:
     print(f"Could not initialize Anthropic client: {e}")
     client = None
 
-# Simple in-memory cache
-cache = {}
+# Cache and job store shared by all routes. CACHE_BACKEND=sqlite lets every
+# gunicorn worker on the machine see the same jobs and results.
+cache = create_cache()
+
+# Fixed pool of workers for LLM processing jobs, with a bounded waiting queue
+job_queue = JobQueue(
+    num_workers=int(os.getenv('JOB_WORKERS', '2')),
+    max_queued=int(os.getenv('JOB_QUEUE_SIZE', '20'))
+)
+
+# Status updates published by jobs, streamed to the browser over SSE
+progress_broker = ProgressBroker()
+
+# Seconds the SSE stream waits for a pushed update before re-reading the
+# shared status record (which catches jobs running in another worker)
+SSE_POLL_INTERVAL = float(os.getenv('SSE_POLL_INTERVAL', '5'))
+
+# Processed SDN entries persist on disk across restarts and workers
+entry_cache = EntryCache()
+
+# Entries of running jobs, readable before the whole run has finished
+partial_results = PartialResultStore()
+
+# Entities from earlier Entity List rules, used to report what each new rule changes
+entity_index = EntityIndex()
+
+# Finished SDN runs and parsed rules as typed DataFrames, for views across many updates
+result_store = ResultStore()
+
+# Number of entries processed by the LLM at the same time
+PROCESS_CONCURRENCY = DEFAULT_CONCURRENCY
+
+# Number of entries packed into one LLM request (1 sends each entry on its own)
+PROCESS_BATCH_SIZE = DEFAULT_BATCH_SIZE
+
+# Largest number of recent-action URLs one /api/bulk-scrape call accepts
+BULK_SCRAPE_MAX_URLS = int(os.getenv('BULK_SCRAPE_MAX_URLS', '100'))
+
+# Characters of a rule's XML returned per /api/xml/<result_id> request, by default and at most
+XML_PREVIEW_CHARS = int(os.getenv('XML_PREVIEW_CHARS', '20000'))
+XML_PREVIEW_MAX_CHARS = int(os.getenv('XML_PREVIEW_MAX_CHARS', '200000'))
 
 def timed_lru_cache(seconds=600, maxsize=128):
     """LRU cache decorator with expiration"""
@@ -56,6 +120,16 @@ def timed_lru_cache(seconds=600, maxsize=128):
         return wrapper
     return decorator
 
+def text_hash(text):
+    """
+    Key a scraped text's cache entries on its content.
+
+    A sha256 digest rather than hash(), which is randomized per interpreter,
+    so every gunicorn worker and every restart maps the same text to the
+    same result_hash.
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
 @timed_lru_cache(seconds=3600)  # Cache scraping results for 1 hour
 def cached_scrape_sanctions_update(url):
     """Wrapper for scrape_sanctions_update with caching"""
@@ -72,13 +146,15 @@ def start_scrape():
         # Get the result
         result = cached_scrape_sanctions_update(url)
         
-        # Parse the result to get counts
-        counts = parse_sanctions_text(result)
+        # Count and split the entries in one pass; the confirm step reuses the entries
+        counts, entries = tokenize_sanctions_text(result)
         
         # Store in cache with a hash of the result
-        result_hash = str(hash(result))
+        result_hash = text_hash(result)
         cache[f"result_{result_hash}"] = result
         cache[f"counts_{result_hash}"] = counts
+        cache[f"entries_{result_hash}"] = entries
+        cache[f"source_{result_hash}"] = url
         
         return jsonify({
             'status': 'completed',
@@ -93,6 +169,67 @@ def start_scrape():
             'error': str(e)
         })
 
+@app.route('/api/bulk-scrape', methods=['POST'])
+def bulk_scrape():
+    """
+    Scrape many recent actions at once.
+    
+    Takes {"urls": [...]} and streams newline-delimited JSON: one line per URL
+    as its fetch completes, with its result_hash and counts, then a final
+    "batch" line whose result_hash holds the entries of every action with
+    duplicates removed, ready for the confirm and processing steps.
+    """
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls')
+    if not isinstance(urls, list) or not urls or not all(isinstance(url, str) and url.strip() for url in urls):
+        return jsonify({'error': 'urls must be a non-empty list of URLs'}), 400
+    urls = list(dict.fromkeys(url.strip() for url in urls))
+    if len(urls) > BULK_SCRAPE_MAX_URLS:
+        return jsonify({'error': f'At most {BULK_SCRAPE_MAX_URLS} URLs per request'}), 400
+    
+    def generate():
+        results = []
+        for result in ingest_actions(urls):
+            results.append(result)
+            if result['status'] == 'error':
+                yield json.dumps({'url': result['url'], 'status': 'error', 'error': result['error']}) + '\n'
+                continue
+            
+            # Each action can also go through the single-URL steps on its own
+            result_hash = text_hash(result['text'])
+            cache[f"result_{result_hash}"] = result['text']
+            cache[f"counts_{result_hash}"] = result['counts']
+            cache[f"entries_{result_hash}"] = result['entries']
+            cache[f"source_{result_hash}"] = result['url']
+            yield json.dumps({
+                'url': result['url'],
+                'status': 'completed',
+                'result_hash': result_hash,
+                'counts': result['counts'],
+                'new_entries': result['new_entries'],
+                'duplicates': result['duplicates']
+            }) + '\n'
+        
+        completed = sorted((result for result in results if result['status'] == 'completed'),
+                           key=lambda result: result['index'])
+        combined = combine_actions(completed)
+        summary = {
+            'status': 'batch',
+            'fetched': len(completed),
+            'failed': len(results) - len(completed),
+            'duplicates': combined.duplicates
+        }
+        if completed:
+            batch_text = '\n\n'.join(result['text'] for result in completed)
+            batch_hash = text_hash(batch_text)
+            cache[f"result_{batch_hash}"] = batch_text
+            cache[f"counts_{batch_hash}"] = combined.counts()
+            cache[f"entries_{batch_hash}"] = combined.entries
+            summary.update(result_hash=batch_hash, counts=combined.counts())
+        yield json.dumps(summary) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/', methods=['GET'])
 def index():
     step = request.args.get('step', 'initial')
@@ -133,11 +270,10 @@ def index():
         
         # Extract entries by category (only if not already cached)
         entries_key = f"entries_{result_hash}"
-        if entries_key not in cache:
+        entries = cache.get(entries_key)
+        if entries is None:
             entries = extract_entries(result)
             cache[entries_key] = entries
-        else:
-            entries = cache[entries_key]
         
         return render_template('sanctions.html', 
                               result=result, 
@@ -162,28 +298,23 @@ def index():
         
         # Check if already processed
         processed_key = f"processed_{result_hash}"
-        if processed_key in cache:
-            processed_data = cache[processed_key]
+        processed_data = cache.get(processed_key)
+        if processed_data is not None:
             return render_template('sanctions.html', 
                                   result=result, 
                                   url=url,
                                   result_hash=result_hash,
-                                  processed_data=processed_data,
+                                  processed_data=sdn_records(processed_data),
                                   step='processed')
         
-        # Create the session ID for tracking this processing job
-        session_id = str(uuid.uuid4())
-        # Store initial status in cache
-        cache[f"status_{session_id}"] = {
-            "status": "starting",
-            "processed": 0,
-            "total": sum(len(entries_list) for entries_list in entries.values()),
-            "current_category": "",
-            "current_index": 0
-        }
-        
-        # Process entries in background thread to avoid blocking
-        process_entries_background(session_id, entries, result_hash)
+        # Queue the processing job; its ID doubles as the session ID for status polling
+        try:
+            session_id = start_processing_job(entries, result_hash)
+        except JobQueueFull as e:
+            return render_template('sanctions.html', 
+                                  error=str(e),
+                                  url=url,
+                                  step='confirm')
         
         # Return template with loading state
         return render_template('sanctions.html', 
@@ -207,25 +338,23 @@ def entity_list():
 
 @app.route('/download/<format_type>')
 def download(format_type):
-    # Get the most recent CSV file from the workspace directory
     if format_type == 'csv':
-        try:
-            # List all CSV files matching the pattern
-            csv_files = [f for f in os.listdir('.') if f.startswith('sanctions_processed_') and f.endswith('.csv')]
-            if not csv_files:
-                return "No CSV files found", 404
-            
-            # Get the most recent file
-            latest_file = max(csv_files)
-            
-            # Send the file
-            return send_file(
-                latest_file,
-                as_attachment=True,
-                download_name=latest_file
-            )
-        except Exception as e:
-            return f"Error accessing CSV file: {str(e)}", 500
+        # Rendered from this job's processed entries, in the same layout the CLI writes
+        result_hash = request.args.get('result_hash')
+        if not result_hash:
+            return "Missing result_hash parameter", 400
+        
+        processed_entries = processed_by_category(result_hash)
+        if not processed_entries:
+            return "No processed data available", 400
+        
+        date = sdn_date_from_url(request.args.get('url', ''))
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return Response(
+            stream_with_context(iter_sdn_csv(processed_entries, date)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename=sanctions_processed_{timestamp}.csv'}
+        )
     
     elif format_type == 'json':
         # For JSON, we'll still use the cache since we don't save JSON files
@@ -235,15 +364,21 @@ def download(format_type):
         
         processed_key = f"processed_{result_hash}"
         processed_data = cache.get(processed_key, [])
+        prefix = "sanctions_processed"
+        
+        if not processed_data:
+            # Still running: hand out the entries finished so far
+            processed_data = partial_results.ordered_entries(result_hash)
+            prefix = "sanctions_partial"
         
         if not processed_data:
             return "No processed data available", 400
         
         # Create JSON response
-        response = make_response(json.dumps(processed_data, indent=2))
+        response = make_response(json.dumps(processed_data, indent=2, default=json_default))
         response.headers['Content-Type'] = 'application/json'
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        response.headers['Content-Disposition'] = f'attachment; filename=sanctions_processed_{timestamp}.json'
+        response.headers['Content-Disposition'] = f'attachment; filename={prefix}_{timestamp}.json'
         return response
     
     return "Invalid format type", 400
@@ -261,7 +396,12 @@ def api_scrape():
 
 @app.route('/api/fetch-xml', methods=['POST'])
 def fetch_xml():
-    """API endpoint to fetch XML data from the provided URL"""
+    """
+    API endpoint to fetch a rule's XML from the provided URL.
+    
+    The XML stays in the server cache under the returned result_id; process it
+    with /api/process-entity-xml and page through it with /api/xml/<result_id>.
+    """
     data = request.json
     url = data.get('url')
     
@@ -277,11 +417,12 @@ def fetch_xml():
         
         # Store the XML content in the cache
         cache[f"xml_{result_id}"] = xml_content
+        cache[f"source_{result_id}"] = url
         
         return jsonify({
             'status': 'success',
             'result_id': result_id,
-            'xml': xml_content
+            'size': len(xml_content)
         })
     except Exception as e:
         return jsonify({
@@ -289,12 +430,41 @@ def fetch_xml():
             'error': str(e)
         }), 500
 
+@app.route('/api/xml/<result_id>', methods=['GET'])
+def xml_preview(result_id):
+    """
+    Return part of a fetched rule's XML, so the page never has to load all of it.
+    
+    Query parameters:
+        offset: First character to return (default 0)
+        length: Number of characters (default XML_PREVIEW_CHARS, at most XML_PREVIEW_MAX_CHARS)
+    """
+    xml_content = cache.get(f"xml_{result_id}")
+    if xml_content is None:
+        return jsonify({'error': 'XML content not found in cache. Please fetch the rule again.'}), 404
+    
+    offset = max(0, request.args.get('offset', 0, type=int))
+    length = min(max(1, request.args.get('length', XML_PREVIEW_CHARS, type=int)), XML_PREVIEW_MAX_CHARS)
+    content = xml_content[offset:offset + length]
+    end = offset + len(content)
+    return jsonify({
+        'result_id': result_id,
+        'offset': offset,
+        'size': len(xml_content),
+        'content': content,
+        # None once the end of the document has been returned
+        'next_offset': end if end < len(xml_content) else None
+    })
+
 @app.route('/api/process-entity-xml', methods=['POST'])
 def process_entity_xml():
     """API endpoint to process entity list XML data"""
     data = request.json
     result_id = data.get('result_id')
     xml_content = data.get('xml_content')
+    # Optional XML URL of the rule, used to diff it against earlier rules;
+    # a rule fetched with /api/fetch-xml already has its URL on record
+    source = data.get('source') or (result_id and cache.get(f"source_{result_id}"))
     
     # Either use the provided XML content or retrieve from cache
     if not xml_content and not result_id:
@@ -318,11 +488,21 @@ def process_entity_xml():
         # Store the parsed result in the cache
         if result_id:
             cache[f"parsed_{result_id}"] = result
+            if source:
+                cache[f"source_{result_id}"] = source
+            # Without a URL, the XML itself identifies the rule
+            store_entities(result_id, result['entities'], source or '', key=text_hash(xml_content))
         
-        return jsonify({
+        response = {
             'status': 'success',
             'result': result
-        })
+        }
+        
+        # Report added/modified/unchanged entities relative to earlier rules
+        if source:
+            response['changes'] = entity_index.update(result['entities'], source)
+        
+        return jsonify(response)
     except Exception as e:
         import traceback
         error_traceback = traceback.format_exc()
@@ -335,6 +515,43 @@ def process_entity_xml():
             'traceback': error_traceback if app.debug else None
         }), 500
 
+@app.route('/api/entity-backfill', methods=['POST'])
+def entity_backfill():
+    """
+    Queue a backfill of many Entity List rules into one deduplicated dataset.
+    
+    Takes {"urls": [...]} (Federal Register document or XML URLs) or
+    {"start_date": "YYYY-MM-DD", "end_date": "YYYY-MM-DD"}. Progress is at
+    /api/process-status/<job_id>; once complete, the merged entities download
+    from /api/download-entity-csv/<result_id>.
+    """
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls') or []
+    start_date, end_date = data.get('start_date'), data.get('end_date')
+    
+    if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+        return jsonify({'error': 'urls must be a list of URLs'}), 400
+    if bool(start_date) != bool(end_date):
+        return jsonify({'error': 'start_date and end_date go together'}), 400
+    if not urls and not start_date:
+        return jsonify({'error': 'Either urls or start_date and end_date are required'}), 400
+    
+    result_id = str(uuid.uuid4())
+    key = json.dumps(['entity-backfill', sorted(urls), start_date, end_date])
+    try:
+        job, _ = job_queue.submit(
+            lambda job: entity_backfill_background(job.id, result_id, urls, start_date, end_date, job.cancel_event),
+            key=key,
+            # Written before the job is queued so a fast worker's status isn't overwritten
+            on_created=lambda job: set_status(
+                job.id, {"status": "queued", "result_id": result_id, "processed": 0, "total": len(urls)}
+            )
+        )
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify({'job_id': job.id, 'result_id': cache.get(f"status_{job.id}", {}).get('result_id', result_id)}), 202
+
 @app.route('/api/process-status/<session_id>', methods=['GET'])
 def process_status(session_id):
     """API endpoint to get the current status of a processing job"""
@@ -345,8 +562,226 @@ def process_status(session_id):
     if not status_data:
         return jsonify({"error": "Processing session not found"}), 404
     
+    # The job is only known to the worker process that queued it
+    job = job_queue.get(session_id)
+    if job:
+        status_data = {**status_data, "job_state": job.state}
+    
+    # With ?cursor=N, also return the entries finished since that cursor
+    if 'cursor' in request.args and status_data.get("result_hash"):
+        cursor = request.args.get('cursor', 0, type=int)
+        rows, next_cursor = partial_results.fetch(status_data["result_hash"], cursor,
+                                                  request.args.get('limit', type=int))
+        status_data = {**status_data, "rows": rows, "next_cursor": next_cursor}
+    
     return jsonify(status_data)
 
+@app.route('/api/process-results/<session_id>', methods=['GET'])
+def process_results(session_id):
+    """
+    API endpoint to page through the entries a processing job has finished so far.
+    
+    Query parameters:
+        cursor: The next_cursor of the previous call (0 or omitted to start over)
+        limit: Maximum number of rows to return (default 100)
+    """
+    status_data = cache.get(f"status_{session_id}")
+    if not status_data or not status_data.get("result_hash"):
+        return jsonify({"error": "Processing session not found"}), 404
+    
+    cursor = request.args.get('cursor', 0, type=int)
+    limit = request.args.get('limit', 100, type=int)
+    rows, next_cursor = partial_results.fetch(status_data["result_hash"], cursor, limit)
+    status = status_data.get("status")
+    
+    return jsonify({
+        "status": status,
+        "processed": status_data.get("processed", 0),
+        "total": status_data.get("total", 0),
+        "rows": rows,
+        "next_cursor": next_cursor,
+        # Nothing more will arrive once the job has stopped and this page is the last one
+        "done": status in ("complete", "error", "cancelled") and len(rows) < limit
+    })
+
+@app.route('/api/process-events/<session_id>', methods=['GET'])
+def process_events(session_id):
+    """Server-Sent Events stream of status updates for a processing job"""
+    initial_status = cache.get(f"status_{session_id}")
+    if not initial_status:
+        return jsonify({"error": "Processing session not found"}), 404
+    
+    def generate():
+        version = 0
+        last_sent = None
+        # The entry may expire before the stream starts; start from what the check saw
+        status_data = initial_status
+        while True:
+            if status_data != last_sent:
+                yield f"data: {json.dumps(status_data)}\n\n"
+                last_sent = status_data
+            else:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+            
+            if status_data.get("status") in ("complete", "error", "cancelled"):
+                return
+            
+            update = progress_broker.wait(session_id, version, timeout=SSE_POLL_INTERVAL)
+            if update:
+                version, status_data = update
+            else:
+                # Nothing pushed in this process; the job may live in another worker
+                status_data = cache.get(f"status_{session_id}") or {
+                    "status": "error",
+                    "error": "Processing session not found"
+                }
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """API endpoint to get the state of a queued job"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """API endpoint to cancel a queued or running job"""
+    job = job_queue.cancel(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    
+    # A running job records its own cancelled status once it stops
+    if job.state == 'cancelled':
+        set_status(job_id, {**cache.get(f"status_{job_id}", {}), "status": "cancelled"})
+    
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs', methods=['GET'])
+def jobs_stats():
+    """API endpoint to get the number of jobs in each state"""
+    return jsonify(job_queue.stats())
+
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    """API endpoint to get occupancy and eviction counters for the in-memory cache"""
+    return jsonify(cache.stats())
+
+@app.route('/api/entry-cache-stats', methods=['GET'])
+def entry_cache_stats():
+    """API endpoint to get hit/miss counters for the processed entry cache"""
+    return jsonify(entry_cache.stats())
+
+@app.route('/api/http-cache-stats', methods=['GET'])
+def http_cache_stats():
+    """API endpoint to get hit/revalidation counters for the HTTP response cache"""
+    return jsonify(get_response_cache().stats())
+
+@app.route('/api/rate-limit-stats', methods=['GET'])
+def rate_limit_stats():
+    """API endpoint to get retry counters and the current concurrency limit for LLM calls"""
+    return jsonify(process_entries_module.rate_limiter.stats())
+
+JOB_GAUGE = REGISTRY.gauge('sanctions_jobs', 'Background jobs by state', ['state'])
+LLM_LIMITER_GAUGE = REGISTRY.gauge('sanctions_llm_limiter', 'LLM rate limiter counters and current limits', ['field'])
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint with stage timings, cache and LLM counters for this process"""
+    for state, count in job_queue.stats().items():
+        JOB_GAUGE.set(count, state=state)
+    for field, value in process_entries_module.rate_limiter.stats().items():
+        LLM_LIMITER_GAUGE.set(value, field=field)
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/entity-index-stats', methods=['GET'])
+def entity_index_stats():
+    """API endpoint to get the size of the persistent Entity List index"""
+    return jsonify(entity_index.stats())
+
+def results_frame(kind):
+    """The stored results of a kind, narrowed by the filter query parameters"""
+    args = request.args
+    return filter_frame(
+        result_store.frame(kind),
+        country=args.getlist('country'),
+        category=args.getlist('category'),
+        action=args.getlist('action'),
+        result=args.getlist('result'),
+        regime=args.get('regime'),
+        name=args.get('name'),
+        since=args.get('since'),
+        until=args.get('until')
+    )
+
+@app.route('/api/results/<kind>', methods=['GET'])
+def results(kind):
+    """
+    Rows of every stored SDN run (kind=sdn) or parsed rule (kind=entities).
+    
+    Filters: country, category, action and result (repeatable), regime, name,
+    since and until (dates). format=json (default, paged with limit/offset),
+    csv or parquet.
+    """
+    if kind not in KINDS:
+        return jsonify({'error': f'kind must be one of {", ".join(KINDS)}'}), 404
+    try:
+        frame = results_frame(kind)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    export_format = request.args.get('format', 'json')
+    if export_format == 'csv':
+        return Response(to_csv_bytes(frame), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename={kind}_results_{timestamp}.csv'})
+    if export_format == 'parquet':
+        try:
+            body = to_parquet_bytes(frame)
+        except ImportError as e:
+            return jsonify({'error': str(e)}), 501
+        return Response(body, mimetype='application/vnd.apache.parquet',
+                        headers={'Content-Disposition': f'attachment; filename={kind}_results_{timestamp}.parquet'})
+    if export_format != 'json':
+        return jsonify({'error': 'format must be json, csv or parquet'}), 400
+    
+    limit = request.args.get('limit', 100, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    page = frame.iloc[offset:offset + limit]
+    return Response(
+        json.dumps({
+            'total': len(frame),
+            'offset': offset,
+            'rows': json.loads(page.to_json(orient='records', date_format='iso'))
+        }),
+        mimetype='application/json'
+    )
+
+@app.route('/api/results/<kind>/summary', methods=['GET'])
+def results_summary(kind):
+    """Row counts of the filtered results grouped by a column (by=country, regime, category, ...)"""
+    if kind not in KINDS:
+        return jsonify({'error': f'kind must be one of {", ".join(KINDS)}'}), 404
+    by = request.args.get('by', 'country')
+    try:
+        counts = summarize(results_frame(kind), by)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'by': by, 'groups': counts.to_dict(orient='records')})
+
+@app.route('/api/result-store-stats', methods=['GET'])
+def result_store_stats():
+    """API endpoint to get row counts and memory use of the columnar result store"""
+    return jsonify(result_store.stats())
+
 @app.route('/process-entity-url', methods=['POST'])
 def process_entity_url():
     """Route to handle form submission for entity list URL processing"""
@@ -364,24 +799,53 @@ def process_entity_url():
         
         # Store the XML content in the cache
         cache[f"xml_{result_id}"] = xml_content
+        cache[f"source_{result_id}"] = url
         
         # Parse the entities
         entities_data = parse_entity_list(xml_content)
         cache[f"parsed_{result_id}"] = entities_data
+        store_entities(result_id, entities_data['entities'], url)
+        
+        # Compare with the entities of earlier rules
+        changes = entity_index.update(entities_data['entities'], url)
         
         # Return the result to the template
         return render_template('entity_list.html', 
                               step='processed',
                               result_id=result_id,
-                              xml_content=xml_content,
                               entities_data=entities_data,
+                              changes=changes,
                               url=url)
     except Exception as e:
         return render_template('entity_list.html', error=str(e), step='initial')
 
+def entity_csv_response(entities, xml_url):
+    """Stream the Entity List CSV for the given entities as a file download"""
+    # Name the file after the rule's document number when the URL has one
+    filename_match = re.search(r'/([^/]+)\.xml$', xml_url)
+    doc_id = filename_match.group(1) if filename_match else 'download'
+    
+    return Response(
+        stream_with_context(iter_entity_list_csv(entities, xml_url)),
+        mimetype='text/csv',
+        # Ensure filename is quoted in the header
+        headers={"Content-Disposition": f'attachment; filename="entity_list_{doc_id}.csv"'}
+    )
+
+@app.route('/api/download-entity-csv/<result_id>', methods=['GET'])
+def download_entity_csv_by_id(result_id):
+    """Streams the Entity List CSV for a rule parsed earlier, straight from the cached parse."""
+    parsed = cache.get(f"parsed_{result_id}")
+    if not parsed:
+        return jsonify({'error': 'Parsed entities not found. Please fetch the rule again.'}), 404
+    
+    # The date column comes from the rule's XML URL
+    xml_url = request.args.get('xml_url') or cache.get(f"source_{result_id}") or ''
+    return entity_csv_response(entity_records(parsed.get('entities', [])), xml_url)
+
 @app.route('/api/download-entity-csv', methods=['POST'])
 def download_entity_csv():
-    """Generates and returns the entity list as a CSV file."""
+    """Generates and returns the entity list as a CSV file from entities posted by the client."""
     data = request.get_json()
     if not data or 'entities' not in data or 'xml_url' not in data:
         return jsonify({'error': 'Missing entities or xml_url in request'}), 400
@@ -389,44 +853,13 @@ def download_entity_csv():
     entities = data['entities']
     xml_url = data['xml_url']
 
-    if not isinstance(entities, list):
+    if not isinstance(entities, list) or not all(isinstance(entity, dict) for entity in entities):
         return jsonify({'error': 'Invalid format for entities'}), 400
         
     if not isinstance(xml_url, str) or not xml_url:
         return jsonify({'error': 'Invalid xml_url'}), 400
 
-    try:
-        # Generate CSV content using the utility function
-        csv_data = generate_entity_list_csv(entities, xml_url)
-        
-        # --- Add Logging --- 
-        print(f"[Debug] Received xml_url for CSV download: {xml_url}")
-        # --- End Add Logging ---
-
-        # Determine filename from URL or use a default
-        doc_id = 'download' # Default if regex fails
-        filename_match = re.search(r'/([^/]+)\.xml$', xml_url)
-
-        # --- Add Logging --- 
-        if filename_match:
-            print(f"[Debug] Regex matched: {filename_match.group(1)}")
-            doc_id = filename_match.group(1)
-        else:
-            print(f"[Debug] Regex did not match.")
-        # --- End Add Logging ---
-
-        filename = f"entity_list_{doc_id}.csv"
-
-        # Create response
-        response = make_response(csv_data)
-        # Ensure filename is quoted in the header
-        response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
-        response.headers["Content-Type"] = "text/csv"
-        return response
-
-    except Exception as e:
-        logger.error(f"Error generating entity CSV: {e}", exc_info=True)
-        return jsonify({'error': 'Failed to generate CSV file'}), 500
+    return entity_csv_response(entity_records(entities), xml_url)
 
 @app.route('/sanctions')
 def sanctions_redirect():
@@ -469,11 +902,10 @@ def sanctions_redirect():
         
         # Extract entries by category (only if not already cached)
         entries_key = f"entries_{result_hash}"
-        if entries_key not in cache:
+        entries = cache.get(entries_key)
+        if entries is None:
             entries = extract_entries(result)
             cache[entries_key] = entries
-        else:
-            entries = cache[entries_key]
         
         return render_template('sanctions.html', 
                               result=result, 
@@ -498,13 +930,13 @@ def sanctions_redirect():
         
         # Check if already processed
         processed_key = f"processed_{result_hash}"
-        if processed_key in cache:
-            processed_data = cache[processed_key]
+        processed_data = cache.get(processed_key)
+        if processed_data is not None:
             return render_template('sanctions.html', 
                                   result=result, 
                                   url=url,
                                   result_hash=result_hash,
-                                  processed_data=processed_data,
+                                  processed_data=sdn_records(processed_data),
                                   step='processed')
         
         # Check if Anthropic client is available
@@ -516,24 +948,14 @@ def sanctions_redirect():
                                   url=url,
                                   step='confirm')
         
-        # Initial step for processing - render the template with session ID
-        session_id = str(uuid.uuid4())
-        # Store initial status in cache
-        cache[f"status_{session_id}"] = {
-            "status": "starting",
-            "processed": 0,
-            "total": sum(len(entries_list) for entries_list in entries.values()),
-            "current_category": "",
-            "current_index": 0
-        }
-        
-        # Start background processing
-        processing_thread = threading.Thread(
-            target=process_entries_background, 
-            args=(session_id, entries, result_hash),
-            daemon=True
-        )
-        processing_thread.start()
+        # Queue the processing job; its ID doubles as the session ID for status polling
+        try:
+            session_id = start_processing_job(entries, result_hash)
+        except JobQueueFull as e:
+            return render_template('sanctions.html', 
+                                  error=str(e),
+                                  url=url,
+                                  step='confirm')
         
         return render_template('sanctions.html',
                               result=result,
@@ -546,80 +968,218 @@ def sanctions_redirect():
         # Default initial step
         return render_template('sanctions.html', step='initial')
 
-# Process entries in a background thread
-def process_entries_background(session_id, entries, result_hash):
+def entity_backfill_background(job_id, result_id, urls, start_date, end_date, cancel_event=None):
+    """Fetch, parse and merge the backfill's rules on a job queue worker"""
     try:
-        # Process each category and entry in batches
-        total_processed = 0
-        processed_data = []
-        
-        for category, entry_list in entries.items():
-            # Update status for new category
-            cache[f"status_{session_id}"] = {
-                "status": "processing",
-                "processed": total_processed,
-                "total": sum(len(entries_list) for entries_list in entries.values()),
-                "current_category": category,
-                "current_index": 0
-            }
-            
-            for i, entry_text in enumerate(entry_list):
-                try:
-                    # Skip empty entries
-                    if not entry_text.strip():
-                        continue
-                    
-                    # Update processing status
-                    cache[f"status_{session_id}"] = {
-                        "status": "processing",
-                        "processed": total_processed,
-                        "total": sum(len(entries_list) for entries_list in entries.values()),
-                        "current_category": category,
-                        "current_index": i + 1
-                    }
-                    
-                    # Check if individual entry is cached
-                    entry_cache_key = f"entry_{hash(entry_text)}_{category}"
-                    if entry_cache_key in cache:
-                        processed_entry = cache[entry_cache_key]
-                    else:
-                        # Process the entry using existing function
-                        processed_entry = process_entry(entry_text, category)
-                        # Cache the processed entry
-                        cache[entry_cache_key] = processed_entry
-                    
-                    processed_data.append(processed_entry)
-                    total_processed += 1
-                except Exception as e:
-                    print(f"Error processing entry: {e}")
-                    # Add a fallback entry
-                    processed_data.append({
-                        "name": entry_text.split(',')[0] if ',' in entry_text else entry_text[:50],
-                        "nationality": "Unknown",
-                        "category": category.capitalize(),
-                        "Regime": extract_regimes(entry_text),
-                        "issue": True,
-                        "notes": entry_text
-                    })
-                    total_processed += 1
+        urls = list(urls)
+        if start_date:
+            urls.extend(find_entity_list_documents(start_date, end_date))
         
-        # Update status to complete
-        cache[f"status_{session_id}"] = {
+        progress = {"status": "processing", "result_id": result_id, "processed": 0, "total": len(set(urls)), "failed": 0}
+        set_status(job_id, dict(progress))
+        
+        def on_progress(update):
+            # Called from this thread only, as documents finish
+            if update["stage"] == "fetched":
+                return
+            progress["processed"] += 1
+            progress["failed"] += update["stage"] == "failed"
+            set_status(job_id, dict(progress))
+        
+        result = backfill_entity_list(urls, on_progress=on_progress, cancel_event=cancel_event)
+        if cancel_event is not None and cancel_event.is_set():
+            set_status(job_id, {**progress, "status": "cancelled"})
+            return
+        
+        # Same shape as a single parsed rule, so the CSV download route serves it
+        cache[f"parsed_{result_id}"] = result
+        store_entities(result_id, result["entities"])
+        set_status(job_id, {
+            **progress,
             "status": "complete",
-            "processed": total_processed,
-            "total": sum(len(entries_list) for entries_list in entries.values())
-        }
+            "total_entities": result["total_entities"],
+            "duplicates": result["duplicates"],
+            "documents": result["documents"],
+            "failed_documents": result["failed"]
+        })
+    except Exception as e:
+        logging.error(f"Entity List backfill failed: {e}", exc_info=True)
+        set_status(job_id, {"status": "error", "result_id": result_id, "error": str(e)})
+        raise
+
+def store_entities(result_id, entities, source_url='', key=None):
+    """Add a parsed rule's entities to the result store, without failing the request if that breaks"""
+    try:
+        result_store.add_entities(result_id, entities, source_url, key=key)
+    except Exception as e:
+        logging.warning(f"Could not add {result_id} to the result store: {e}")
+
+def set_status(session_id, status):
+    """Store a job's status record and push it to anyone streaming its progress"""
+    cache[f"status_{session_id}"] = status
+    progress_broker.publish(session_id, status)
+
+def start_processing_job(entries, result_hash):
+    """
+    Queue LLM processing of the entries for a scrape result.
+    
+    Two requests for the same result_hash while a job is still queued or
+    running share that job.
+    
+    Returns:
+        str: The job ID, also used as the session ID of the status record
+    
+    Raises:
+        JobQueueFull: If too many jobs are already waiting
+    """
+    def queued(job):
+        # Store initial status in cache before a worker can start the job and
+        # write its own, so "queued" never replaces "processing" or "completed"
+        set_status(job.id, {
+            "status": "queued",
+            "result_hash": result_hash,
+            "processed": 0,
+            "total": sum(len(entries_list) for entries_list in entries.values()),
+            "current_category": "",
+            "current_index": 0
+        })
+    
+    job, _ = job_queue.submit(
+        lambda job: process_entries_background(job.id, entries, result_hash, job.cancel_event),
+        key=result_hash,
+        on_created=queued
+    )
+    
+    return job.id
+
+def entry_tasks(entries):
+    """Flatten {category: [entry texts]} into (category, index, text) tasks, skipping empty entries"""
+    return [
+        (category, i, entry_text)
+        for category, entry_list in entries.items()
+        for i, entry_text in enumerate(entry_list)
+        if entry_text.strip()
+    ]
+
+def processed_by_category(result_hash):
+    """
+    Group a finished run's processed entries under the category headings they were scraped from.
+    
+    The processed list is stored flat, in task order; the headings (and with them
+    the Designation/Delisting action) come from the cached scrape entries.
+    
+    Returns:
+        dict: Category name -> list of SdnRecords, or None if the run isn't cached
+    """
+    processed_data = cache.get(f"processed_{result_hash}")
+    entries = cache.get(f"entries_{result_hash}")
+    if not processed_data or not entries:
+        return None
+    
+    grouped = {}
+    # The SQLite cache hands the entries back in their JSON form
+    for (category, _, _), processed_entry in zip(entry_tasks(entries), sdn_records(processed_data)):
+        if processed_entry is not None:
+            grouped.setdefault(category, []).append(processed_entry)
+    return grouped
+
+# Process entries on a job queue worker
+def process_entries_background(session_id, entries, result_hash, cancel_event=None):
+    try:
+        total = sum(len(entries_list) for entries_list in entries.values())
+        
+        tasks = entry_tasks(entries)
+        
+        # Rows from an earlier run of the same result would mix with this one
+        partial_results.reset(result_hash)
+        
+        set_status(session_id, {
+            "status": "processing",
+            "result_hash": result_hash,
+            "processed": 0,
+            "total": total,
+            "current_category": tasks[0][0] if tasks else "",
+            "current_index": 0
+        })
+        
+        # Workers finish out of order, so progress is counted under a lock
+        progress_lock = threading.Lock()
+        progress = {"processed": 0}
+        
+        # Token usage and prompt-cache hits for this run, shown on the status record
+        usage = TokenUsage()
+        
+        def update_progress(category, i):
+            with progress_lock:
+                progress["processed"] += 1
+                set_status(session_id, {
+                    "status": "processing",
+                    "result_hash": result_hash,
+                    "processed": progress["processed"],
+                    "total": total,
+                    "current_category": category,
+                    "current_index": i + 1,
+                    "usage": usage.to_dict()
+                })
+        
+        def on_entry_complete(task_index, processed_entry):
+            category, i, _ = tasks[task_index]
+            # Store the row before counting it, so a reader never sees a
+            # processed count ahead of the rows it can fetch
+            partial_results.append(result_hash, task_index, processed_entry)
+            update_progress(category, i)
         
-        # Cache the processed results
+        # Results come back in the original entry order. Entries already in
+        # the persistent cache skip the LLM entirely.
+        processed_data = process_entries_concurrently(
+            [(entry_text, category) for category, _, entry_text in tasks],
+            max_workers=PROCESS_CONCURRENCY,
+            batch_size=PROCESS_BATCH_SIZE,
+            on_complete=on_entry_complete,
+            entry_cache=entry_cache,
+            cancel_event=cancel_event,
+            usage=usage
+        )
+        
+        if cancel_event is not None and cancel_event.is_set():
+            set_status(session_id, {
+                "status": "cancelled",
+                "result_hash": result_hash,
+                "processed": sum(1 for entry in processed_data if entry is not None),
+                "total": total,
+                "usage": usage.to_dict()
+            })
+            return
+        
+        # Cache the processed results before announcing completion, since
+        # the page reloads as soon as it sees the complete status
         cache[f"processed_{result_hash}"] = processed_data
+        try:
+            result_store.add_sdn(result_hash, processed_by_category(result_hash),
+                                 cache.get(f"source_{result_hash}") or '')
+        except Exception as e:
+            # The run's own results are cached already; only the aggregate views miss it
+            logging.warning(f"Could not add run {result_hash} to the result store: {e}")
+        
+        # Update status to complete
+        set_status(session_id, {
+            "status": "complete",
+            "result_hash": result_hash,
+            "processed": len(processed_data),
+            "total": total,
+            "entry_cache": entry_cache.stats(),
+            "usage": usage.to_dict()
+        })
         
     except Exception as e:
         print(f"Background processing error: {e}")
         # Update status to error
-        cache[f"status_{session_id}"] = {
+        set_status(session_id, {
             "status": "error",
             "error": str(e)
-        }
+        })
+        # Let the job queue record the failure too
+        raise
 
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+Benchmark single-entry vs batched LLM prompts in utils.process_entries.
+
+Uses benchmarks.fake_client.FakeClient, so no API credits are spent. Run from
+the project root:
+
+    python -m benchmarks.bench_batch_prompts --entries 300 --batch-sizes 1 2 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from benchmarks.fake_client import FakeClient
+from utils import process_entries
+
+SAMPLE_ENTRY = (
+    "SURNAME{i}, Given (a.k.a. ALIAS{i}, Other), Tehran, Iran; DOB 01 Aug 1970; "
+    "nationality Iran; Gender Male; Passport M{i:08d} (Iran) (individual) [NPWMD] [IFSR] "
+    "(Linked To: QODS AVIATION INDUSTRIES)."
+)
+
+def run(entries, batch_size, concurrency):
+    client = FakeClient()
+    process_entries.client = client
+    tasks = [(SAMPLE_ENTRY.format(i=i), 'individuals') for i in range(entries)]
+
+    # process_entry prints every entry, keep that out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        results = process_entries.process_entries_concurrently(
+            tasks, max_workers=concurrency, batch_size=batch_size,
+            # The sample entry is well-formed; keep it on the LLM path being measured
+            use_rules=False
+        )
+        elapsed = time.perf_counter() - start
+
+    issues = sum(1 for result in results if result.issue)
+    return elapsed, client.calls, client.input_tokens, issues
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    print(f"{'batch':>6} {'seconds':>9} {'calls':>7} {'input tokens':>13} {'issues':>7}")
+    for batch_size in args.batch_sizes:
+        elapsed, calls, input_tokens, issues = run(args.entries, batch_size, args.concurrency)
+        print(f"{batch_size:>6} {elapsed:>9.2f} {calls:>7} {input_tokens:>13} {issues:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark for EntityListParser._clean_text.
+
+Runs the original four-regex implementation and the current one over every
+cell of the real Entity List table exported in entity_list.csv, plus the
+cells of a synthetic GPOTABLE. Before timing, it checks that both produce
+identical output on those cells and on random fuzz strings. Run from the
+project root:
+
+    python -m benchmarks.bench_clean_text
+"""
+
+import argparse
+import csv
+import logging
+import random
+import re
+import timeit
+
+from lxml import etree
+
+from benchmarks.fixtures import make_entity_list_xml
+from utils.entity_list_parser import EntityListParser, _element_text
+
+def reference_clean_text(text):
+    """_clean_text as it was originally written, kept here as the reference."""
+    if not text:
+        return ""
+    text = re.sub(r'â', '', text)
+    text = re.sub(r'Â§', '§', text)
+    text = re.sub(r'[^\x00-\x7F\u00A0-\u00FF\u0100-\u017F\u0180-\u024F]+', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+def load_cells(rows):
+    """Return the cells of entity_list.csv and of a synthetic GPOTABLE."""
+    with open('entity_list.csv', newline='', encoding='utf-8') as f:
+        cells = [cell for row in csv.reader(f) for cell in row]
+
+    root = etree.fromstring(make_entity_list_xml(rows).encode('utf-8'))
+    cells.extend(_element_text(ent) for ent in root.iter('ENT'))
+    cells.extend(_element_text(li) for li in root.iter('LI'))
+    return cells
+
+def fuzz_strings(count, seed=0):
+    """Random strings mixing ASCII, Latin-1, mojibake, CJK and odd whitespace."""
+    rng = random.Random(seed)
+    alphabet = list("ab ,;\t\n\r\x0b\x0c\x1c\x85\xa0") + [
+        'â', 'Â', '§', 'Â§', 'ââ§', '\u4e2d', '\u2014', '\u2003', '\u3000', '\u2028', 'é', '\u03a9', '\U0001F600'
+    ]
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 30))) for _ in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000, help='rows in the synthetic table')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    clean_text = EntityListParser()._clean_text
+    cells = load_cells(args.rows)
+
+    mismatches = [cell for cell in cells + fuzz_strings(100000)
+                  if clean_text(cell) != reference_clean_text(cell)]
+    if mismatches:
+        raise SystemExit(f"{len(mismatches)} cells differ, first: {mismatches[0]!r}")
+    print(f"Output identical on {len(cells)} table cells and 100000 fuzz strings")
+
+    for name, func in (('reference', reference_clean_text), ('_clean_text', clean_text)):
+        best = min(timeit.repeat(lambda: [func(cell) for cell in cells], number=1, repeat=args.repeat))
+        print(f"{name:<12} {best * 1000:8.1f} ms  ({best / len(cells) * 1e6:.2f} us/cell)")
+
+if __name__ == "__main__":
+    main()
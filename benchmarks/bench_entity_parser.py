@@ -0,0 +1,52 @@
+"""
+Benchmark EntityListParser.extract_entities (BeautifulSoup) against
+extract_entities_streaming (lxml iterparse) on large GPOTABLE documents.
+
+Each measurement runs in a fresh process so peak RSS is not polluted by
+earlier runs. Run from the project root:
+
+    python -m benchmarks.bench_entity_parser --rows 1000 10000 50000
+"""
+
+import argparse
+import logging
+import multiprocessing
+import resource
+import sys
+import time
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _measure(method, rows):
+    logging.disable(logging.CRITICAL)
+    from benchmarks.fixtures import make_entity_list_xml
+    from utils.entity_list_parser import EntityListParser
+
+    xml_content = make_entity_list_xml(rows)
+    parser = EntityListParser()
+    baseline = _peak_rss_mb()
+
+    start = time.perf_counter()
+    entities = getattr(parser, method)(xml_content)
+    elapsed = time.perf_counter() - start
+
+    return len(xml_content), len(entities), elapsed, _peak_rss_mb() - baseline
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'rows':>7} {'xml MB':>7} {'method':<28} {'entities':>9} {'seconds':>8} {'peak MB':>8}")
+    for rows in args.rows:
+        for method in ('extract_entities', 'extract_entities_streaming'):
+            with context.Pool(1) as pool:
+                size, count, elapsed, peak = pool.apply(_measure, (method, rows))
+            print(f"{rows:>7} {size / 1e6:>7.1f} {method:<28} {count:>9} {elapsed:>8.2f} {peak:>8.1f}")
+
+if __name__ == "__main__":
+    main()
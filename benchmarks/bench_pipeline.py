@@ -0,0 +1,282 @@
+"""
+Offline end-to-end benchmark of the SDN and Entity List pipelines.
+
+Every stage runs without network access or API credits: OFAC pages and
+Federal Register XML are served by a local StaticServer, and LLM calls go to
+the local fake Messages API in benchmarks.fake_server through the real
+anthropic client, with configurable latency and error rate.
+
+Stages:
+
+    ofac_scrape     fetch + HTML parse (scrape_sanctions_update)
+    sdn_extract     per-category counts and entries (tokenize_sanctions_text)
+    sdn_llm         process_entries_concurrently against the fake API
+    sdn_csv         write_sdn_csv
+    fr_fetch        fetch_entity_list_xml
+    fr_parse        parse_entity_list
+    fr_csv          iter_entity_list_csv
+
+Each stage runs in a fresh process and reports items/sec, p50/p99 latency
+(per document for parse stages, per LLM request for sdn_llm) and peak RSS
+growth. Entity List documents are generated at the size of the repo's
+entity_list.csv and at 10k rows by default. Pass --fixtures DIR to use
+recorded documents instead (*.html are OFAC pages, *.xml are rules), and
+--save-fixtures DIR to write out the synthetic ones. Run from the project root:
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --sdn-entries 200 --entity-rows 25 10000 --latency 0.2 --error-rate 0.05
+    python -m benchmarks.bench_pipeline --json results.json
+"""
+
+import argparse
+import contextlib
+import csv
+import glob
+import io
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+REPO_ENTITY_LIST = 'entity_list.csv'
+FR_PATH = '/full_text/xml/2025/01/02/2025-00001.xml'
+OFAC_PATH = '/recent-actions/20250102'
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+def repo_entity_rows():
+    """Number of data rows in the repo's sample entity_list.csv."""
+    try:
+        with open(REPO_ENTITY_LIST, newline='', encoding='utf-8') as f:
+            return max(1, sum(1 for _ in csv.reader(f)) - 1)
+    except FileNotFoundError:
+        return 25
+
+def load_documents(args, kind, sizes):
+    """Return [(label, document)] from --fixtures, or synthetic documents of the given sizes."""
+    from benchmarks.fixtures import make_entity_list_xml, make_ofac_html
+
+    if args.fixtures:
+        pattern = '*.html' if kind == 'ofac' else '*.xml'
+        paths = sorted(glob.glob(os.path.join(args.fixtures, pattern)))
+        if paths:
+            documents = []
+            for path in paths:
+                with open(path, encoding='utf-8') as f:
+                    documents.append((os.path.basename(path), f.read()))
+            return documents
+
+    if kind == 'ofac':
+        return [(f"{size}/category", make_ofac_html(size)) for size in sizes]
+    return [(f"{size} rows", make_entity_list_xml(size)) for size in sizes]
+
+def _timed_repeats(func, repeat):
+    latencies = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        latencies.append(time.perf_counter() - start)
+    return result, latencies
+
+def _stage_ofac_scrape(args, document):
+    from benchmarks.fake_server import StaticServer
+    from utils.parse_sanctions import tokenize_sanctions_text
+    from utils.scrape_sanctions import scrape_sanctions_update
+
+    with StaticServer({OFAC_PATH: (document, 'text/html')}) as server:
+        text, latencies = _timed_repeats(lambda: scrape_sanctions_update(server.url + OFAC_PATH), args.repeat)
+    items = sum(len(entries) for entries in tokenize_sanctions_text(text)[1].values())
+    return items, latencies
+
+def _scrape_text(document):
+    from benchmarks.fake_server import StaticServer
+    from utils.scrape_sanctions import scrape_sanctions_update
+
+    with StaticServer({OFAC_PATH: (document, 'text/html')}) as server:
+        return scrape_sanctions_update(server.url + OFAC_PATH)
+
+def _sdn_entries(document):
+    from utils.parse_sanctions import tokenize_sanctions_text
+
+    return tokenize_sanctions_text(_scrape_text(document))[1]
+
+def _stage_sdn_extract(args, document):
+    from utils.parse_sanctions import tokenize_sanctions_text
+
+    text = _scrape_text(document)
+    (_, entries), latencies = _timed_repeats(lambda: tokenize_sanctions_text(text), args.repeat)
+    return sum(len(entry_list) for entry_list in entries.values()), latencies
+
+def _stage_sdn_llm(args, document):
+    import anthropic
+    from benchmarks.fake_server import FakeAnthropicServer
+    from utils import process_entries
+    from utils.rate_limit import RateLimiter
+
+    entries = _sdn_entries(document)
+    tasks = [(entry, category) for category, entry_list in entries.items() for entry in entry_list]
+
+    latencies = []
+    def timed_process_entry(entry_text, category):
+        start = time.perf_counter()
+        try:
+            return process_entries.process_entry(entry_text, category)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    server = FakeAnthropicServer(error_rate=args.error_rate, base_latency=args.latency)
+    with server:
+        process_entries.client = anthropic.Anthropic(api_key='benchmark', base_url=server.url, max_retries=0)
+        process_entries.rate_limiter = RateLimiter(max_concurrency=args.workers, base_delay=0.05, max_delay=1.0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            process_entries.process_entries_concurrently(
+                tasks, process_func=timed_process_entry, max_workers=args.workers,
+                batch_size=1, use_rules=not args.no_rules
+            )
+            elapsed = time.perf_counter() - start
+    # Throughput covers every entry, latency only the ones that went to the API
+    return len(tasks), [elapsed], latencies
+
+def _stage_sdn_csv(args, document):
+    from benchmarks.fake_client import FakeClient
+    from utils.process_entries import write_sdn_csv
+    from utils.records import SdnRecord
+
+    entries = _sdn_entries(document)
+    processed = {category: [SdnRecord.from_dict(FakeClient.structure(entry)) for entry in entry_list]
+                 for category, entry_list in entries.items()}
+    _, latencies = _timed_repeats(lambda: write_sdn_csv(io.StringIO(newline=''), processed, '20250102'),
+                                  args.repeat)
+    return sum(len(entry_list) for entry_list in processed.values()), latencies
+
+def _stage_fr_fetch(args, document):
+    from benchmarks.fake_server import StaticServer
+    from utils.entity_list_parser import fetch_entity_list_xml
+
+    with StaticServer({FR_PATH: (document, 'application/xml')}) as server:
+        xml_content, latencies = _timed_repeats(lambda: fetch_entity_list_xml(server.url + FR_PATH), args.repeat)
+    return xml_content.count('<ROW>'), latencies
+
+def _stage_fr_parse(args, document):
+    from utils.entity_list_parser import parse_entity_list
+
+    result, latencies = _timed_repeats(lambda: parse_entity_list(document), args.repeat)
+    return result['total_entities'], latencies
+
+def _stage_fr_csv(args, document):
+    from utils.csv_generator import iter_entity_list_csv
+    from utils.entity_list_parser import parse_entity_list
+
+    entities = parse_entity_list(document)['entities']
+    _, latencies = _timed_repeats(lambda: ''.join(iter_entity_list_csv(entities, 'https://example.com' + FR_PATH)),
+                                  args.repeat)
+    return len(entities), latencies
+
+STAGES = {
+    'ofac_scrape': ('ofac', _stage_ofac_scrape),
+    'sdn_extract': ('ofac', _stage_sdn_extract),
+    'sdn_llm': ('ofac', _stage_sdn_llm),
+    'sdn_csv': ('ofac', _stage_sdn_csv),
+    'fr_fetch': ('fr', _stage_fr_fetch),
+    'fr_parse': ('fr', _stage_fr_parse),
+    'fr_csv': ('fr', _stage_fr_csv),
+}
+
+def _run_stage(name, args, document, cache_dir):
+    # Runs in a fresh process; keep the HTTP cache out of the project directory
+    os.environ['HTTP_CACHE_PATH'] = os.path.join(cache_dir, f"http_{name}.sqlite3")
+    logging.disable(logging.CRITICAL)
+    # Import everything up front so RSS growth is the stage's data, not its imports
+    import anthropic  # noqa: F401
+    import benchmarks.fake_server  # noqa: F401
+    import utils.csv_generator  # noqa: F401
+    import utils.entity_list_parser  # noqa: F401
+    import utils.process_entries  # noqa: F401
+    baseline = _peak_rss_mb()
+
+    result = STAGES[name][1](args, document)
+    items, timings = result[0], result[1]
+    latencies = result[2] if len(result) > 2 else timings
+
+    seconds = sum(timings) / len(timings)
+    return {
+        'items': items,
+        'seconds': seconds,
+        'items_per_sec': items / seconds if seconds else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_rss_mb': _peak_rss_mb() - baseline,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--sdn-entries', type=int, nargs='+', default=[50],
+                        help='entries per category in the synthetic OFAC pages')
+    parser.add_argument('--entity-rows', type=int, nargs='+', default=None,
+                        help='rows in the synthetic rules (default: entity_list.csv size and 10000)')
+    parser.add_argument('--fixtures', help='directory of recorded *.html OFAC pages and *.xml rules')
+    parser.add_argument('--save-fixtures', help='write the synthetic documents to this directory and exit')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.05, help='fake API base latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of fake API requests rejected')
+    parser.add_argument('--no-rules', action='store_true', help='send every entry to the fake API')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    if args.entity_rows is None:
+        args.entity_rows = [repo_entity_rows(), 10000]
+
+    documents = {
+        'ofac': load_documents(args, 'ofac', args.sdn_entries),
+        'fr': load_documents(args, 'fr', args.entity_rows),
+    }
+
+    if args.save_fixtures:
+        os.makedirs(args.save_fixtures, exist_ok=True)
+        for kind, extension in (('ofac', 'html'), ('fr', 'xml')):
+            for label, document in documents[kind]:
+                path = os.path.join(args.save_fixtures, f"{kind}_{label.replace('/', '_').replace(' ', '_')}.{extension}")
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(document)
+                print(f"wrote {path}")
+        return
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    print(f"{'stage':<12} {'document':<14} {'items':>7} {'seconds':>9} {'items/s':>10} "
+          f"{'p50 ms':>9} {'p99 ms':>9} {'RSS MB':>8}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name in args.stages:
+            kind = STAGES[name][0]
+            for label, document in documents[kind]:
+                with context.Pool(1) as pool:
+                    metrics = pool.apply(_run_stage, (name, args, document, cache_dir))
+                results.append({'stage': name, 'document': label, **metrics})
+                print(f"{name:<12} {label:<14} {metrics['items']:>7} {metrics['seconds']:>9.3f} "
+                      f"{metrics['items_per_sec']:>10.1f} {metrics['p50_ms']:>9.2f} {metrics['p99_ms']:>9.2f} "
+                      f"{metrics['peak_rss_mb']:>8.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
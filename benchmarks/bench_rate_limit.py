@@ -0,0 +1,72 @@
+"""
+Run the SDN processing path against the local fake Anthropic server while it
+rejects requests, with and without the retry/adaptive-concurrency layer.
+
+The fake server answers 529 whenever more than --capacity requests are in
+flight and fails --error-rate of the rest with 429/529. Without retries every
+rejected request becomes an issue row; with utils.rate_limit they are retried
+and the in-flight limit settles near the server's capacity. Run from the
+project root:
+
+    python -m benchmarks.bench_rate_limit --entries 200 --workers 16 --capacity 4 --error-rate 0.05
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import time
+
+import anthropic
+
+from benchmarks.fake_server import FakeAnthropicServer
+from utils import process_entries
+from utils.rate_limit import RateLimiter
+
+SAMPLE_ENTRY = (
+    "VESSEL {i} (3E{i:04d}) Crude Oil Tanker Panama flag; Vessel Registration Identification "
+    "IMO {imo}; MMSI {mmsi} (vessel) [IRAN-EO13902] (Linked To: EXAMPLE SHIPPING {i})."
+)
+
+def run(args, limiter):
+    server = FakeAnthropicServer(error_rate=args.error_rate, capacity=args.capacity,
+                                 retry_after=args.retry_after, base_latency=args.latency)
+    with server:
+        process_entries.client = anthropic.Anthropic(api_key='test', base_url=server.url, max_retries=0)
+        process_entries.rate_limiter = limiter
+        tasks = [(SAMPLE_ENTRY.format(i=i, imo=9000000 + i, mmsi=352000000 + i), 'vessels')
+                 for i in range(args.entries)]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            results = process_entries.process_entries_concurrently(
+                tasks, max_workers=args.workers, batch_size=1, use_rules=False
+            )
+            elapsed = time.perf_counter() - start
+
+    issues = sum(1 for result in results if result.issue)
+    return elapsed, issues, server.requests, sum(server.errors.values()), limiter.stats()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--capacity', type=int, default=4)
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--retry-after', type=float, default=None)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    limiters = {
+        'no retries': RateLimiter(max_concurrency=args.workers, max_retries=0),
+        'adaptive': RateLimiter(max_concurrency=args.workers, max_retries=8, base_delay=0.05, max_delay=2.0),
+    }
+    print(f"{'mode':>11} {'seconds':>8} {'issues':>7} {'requests':>9} {'rejected':>9} {'retries':>8} {'limit':>6}")
+    for name, limiter in limiters.items():
+        elapsed, issues, requests, rejected, stats = run(args, limiter)
+        print(f"{name:>11} {elapsed:>8.2f} {issues:>7} {requests:>9} {rejected:>9} "
+              f"{stats['retries']:>8} {stats['concurrency_limit']:>6}")
+
+if __name__ == "__main__":
+    main()
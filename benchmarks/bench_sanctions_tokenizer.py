@@ -0,0 +1,113 @@
+"""
+Benchmark the single-pass tokenize_sanctions_text against the previous
+parse_sanctions_text + extract_entries pair, which each walked the text and
+ran uncompiled regexes on every line.
+
+The previous implementations are kept below as the reference, and the outputs
+are checked for equality before timing. Run from the project root:
+
+    python -m benchmarks.bench_sanctions_tokenizer --actions 10 100 500
+"""
+
+import argparse
+import re
+import time
+
+from benchmarks.fixtures import make_sanctions_text
+from utils.parse_sanctions import normalize_category, tokenize_sanctions_text
+
+def reference_parse_sanctions_text(text):
+    lines = text.split('\n')
+    results = {}
+    current_category = None
+    current_count = 0
+    category_pattern = r"The following (\w+)(?:s)? (?:has|have) been (?:added|removed|modified|updated)"
+    entry_pattern = r"^[A-Z0-9]"
+    for line in lines:
+        category_match = re.search(category_pattern, line, re.IGNORECASE)
+        if category_match:
+            if current_category:
+                results[current_category] = current_count
+            current_category = normalize_category(category_match.group(1))
+            current_count = 0
+            continue
+        if current_category and line.strip() and re.match(entry_pattern, line.strip()):
+            current_count += 1
+    if current_category:
+        results[current_category] = current_count
+    return results
+
+def reference_extract_entries(text):
+    lines = text.split('\n')
+    entries = {}
+    current_category = None
+    current_entry = []
+    category_pattern = r"The following (\w+)(?:s)? (?:has|have) been"
+    entry_pattern = r"^[A-Z0-9]"
+    for line in lines:
+        category_match = re.search(category_pattern, line)
+        if category_match:
+            if current_category and current_entry:
+                if current_category not in entries:
+                    entries[current_category] = []
+                entries[current_category].append('\n'.join(current_entry))
+                current_entry = []
+            current_category = category_match.group(1)
+            if current_category not in entries:
+                entries[current_category] = []
+            continue
+        if current_category and line.strip() and re.match(entry_pattern, line.strip()):
+            if current_entry:
+                entries[current_category].append('\n'.join(current_entry))
+                current_entry = []
+            current_entry = [line.strip()]
+        elif current_entry and line.strip():
+            current_entry.append(line.strip())
+    if current_category and current_entry:
+        entries[current_category].append('\n'.join(current_entry))
+    return entries
+
+EDGE_CASES = [
+    "",
+    "No headings here\nJUST TEXT",
+    "ENTRY BEFORE HEADING\nThe following individuals have been added:\nA, B\ncontinued\n\nC, D",
+    "The following entities have been designated:\nACME\nThe following entities have been added:\nBETA",
+    "THE FOLLOWING VESSELS HAVE BEEN ADDED:\nSHIP ONE\nThe following vessels have been added:\nSHIP TWO",
+    "The following individual has been updated:\n  indented ENTRY\n1ST ENTRY\n\tTABBED, Name",
+]
+
+def check_equivalence(texts):
+    for text in texts:
+        expected = (reference_parse_sanctions_text(text), reference_extract_entries(text))
+        if tokenize_sanctions_text(text) != expected:
+            raise AssertionError(f"tokenize_sanctions_text differs from the reference on: {text[:80]!r}")
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--actions', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--entries-per-category', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    texts = {actions: make_sanctions_text(actions, args.entries_per_category) for actions in args.actions}
+    check_equivalence(EDGE_CASES + list(texts.values()))
+    print("outputs match the reference implementation")
+
+    print(f"{'actions':>8} {'lines':>8} {'two-pass s':>11} {'one-pass s':>11} {'speedup':>8}")
+    for actions, text in texts.items():
+        two_pass = best_of(lambda: (reference_parse_sanctions_text(text), reference_extract_entries(text)),
+                           args.repeat)
+        one_pass = best_of(lambda: tokenize_sanctions_text(text), args.repeat)
+        print(f"{actions:>8} {text.count(chr(10)) + 1:>8} {two_pass:>11.3f} {one_pass:>11.3f} "
+              f"{two_pass / one_pass:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark the lxml extractor in scrape_sanctions against BeautifulSoup.
+
+Both paths of utils.scrape_sanctions.extract_update_text run on the same OFAC
+recent-actions pages: stored pages from --fixtures (*.html, e.g. written by
+bench_pipeline --save-fixtures or saved from ofac.treasury.gov) or synthetic
+ones. Every page is first checked for identical output, then each path is
+timed in a fresh process that also reports its peak RSS growth, since most of
+lxml's memory is allocated outside Python. Run from the project root:
+
+    python -m benchmarks.bench_scrape_html
+    python -m benchmarks.bench_scrape_html --fixtures recorded_pages --repeat 20
+"""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import time
+
+from benchmarks.bench_pipeline import _peak_rss_mb, percentile
+
+# Markup libxml2 and html.parser read differently, added to a small page's SDN
+# section; the fast path must hand these pages to BeautifulSoup
+EDGE_CASES = [
+    ('unknown-entity', '<p>AT&T; LIMITED, Dubai, United Arab Emirates [SDGT].</p>'),
+    ('undefined-entity', '<p>&foo; TRADING CO., Tehran, Iran [IRAN-EO13902].</p>'),
+    ('xmp', '<xmp>a <b>x</b></xmp>'),
+    ('plaintext', '<plaintext>a <b>x</b>'),
+    ('cdata', '<p><![CDATA[a <b>x</b>]]> TRADING CO.</p>'),
+]
+
+def edge_case_pages():
+    """Return [(label, html)] for EDGE_CASES, each inserted after the section's first heading."""
+    from benchmarks.fixtures import make_ofac_html
+
+    html = make_ofac_html(5)
+    heading = "have been added to OFAC's SDN List:</strong></p>"
+    return [(label, html.replace(heading, heading + snippet, 1)) for label, snippet in EDGE_CASES]
+
+def load_pages(args):
+    """Return [(label, html)] from --fixtures, or synthetic pages of the given sizes, plus the edge cases."""
+    from benchmarks.fixtures import make_ofac_html
+
+    if args.fixtures:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(args.fixtures, '*.html'))):
+            with open(path, encoding='utf-8') as f:
+                pages.append((os.path.basename(path), f.read()))
+        if pages:
+            return pages + edge_case_pages()
+    return [(f"{size}/category", make_ofac_html(size)) for size in args.entries] + edge_case_pages()
+
+def _run(html, fast, repeat):
+    # Runs in a fresh process so peak RSS belongs to this path alone
+    from utils.scrape_sanctions import extract_update_text
+
+    baseline = _peak_rss_mb()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract_update_text(html, fast=fast)
+        latencies.append(time.perf_counter() - start)
+    return latencies, _peak_rss_mb() - baseline
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', help='directory of recorded *.html OFAC pages')
+    parser.add_argument('--entries', type=int, nargs='+', default=[50, 500],
+                        help='entries per category in the synthetic pages')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    from utils.scrape_sanctions import _extract_update_text_lxml, extract_update_text
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'page':<24} {'KB':>7} {'path':<6} {'p50 ms':>9} {'p99 ms':>9} {'RSS MB':>8} {'speedup':>8}")
+    for label, html in load_pages(args):
+        expected = extract_update_text(html, fast=False)
+        if extract_update_text(html) != expected:
+            print(f"{label:<24} OUTPUT DIFFERS")
+            continue
+        # The fast path hands pages it can't reproduce exactly to BeautifulSoup
+        path = 'lxml' if _extract_update_text_lxml(html) is not None else 'soup*'
+
+        results = {}
+        for fast in (False, True):
+            with context.Pool(1) as pool:
+                results[fast] = pool.apply(_run, (html, fast, args.repeat))
+
+        baseline_p50 = percentile(results[False][0], 0.50)
+        for fast, name in ((False, 'soup'), (True, path)):
+            latencies, rss = results[fast]
+            p50 = percentile(latencies, 0.50)
+            speedup = f"{baseline_p50 / p50:.1f}x" if fast and p50 else ''
+            print(f"{label:<24} {len(html) / 1024:>7.0f} {name:<6} {p50 * 1000:>9.2f} "
+                  f"{percentile(latencies, 0.99) * 1000:>9.2f} {rss:>8.1f} {speedup:>8}")
+    print("soup* = page fell back to BeautifulSoup")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark the rule-based SDN parser against the LLM path.
+
+Runs the same synthetic entries through process_entries_concurrently with and
+without utils.sdn_rules, using benchmarks.fake_client.FakeClient so no API
+credits are spent. Reports how many entries still needed the LLM and the
+parser's time per entry. Run from the project root:
+
+    python -m benchmarks.bench_sdn_rules --entries 500
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from benchmarks.fake_client import FakeClient
+from benchmarks.fixtures import make_sdn_entry
+from utils import process_entries
+from utils.sdn_rules import parse_sdn_entry
+
+CATEGORIES = (('individuals', 'individual'), ('entities', 'entity'), ('vessels', 'vessel'))
+
+def make_tasks(entries, seed=0):
+    rng = random.Random(seed)
+    return [
+        (make_sdn_entry(rng, i, kind), category)
+        for i in range(entries)
+        for category, kind in [CATEGORIES[i % len(CATEGORIES)]]
+    ]
+
+def run(tasks, use_rules, concurrency):
+    client = FakeClient()
+    process_entries.client = client
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        process_entries.process_entries_concurrently(
+            tasks, max_workers=concurrency, batch_size=1, use_rules=use_rules
+        )
+        elapsed = time.perf_counter() - start
+
+    return elapsed, client.calls, client.input_tokens
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.entries)
+
+    start = time.perf_counter()
+    parsed = sum(1 for entry_text, category in tasks if parse_sdn_entry(entry_text, category) is not None)
+    per_entry = (time.perf_counter() - start) / len(tasks) * 1e6
+    print(f"rules parsed {parsed}/{len(tasks)} entries, {per_entry:.1f} us per entry")
+
+    print(f"{'rules':>6} {'seconds':>9} {'calls':>7} {'input tokens':>13}")
+    for use_rules in (False, True):
+        elapsed, calls, input_tokens = run(tasks, use_rules, args.concurrency)
+        print(f"{'on' if use_rules else 'off':>6} {elapsed:>9.2f} {calls:>7} {input_tokens:>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+In-process stand-in for anthropic.Anthropic used by the benchmarks.
+
+It answers messages.create() with well-formed JSON for every entry found in
+the prompt and sleeps for a latency that grows with the prompt size, so
+request counts and token volume show up in the timings. Content blocks marked
+with cache_control are treated like Anthropic's prompt cache: the first request
+writes them, later ones read them at a tenth of the latency. As with the real
+cache, a prefix shorter than PROMPT_CACHE_MIN_TOKENS is never cached.
+"""
+
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from utils.process_entries import MAX_OUTPUT_TOKENS, PROMPT_CACHE_MIN_TOKENS, extract_regimes
+
+# Rough size of a token in characters, good enough for comparisons
+CHARS_PER_TOKEN = 4
+
+class FakeMessages:
+    def __init__(self, client):
+        self.client = client
+
+    def create(self, model, max_tokens, messages, **kwargs):
+        if max_tokens > MAX_OUTPUT_TOKENS:
+            # The API answers these with a 400
+            raise ValueError(f"max_tokens: {max_tokens} > {MAX_OUTPUT_TOKENS}, the maximum for {model}")
+        blocks = []
+        for content in (kwargs.get('system', ''), messages[-1]['content']):
+            if isinstance(content, list):
+                blocks.extend(content)
+            elif content:
+                blocks.append({'text': content})
+        prompt = ''.join(block.get('text', '') for block in blocks)
+
+        # Everything up to the last cache_control block is the cacheable prefix
+        cached_chars = 0
+        for i, block in enumerate(blocks):
+            if block.get('cache_control'):
+                cached_chars = sum(len(b.get('text', '')) for b in blocks[:i + 1])
+        if cached_chars // CHARS_PER_TOKEN < PROMPT_CACHE_MIN_TOKENS:
+            cached_chars = 0
+        prefix = prompt[:cached_chars]
+
+        input_tokens = len(prompt) // CHARS_PER_TOKEN
+        prefix_tokens = cached_chars // CHARS_PER_TOKEN
+        with self.client.lock:
+            self.client.calls += 1
+            self.client.input_tokens += input_tokens
+            cache_hit = prefix in self.client.cached_prefixes
+            if prefix:
+                self.client.cached_prefixes.add(prefix)
+            if cache_hit:
+                self.client.cache_read_tokens += prefix_tokens
+
+        entries = re.findall(r'<entry_\d+>\n(.*?)\n</entry_\d+>', prompt, re.DOTALL)
+        if entries:
+            body = json.dumps([self.client.structure(entry) for entry in entries])
+        else:
+            raw = re.search(r'<raw_data>\n(.*?)\n</raw_data>', prompt, re.DOTALL)
+            body = json.dumps(self.client.structure(raw.group(1) if raw else prompt))
+
+        processed_tokens = input_tokens - prefix_tokens * 0.9 if cache_hit else input_tokens
+        time.sleep(self.client.base_latency + processed_tokens * self.client.latency_per_token)
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=body)],
+            usage=SimpleNamespace(
+                input_tokens=input_tokens - prefix_tokens,
+                output_tokens=len(body) // CHARS_PER_TOKEN,
+                cache_creation_input_tokens=0 if cache_hit else prefix_tokens,
+                cache_read_input_tokens=prefix_tokens if cache_hit else 0
+            )
+        )
+
+class FakeClient:
+    """Minimal fake of the Anthropic client that counts calls, input tokens and cache reads."""
+
+    def __init__(self, base_latency=0.05, latency_per_token=0.00002):
+        self.base_latency = base_latency
+        self.latency_per_token = latency_per_token
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cached_prefixes = set()
+        self.messages = FakeMessages(self)
+
+    @staticmethod
+    def structure(entry_text):
+        name, _, notes = entry_text.partition(',')
+        nationality = re.search(r'nationality ([A-Za-z ]+)', entry_text)
+        return {
+            "name": name.strip(),
+            "notes": notes.strip(),
+            "nationality": nationality.group(1).strip() if nationality else "Unknown",
+            "category": "Individual",
+            "Regime": extract_regimes(entry_text),
+            "issue": False
+        }
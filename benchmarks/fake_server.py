@@ -0,0 +1,182 @@
+"""
+Local HTTP stand-in for the Anthropic Messages API.
+
+Point a real anthropic.Anthropic client at it with base_url=server.url to
+exercise the whole HTTP path, including error handling. Answers are built by
+benchmarks.fake_client.FakeClient. The server can also fail requests:
+
+- error_rate: share of requests answered with 429 or 529 at random
+- capacity: requests beyond this many in flight get 529 overloaded
+- retry_after: seconds sent in the retry-after header of error responses
+  (None sends no header)
+
+StaticServer serves fixed OFAC pages and Federal Register XML the same way.
+
+Run the API stand-in on its own with:
+
+    python -m benchmarks.fake_server --port 8765 --error-rate 0.1 --capacity 4
+"""
+
+import argparse
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fake_client import FakeClient
+
+class FakeAnthropicServer:
+    """Threaded fake Messages API server running in a background thread."""
+
+    def __init__(self, host='127.0.0.1', port=0, error_rate=0.0, capacity=None, retry_after=None,
+                 base_latency=0.05, latency_per_token=0.00002, seed=0):
+        self.client = FakeClient(base_latency=base_latency, latency_per_token=latency_per_token)
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = {}
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _pick_error(self):
+        # Caller holds self.lock
+        if self.capacity is not None and self.in_flight > self.capacity:
+            return 529
+        if self.error_rate and self.random.random() < self.error_rate:
+            return self.random.choice([429, 529])
+        return None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if self.path.rstrip('/') != '/v1/messages':
+                    self._send_json(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': self.path}})
+                    return
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+
+                with server.lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    status = server._pick_error()
+                    if status:
+                        server.errors[status] = server.errors.get(status, 0) + 1
+                try:
+                    if status:
+                        error_type = 'rate_limit_error' if status == 429 else 'overloaded_error'
+                        headers = {} if server.retry_after is None else {'retry-after': str(server.retry_after)}
+                        self._send_json(status, {'type': 'error', 'error': {'type': error_type, 'message': error_type}},
+                                        headers)
+                        return
+
+                    message = server.client.messages.create(**payload)
+                    self._send_json(200, {
+                        'id': f"msg_fake_{server.requests}",
+                        'type': 'message',
+                        'role': 'assistant',
+                        'model': payload.get('model'),
+                        'content': [{'type': 'text', 'text': block.text} for block in message.content],
+                        'stop_reason': 'end_turn',
+                        'stop_sequence': None,
+                        'usage': vars(message.usage),
+                    })
+                finally:
+                    with server.lock:
+                        server.in_flight -= 1
+
+        return Handler
+
+class StaticServer:
+    """Serves fixed documents over HTTP, standing in for OFAC and the Federal Register."""
+
+    def __init__(self, documents, host='127.0.0.1', port=0):
+        """
+        Args:
+            documents (dict): URL path -> (body, content type)
+        """
+        self.documents = documents
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                document = documents.get(self.path)
+                if document is None:
+                    self.send_error(404)
+                    return
+                body, content_type = document
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--capacity', type=int, default=None)
+    parser.add_argument('--retry-after', type=float, default=None)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = FakeAnthropicServer(port=args.port, error_rate=args.error_rate, capacity=args.capacity,
+                                 retry_after=args.retry_after, base_latency=args.latency)
+    print(f"Fake Anthropic API listening on {server.url} (set ANTHROPIC_BASE_URL to use it)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Synthetic Federal Register and OFAC documents for the benchmarks.
+
+The generators mimic the structure of the real documents closely enough to
+exercise every branch of the parsers: Entity List GPOTABLEs with country
+header rows, separator rows, alias list items and stray mojibake, and OFAC
+recent-action pages with the SDN update section between the usual markers.
+"""
+
+import random
+
+COUNTRIES = [
+    "CANADA", "CHINA, PEOPLE'S REPUBLIC OF", "IRAN", "RUSSIA", "TÜRKIYE",
+    "UNITED ARAB EMIRATES", "HONG KONG", "INDIA", "PAKISTAN", "SINGAPORE",
+]
+
+LICENSE_REQUIREMENT = "For all items subject to the EAR. (See §§ 734.9(g), 744.21(b), and 746.8(a)(3) of the EAR)"
+LICENSE_POLICY = (
+    "Policy of denial for all items subject to the EAR apart from food and medicine designated as "
+    "EAR99, which will be reviewed on a case-by-case basis. See §§ 746.8(b) and 744.21(e)."
+)
+CITATION = "90 FR [INSERT FR PAGE NUMBER AND DATE OF PUBLICATION IN THE FEDERAL REGISTER]."
+
+def _entity_cell(rng, country, index):
+    name = f"{rng.choice(['Beijing', 'Shenzhen', 'Moscow', 'Tehran', 'Dubai'])} Example Technology {index} Co., Ltd."
+    aliases = [f"—Example Tech {index}-{n}; and" if n == 1 else f"—ET{index} Holdings {n};"
+               for n in range(rng.randint(0, 3))]
+    address = f"Room {index}, Building {rng.randint(1, 40)}, No. {rng.randint(1, 900)} Road, District, {country.title()}."
+    if aliases:
+        items = ''.join(f"<LI>{alias}</LI>" for alias in aliases)
+        return f"<ENT>{name}, a.k.a., the following {len(aliases)} aliases:{items}<LI>{address}</LI></ENT>"
+    # Some rows carry the odd encoding debris seen in real documents
+    debris = "â" if rng.random() < 0.2 else ""
+    return f"<ENT>{debris}{name}, <E T=\"03\">{address}</E> </ENT>"
+
+def make_entity_list_xml(rows, seed=0):
+    """
+    Build a Federal Register rule with an Entity List GPOTABLE.
+
+    Args:
+        rows (int): Approximate number of entity rows
+        seed (int): Random seed, so runs are comparable
+
+    Returns:
+        str: The XML document
+    """
+    rng = random.Random(seed)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<RULE><PREAMB><AGENCY TYPE="S">DEPARTMENT OF COMMERCE</AGENCY>'
+        '<SUBJECT>Additions to the Entity List</SUBJECT></PREAMB>',
+        '<REGTEXT PART="744" TITLE="15"><SUPPLEMENT><HD SOURCE="HED">Supplement No. 4 to Part 744—Entity List</HD>',
+        '<GPOTABLE CDEF="s50,r75,r50,r50,r50" COLS="5" OPTS="L2,i1">',
+        '<BOXHD><CHED H="1">Country</CHED><CHED H="1">Entity</CHED><CHED H="1">License requirement</CHED>'
+        '<CHED H="1">License review policy</CHED><CHED H="1">Federal Register citation</CHED></BOXHD>',
+    ]
+    per_country = max(1, rows // len(COUNTRIES))
+    index = 0
+    for country in COUNTRIES:
+        parts.append(f'<ROW><ENT I="01">{country}</ENT><ENT/><ENT/><ENT/><ENT/></ROW>')
+        parts.append('<ROW><ENT I="22">*  *  *  *  *  *  *</ENT><ENT O="xl"/></ROW>')
+        for _ in range(per_country):
+            index += 1
+            parts.append(
+                f'<ROW><ENT I="22"/>{_entity_cell(rng, country, index)}'
+                f'<ENT>{LICENSE_REQUIREMENT}</ENT><ENT>{LICENSE_POLICY}</ENT><ENT>{CITATION}</ENT></ROW>'
+            )
+            if rng.random() < 0.1:
+                parts.append('<ROW><ENT I="22"/><ENT>******</ENT><ENT/><ENT/><ENT/></ROW>')
+    parts.append('</GPOTABLE></SUPPLEMENT></REGTEXT></RULE>')
+    return '\n'.join(parts)
+
+def make_sdn_entry(rng, index, kind):
+    """Return one OFAC-style SDN entry of the given kind (individual, entity or vessel)."""
+    country = rng.choice(["Iran", "Russia", "China", "Lebanon", "United Arab Emirates"])
+    program = rng.choice(["[SDGT]", "[IRAN-EO13902]", "[NPWMD] [IFSR]", "[RUSSIA-EO14024]"])
+    if kind == 'individual':
+        return (
+            f"SURNAME{index}, Given (a.k.a. ALIAS{index}, Other), {country}; DOB 01 Aug 1970; "
+            f"nationality {country}; Gender Male; Passport M{index:08d} ({country}) (individual) {program} "
+            f"(Linked To: EXAMPLE TRADING {index} LLC)."
+        )
+    if kind == 'vessel':
+        return (
+            f"VESSEL {index} (3E{index:04d}) Crude Oil Tanker Panama flag; Vessel Registration Identification "
+            f"IMO {9000000 + index}; MMSI {352000000 + index} (vessel) {program} (Linked To: EXAMPLE SHIPPING {index})."
+        )
+    return (
+        f"EXAMPLE TRADING {index} LLC (a.k.a. ET{index}), Office {index}, Business Bay, Dubai, {country}; "
+        f"Organization Established Date 2019; Business Registration Number {index:07d} ({country}) {program}."
+    )
+
+def make_ofac_html(entries_per_category=50, seed=0):
+    """
+    Build an OFAC recent-actions page with an SDN update section.
+
+    Args:
+        entries_per_category (int): Number of entries under each heading
+        seed (int): Random seed, so runs are comparable
+
+    Returns:
+        str: The HTML document
+    """
+    rng = random.Random(seed)
+    sections = []
+    index = 0
+    for plural, kind in (('individuals', 'individual'), ('entities', 'entity'), ('vessels', 'vessel')):
+        paragraphs = [f"<p><strong>The following {plural} have been added to OFAC's SDN List:</strong></p>"]
+        for _ in range(entries_per_category):
+            index += 1
+            paragraphs.append(f"<p>{make_sdn_entry(rng, index, kind)}</p>")
+        sections.append('\n'.join(paragraphs))
+
+    navigation = '\n'.join(f'<li><a href="/recent-actions/2025{n:04d}">Recent action {n}</a></li>' for n in range(200))
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Counter Terrorism Designations | Office of Foreign Assets Control</title></head>
+<body>
+<header><nav><ul>{navigation}</ul></nav></header>
+<main>
+<div class="field--name-body">
+<p>The Department of the Treasury's Office of Foreign Assets Control (OFAC) has added the following to the SDN List.</p>
+<hr>
+<p><strong>Specially Designated Nationals List Update</strong></p>
+<br>
+{''.join(sections)}
+<p><strong>Unrelated Administrative List Updates:</strong></p>
+<p>The following entry has been updated:</p>
+<p>OLD ENTRY, Name; nationality Russia (individual) [RUSSIA-EO14024].</p>
+</div>
+</main>
+<footer><p>Office of Foreign Assets Control</p>{navigation}</footer>
+</body>
+</html>
+"""
+
+def make_sanctions_text(actions=10, entries_per_category=50, seed=0):
+    """
+    Build the text of several OFAC SDN updates run together, as returned by
+    scrape_sanctions_update and concatenated.
+
+    Some entries wrap onto a continuation line, and each action also has an
+    "updated" section and a lower-case heading, which the count and entry
+    parsers treat differently.
+
+    Args:
+        actions (int): Number of recent actions to concatenate
+        entries_per_category (int): Number of entries under each heading
+        seed (int): Random seed, so runs are comparable
+
+    Returns:
+        str: The text
+    """
+    rng = random.Random(seed)
+    lines = []
+    index = 0
+    for _ in range(actions):
+        lines.append("Specially Designated Nationals List Update")
+        lines.append("")
+        for plural, kind in (('individuals', 'individual'), ('entities', 'entity'), ('vessels', 'vessel')):
+            lines.append(f"The following {plural} have been added to OFAC's SDN List:")
+            lines.append("")
+            for _ in range(entries_per_category):
+                index += 1
+                entry = make_sdn_entry(rng, index, kind)
+                if rng.random() < 0.2:
+                    # Wrapped entry: the second line starts in lower case
+                    split_at = entry.index('; ') + 2
+                    lines.append(entry[:split_at].rstrip())
+                    lines.append(entry[split_at:].lower())
+                else:
+                    lines.append(entry)
+                lines.append("")
+        lines.append("The following entity has been updated on OFAC's SDN List:")
+        lines.append("")
+        index += 1
+        lines.append(make_sdn_entry(rng, index, 'entity'))
+        lines.append("")
+        lines.append("the following individual has been removed from OFAC's SDN List:")
+        lines.append("")
+        index += 1
+        lines.append(make_sdn_entry(rng, index, 'individual'))
+        lines.append("")
+    return '\n'.join(lines)
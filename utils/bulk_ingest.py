@@ -0,0 +1,190 @@
+"""
+Bulk ingestion of OFAC recent actions.
+
+Fetches many recent-action pages at once over the shared pooled session in
+utils.http_client, splits each into per-category entries, and drops entries
+already seen in another action of the same batch. Results are yielded per
+URL as soon as its fetch completes. Used by /api/bulk-scrape and runnable
+on its own:
+
+    python -m utils.bulk_ingest https://ofac.treasury.gov/recent-actions/20250102 ...
+    python -m utils.bulk_ingest --file urls.txt --output entries.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.http_client import fetch_text
+from utils.parse_sanctions import normalize_category, tokenize_sanctions_text
+from utils.scrape_sanctions import NOT_FOUND_MESSAGE, extract_update_text
+
+# Concurrent page fetches; stays below the session's connection pool size
+BULK_MAX_WORKERS = int(os.getenv('BULK_MAX_WORKERS', '8'))
+
+def entry_key(entry_text: str) -> str:
+    """Key under which an entry counts as the same entry in another action."""
+    return ' '.join(entry_text.split())
+
+class EntryDeduper:
+    """Collects entries from several actions, keeping the first copy of each."""
+
+    def __init__(self):
+        self._seen = set()
+        self.entries: Dict[str, List[str]] = {}
+        self.duplicates = 0
+
+    def add(self, entries: Dict[str, List[str]]) -> Tuple[Dict[str, int], int]:
+        """
+        Add one action's entries.
+
+        Args:
+            entries: Category name -> entry texts, as from tokenize_sanctions_text
+
+        Returns:
+            (new entries per category, number of entries already seen)
+        """
+        new_counts = {}
+        duplicates = 0
+        for category, entry_list in entries.items():
+            kept = self.entries.setdefault(category, [])
+            new_counts[category] = 0
+            for entry_text in entry_list:
+                key = (category.lower(), entry_key(entry_text))
+                if not key[1] or key in self._seen:
+                    duplicates += bool(key[1])
+                    continue
+                self._seen.add(key)
+                kept.append(entry_text)
+                new_counts[category] += 1
+        self.duplicates += duplicates
+        return new_counts, duplicates
+
+    def counts(self) -> Dict[str, int]:
+        """Entries kept per normalized category, for the overview page."""
+        counts = {}
+        for category, entry_list in self.entries.items():
+            if entry_list:
+                normalized = normalize_category(category)
+                counts[normalized] = counts.get(normalized, 0) + len(entry_list)
+        return counts
+
+def scrape_action(url: str) -> str:
+    """
+    Fetch one recent-action page and return its SDN update text.
+
+    Unlike scrape_sanctions_update, failures raise instead of coming back as text.
+
+    Raises:
+        requests.RequestException: If the page can't be fetched
+        ValueError: If the page has no SDN update section
+    """
+    text = extract_update_text(fetch_text(url))
+    if text == NOT_FOUND_MESSAGE:
+        raise ValueError(NOT_FOUND_MESSAGE)
+    return text
+
+def ingest_actions(urls: Iterable[str], deduper: Optional[EntryDeduper] = None,
+                   max_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Fetch and split many recent actions concurrently.
+
+    Args:
+        urls: Recent-action URLs; repeated URLs are fetched once
+        deduper: Tracks the entries seen so far, for the per-URL duplicate counts
+        max_workers: Concurrent fetches, defaults to BULK_MAX_WORKERS
+
+    Yields:
+        One result per URL in completion order: url, index (position in urls),
+        status ("completed" or "error"), and either text, counts, entries,
+        new_entries and duplicates, or error
+    """
+    urls = list(dict.fromkeys(urls))
+    if deduper is None:
+        deduper = EntryDeduper()
+    if not urls:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(max_workers or BULK_MAX_WORKERS, len(urls))) as executor:
+        futures = {executor.submit(scrape_action, url): index for index, url in enumerate(urls)}
+        for future in as_completed(futures):
+            index = futures[future]
+            result = {'url': urls[index], 'index': index}
+            try:
+                text = future.result()
+            except Exception as e:
+                yield {**result, 'status': 'error', 'error': str(e)}
+                continue
+
+            counts, entries = tokenize_sanctions_text(text)
+            new_entries, duplicates = deduper.add(entries)
+            yield {
+                **result,
+                'status': 'completed',
+                'text': text,
+                'counts': counts,
+                'entries': entries,
+                'new_entries': new_entries,
+                'duplicates': duplicates
+            }
+
+def combine_actions(results: Iterable[Dict[str, Any]]) -> EntryDeduper:
+    """
+    Deduplicate the completed results of a batch in URL order, so the batch
+    keeps the same copy of each entry whichever fetch finished first.
+
+    Args:
+        results: Results yielded by ingest_actions
+
+    Returns:
+        An EntryDeduper holding the batch's unique entries
+    """
+    combined = EntryDeduper()
+    for result in sorted(results, key=lambda result: result['index']):
+        if result['status'] == 'completed':
+            combined.add(result['entries'])
+    return combined
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='*', help='recent-action URLs')
+    parser.add_argument('--file', help='read URLs from this file, one per line')
+    parser.add_argument('--workers', type=int, default=None, help=f'concurrent fetches (default {BULK_MAX_WORKERS})')
+    parser.add_argument('--output', help='write the deduplicated entries by category to this JSON file')
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    if not urls:
+        parser.error('no URLs given')
+
+    results = []
+    failed = 0
+    for result in ingest_actions(urls, max_workers=args.workers):
+        results.append(result)
+        if result['status'] == 'error':
+            failed += 1
+            print(f"{result['url']}: error: {result['error']}")
+            continue
+        counts = ', '.join(f"{category}: {count}" for category, count in result['counts'].items()) or 'no entries'
+        print(f"{result['url']}: {counts} ({result['duplicates']} already seen)")
+
+    deduper = combine_actions(results)
+    kept = sum(len(entry_list) for entry_list in deduper.entries.values())
+    print(f"\n{len(results) - failed} actions fetched, {failed} failed, "
+          f"{kept} unique entries, {deduper.duplicates} duplicates dropped")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(deduper.entries, f, indent=2)
+        print(f"Entries saved to {args.output}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,397 @@
+"""
+Cache and job-store backends used by the Flask app.
+
+Keys are grouped into namespaces by their prefix (``result_``, ``xml_``,
+``status_`` ...). Each namespace has its own entry-count limit, byte limit and
+time-to-live, and evicts its least recently used items first.
+
+Two backends share the same dict-like interface:
+
+- ``BoundedCache`` keeps everything in the memory of one process.
+- ``SQLiteCache`` stores values in a local SQLite file, so every gunicorn
+  worker on the machine sees the same jobs and results.
+
+``create_cache`` picks one based on the ``CACHE_BACKEND`` environment variable.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+from utils.records import json_default
+
+class NamespaceLimits(NamedTuple):
+    """Size and age limits for one cache namespace."""
+    max_entries: int
+    max_bytes: int
+    ttl: float
+
+MB = 1024 * 1024
+
+# Limits for the key prefixes used in app.py
+DEFAULT_LIMITS = {
+    'result': NamespaceLimits(max_entries=100, max_bytes=50 * MB, ttl=6 * 3600),
+    'counts': NamespaceLimits(max_entries=1000, max_bytes=1 * MB, ttl=6 * 3600),
+    'entries': NamespaceLimits(max_entries=100, max_bytes=50 * MB, ttl=6 * 3600),
+    'processed': NamespaceLimits(max_entries=100, max_bytes=50 * MB, ttl=24 * 3600),
+    'status': NamespaceLimits(max_entries=1000, max_bytes=5 * MB, ttl=6 * 3600),
+    'xml': NamespaceLimits(max_entries=20, max_bytes=200 * MB, ttl=3600),
+    'parsed': NamespaceLimits(max_entries=50, max_bytes=100 * MB, ttl=6 * 3600),
+    # Source URLs of results and parsed rules; must outlive every namespace they
+    # describe, since the result store keys and dates runs by them
+    'source': NamespaceLimits(max_entries=1000, max_bytes=1 * MB, ttl=24 * 3600),
+}
+
+# Used for any prefix not listed above
+FALLBACK_LIMITS = NamespaceLimits(max_entries=1000, max_bytes=50 * MB, ttl=3600)
+
+DEFAULT_CACHE_PATH = os.path.join('cache', 'app_cache.sqlite3')
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def namespace_for(key: str) -> str:
+    """Return the namespace of a key, i.e. everything before the first underscore."""
+    return key.split('_', 1)[0]
+
+def estimate_size(value: Any) -> int:
+    """Approximate the memory held by a cached value, in bytes."""
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+class _Namespace:
+    def __init__(self, limits: NamespaceLimits):
+        self.limits = limits
+        # key -> (value, size, expires_at)
+        self.items: 'OrderedDict[str, tuple]' = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+class CacheBackend(ABC):
+    """
+    Interface shared by the cache backends.
+
+    Supports ``cache[key]``, ``cache[key] = value``, ``key in cache``,
+    ``cache.get(key, default)`` and ``del cache[key]``. Subclasses implement
+    ``get``, ``__setitem__``, ``__delitem__``, ``clear`` and ``stats``.
+    """
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value stored under key, or default if it's missing or expired."""
+
+    @abstractmethod
+    def __setitem__(self, key: str, value: Any) -> None:
+        """Store value under key, evicting older items past the namespace's limits."""
+
+    @abstractmethod
+    def __delitem__(self, key: str) -> None:
+        """Remove key; raises KeyError if it isn't stored."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every item."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-namespace item counts, sizes, hits and misses."""
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+class BoundedCache(CacheBackend):
+    """Thread-safe in-memory cache with per-namespace LRU eviction and TTL expiry."""
+
+    def __init__(self, limits: Optional[Dict[str, NamespaceLimits]] = None,
+                 fallback: NamespaceLimits = FALLBACK_LIMITS):
+        """
+        Args:
+            limits: Mapping of namespace name to its limits, defaults to DEFAULT_LIMITS
+            fallback: Limits for namespaces not found in ``limits``
+        """
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.fallback = fallback
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.RLock()
+
+    def _namespace(self, key: str) -> _Namespace:
+        name = namespace_for(key)
+        namespace = self._namespaces.get(name)
+        if namespace is None:
+            namespace = _Namespace(self.limits.get(name, self.fallback))
+            self._namespaces[name] = namespace
+        return namespace
+
+    def _remove(self, namespace: _Namespace, key: str) -> None:
+        _, size, _ = namespace.items.pop(key)
+        namespace.bytes -= size
+
+    def _lookup(self, key: str):
+        """Return (found, value), dropping the item first if it has expired."""
+        namespace = self._namespace(key)
+        item = namespace.items.get(key)
+        if item is None:
+            namespace.misses += 1
+            return False, None
+        value, _, expires_at = item
+        if expires_at <= time.monotonic():
+            self._remove(namespace, key)
+            namespace.expirations += 1
+            namespace.misses += 1
+            return False, None
+        namespace.items.move_to_end(key)
+        namespace.hits += 1
+        return True, value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            found, value = self._lookup(key)
+            return value if found else default
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        size = estimate_size(value)
+        with self._lock:
+            namespace = self._namespace(key)
+            if key in namespace.items:
+                self._remove(namespace, key)
+            namespace.items[key] = (value, size, time.monotonic() + namespace.limits.ttl)
+            namespace.bytes += size
+            self._evict(namespace, keep=key)
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            namespace = self._namespace(key)
+            if key not in namespace.items:
+                raise KeyError(key)
+            self._remove(namespace, key)
+
+    def _evict(self, namespace: _Namespace, keep: str) -> None:
+        """Drop expired items, then least recently used ones until within limits."""
+        now = time.monotonic()
+        for key in [key for key, (_, _, expires_at) in namespace.items.items() if expires_at <= now]:
+            self._remove(namespace, key)
+            namespace.expirations += 1
+
+        limits = namespace.limits
+        while (len(namespace.items) > limits.max_entries or namespace.bytes > limits.max_bytes):
+            oldest = next(iter(namespace.items))
+            if oldest == keep:
+                # The newest item alone is over the limit; keep it anyway
+                break
+            self._remove(namespace, oldest)
+            namespace.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._namespaces.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return occupancy, hit and eviction counters for every namespace."""
+        with self._lock:
+            return {
+                name: {
+                    'entries': len(namespace.items),
+                    'bytes': namespace.bytes,
+                    'max_entries': namespace.limits.max_entries,
+                    'max_bytes': namespace.limits.max_bytes,
+                    'ttl': namespace.limits.ttl,
+                    'hits': namespace.hits,
+                    'misses': namespace.misses,
+                    'evictions': namespace.evictions,
+                    'expirations': namespace.expirations,
+                }
+                for name, namespace in self._namespaces.items()
+            }
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache stored in a local SQLite file and shared by every process that opens it.
+
+    Values must be JSON-serializable. Hit/miss/eviction counters are kept per
+    process, while occupancy figures come from the database.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH,
+                 limits: Optional[Dict[str, NamespaceLimits]] = None,
+                 fallback: NamespaceLimits = FALLBACK_LIMITS):
+        """
+        Args:
+            path: Location of the SQLite file
+            limits: Mapping of namespace name to its limits, defaults to DEFAULT_LIMITS
+            fallback: Limits for namespaces not found in ``limits``
+        """
+        self.path = path
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.fallback = fallback
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, '
+            'namespace TEXT NOT NULL, '
+            'value TEXT NOT NULL, '
+            'size INTEGER NOT NULL, '
+            'expires_at REAL NOT NULL, '
+            'accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS cache_namespace ON cache (namespace, accessed_at)')
+        self._conn.commit()
+
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _limits(self, namespace: str) -> NamespaceLimits:
+        return self.limits.get(namespace, self.fallback)
+
+    def _count(self, namespace: str, counter: str, amount: int = 1) -> None:
+        counters = self._counters.setdefault(
+            namespace, {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        )
+        counters[counter] += amount
+
+    def get(self, key: str, default: Any = None) -> Any:
+        namespace = namespace_for(key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self._count(namespace, 'misses')
+                return default
+            value, expires_at = row
+            if expires_at <= now:
+                self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                self._conn.commit()
+                self._count(namespace, 'expirations')
+                self._count(namespace, 'misses')
+                return default
+            self._conn.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            self._count(namespace, 'hits')
+        return json.loads(value)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        namespace = namespace_for(key)
+        limits = self._limits(namespace)
+        # Records are stored in their JSON form and come back as dicts
+        encoded = json.dumps(value, default=json_default)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, namespace, value, size, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, namespace, encoded, len(encoded), now + limits.ttl, now)
+            )
+            self._evict(namespace, limits, now, keep=key)
+            self._conn.commit()
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            deleted = self._conn.execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount
+            self._conn.commit()
+        if not deleted:
+            raise KeyError(key)
+
+    def _evict(self, namespace: str, limits: NamespaceLimits, now: float, keep: str) -> None:
+        """Drop expired rows, then least recently used ones until within limits."""
+        expired = self._conn.execute(
+            'DELETE FROM cache WHERE namespace = ? AND expires_at <= ?', (namespace, now)
+        ).rowcount
+        if expired:
+            self._count(namespace, 'expirations', expired)
+
+        count, total_bytes = self._conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?', (namespace,)
+        ).fetchone()
+        if count <= limits.max_entries and total_bytes <= limits.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            'SELECT key, size FROM cache WHERE namespace = ? AND key != ? ORDER BY accessed_at',
+            (namespace, keep)
+        ).fetchall()
+        for old_key, size in rows:
+            if count <= limits.max_entries and total_bytes <= limits.max_bytes:
+                break
+            self._conn.execute('DELETE FROM cache WHERE key = ?', (old_key,))
+            count -= 1
+            total_bytes -= size
+            self._count(namespace, 'evictions')
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM cache')
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT namespace, COUNT(*), COALESCE(SUM(size), 0) FROM cache GROUP BY namespace'
+            ).fetchall()
+            occupancy = {namespace: (count, size) for namespace, count, size in rows}
+            result = {}
+            for namespace in set(occupancy) | set(self._counters):
+                limits = self._limits(namespace)
+                count, size = occupancy.get(namespace, (0, 0))
+                result[namespace] = {
+                    'entries': count,
+                    'bytes': size,
+                    'max_entries': limits.max_entries,
+                    'max_bytes': limits.max_bytes,
+                    'ttl': limits.ttl,
+                    **self._counters.get(
+                        namespace, {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+                    ),
+                }
+            return result
+
+def create_cache(backend: Optional[str] = None, path: Optional[str] = None) -> CacheBackend:
+    """
+    Create the cache backend selected by configuration.
+
+    Args:
+        backend: ``memory`` or ``sqlite``, defaults to the CACHE_BACKEND environment
+            variable (``memory`` if unset)
+        path: SQLite file for the ``sqlite`` backend, defaults to CACHE_PATH
+
+    Returns:
+        The cache backend
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    backend = (backend or os.getenv('CACHE_BACKEND', 'memory')).lower()
+    if backend == 'memory':
+        return BoundedCache()
+    if backend == 'sqlite':
+        path = path or os.getenv('CACHE_PATH', DEFAULT_CACHE_PATH)
+        logger.info(f"Using SQLite cache backend at {path}")
+        return SQLiteCache(path)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -1,10 +1,12 @@
 import csv
-import io
-from typing import List, Dict, Any
+from typing import Any, Iterable, Iterator, List
 import re
 from datetime import datetime
 import logging
 
+from utils.metrics import STAGE_SECONDS
+from utils.records import EntityRecord
+
 logger = logging.getLogger(__name__)
 
 def _parse_date_from_xml_url(xml_url: str) -> str:
@@ -36,59 +38,94 @@ def _clean_text_for_csv(text: str) -> str:
     text = text.replace('"', '""')
     return text
 
-def generate_entity_list_csv(entities: List[Dict[str, Any]], xml_url: str) -> str:
+ENTITY_CSV_HEADER = [
+    "Date",
+    "Listing President",
+    "Country",
+    "Entity",
+    "License Requirement"
+    # Removed: Aliases, License Policy, Federal Register Citation
+]
+
+class _LineBuffer:
+    """File-like object whose write() hands back the line csv.writer just formatted."""
+
+    def write(self, line: str) -> str:
+        return line
+
+def iter_csv_lines(rows: Iterable[List[Any]], **fmtparams) -> Iterator[str]:
     """
-    Generate a CSV string from a list of entity dictionaries with specific columns.
+    Format rows as CSV one line at a time, without buffering the whole file.
 
     Args:
-        entities: A list of dictionaries, where each dictionary represents an entity.
-        xml_url: The source XML URL used to derive the date.
+        rows: Rows to format, header included
+        **fmtparams: Passed on to csv.writer (e.g. quoting)
 
-    Returns:
-        A string containing the CSV data.
+    Yields:
+        One CSV-formatted line per row, line terminator included
     """
-    if not entities:
-        return ""
+    writer = csv.writer(_LineBuffer(), **fmtparams)
+    for row in rows:
+        yield writer.writerow(row)
 
-    output = io.StringIO()
-    # Use QUOTE_MINIMAL and specify quotechar, as some fields might not need quotes
-    # Using QUOTE_ALL ensures consistency even if fields contain the delimiter
-    writer = csv.writer(output, quoting=csv.QUOTE_ALL)
+def entity_list_csv_rows(entities: Iterable[EntityRecord], xml_url: str) -> Iterator[List[str]]:
+    """
+    Yield the Entity List CSV header and one row per named entity.
 
+    Args:
+        entities: EntityRecords as produced by parse_entity_list
+        xml_url: The source XML URL used to derive the date. Entities merged
+            from several rules carry their own source_url, which is used instead.
+    """
     # Extract date from URL
-    file_date = _parse_date_from_xml_url(xml_url)
+    file_date = _parse_date_from_xml_url(xml_url) if xml_url else "Unknown Date"
+    source_dates = {}
     listing_president = "Trump" # As specified
 
-    # Write header row
-    writer.writerow([
-        "Date",
-        "Listing President",
-        "Country",
-        "Entity",
-        "License Requirement"
-        # Removed: Aliases, License Policy, Federal Register Citation
-    ])
-
-    # Write entity data rows
+    yield ENTITY_CSV_HEADER
+
     for entity in entities:
         # Clean the main entity name
         # We rely on the parser having done more thorough cleaning (like 'â') before this stage
-        entity_name = _clean_text_for_csv(entity.get('name', ''))
+        entity_name = _clean_text_for_csv(entity.name)
 
         # Skip entities if the name is empty after basic cleaning
         if not entity_name:
             continue
 
-        country = _clean_text_for_csv(entity.get('country', ''))
-        license_req = _clean_text_for_csv(entity.get('license_requirement', ''))
+        country = _clean_text_for_csv(entity.country)
+        license_req = _clean_text_for_csv(entity.license_requirement)
         # Removed: license_policy, fr_citation, aliases_str
 
-        writer.writerow([
-            file_date,
+        source_url = entity.source_url
+        if source_url and source_url not in source_dates:
+            source_dates[source_url] = _parse_date_from_xml_url(source_url)
+
+        yield [
+            source_dates[source_url] if source_url else file_date,
             listing_president,
             country,
             entity_name,
             license_req
-        ])
+        ]
+
+def iter_entity_list_csv(entities: List[EntityRecord], xml_url: str) -> Iterator[str]:
+    """
+    Stream the Entity List CSV line by line, e.g. as a Flask response body.
+
+    Time spent formatting lines is recorded under the csv stage once the
+    stream ends, whether it is read to the end or closed early.
 
-    return output.getvalue() 
\ No newline at end of file
+    Args:
+        entities: A list of EntityRecords.
+        xml_url: The source XML URL used to derive the date.
+
+    Yields:
+        CSV lines; nothing at all for an empty entity list
+    """
+    if not entities:
+        return
+    # Using QUOTE_ALL ensures consistency even if fields contain the delimiter
+    yield from STAGE_SECONDS.time_iter(
+        iter_csv_lines(entity_list_csv_rows(entities, xml_url), quoting=csv.QUOTE_ALL), stage='csv'
+    )
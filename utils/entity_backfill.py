@@ -0,0 +1,276 @@
+"""
+Backfill of Entity List rules from the Federal Register.
+
+Takes a list of Federal Register document URLs, or a publication date range
+searched through the Federal Register API, and builds one deduplicated entity
+dataset from all of the rules:
+
+- documents are downloaded concurrently on a thread pool (over the shared
+  pooled session in utils.http_client),
+- each document is parsed in a process pool as soon as it arrives, so parsing
+  isn't held to one core by the GIL,
+- entities are merged in publication order, matched like EntityIndex does by
+  country plus any name or alias; the latest rule's version of an entity wins.
+
+Used by /api/entity-backfill and runnable on its own:
+
+    python -m utils.entity_backfill --from 2025-01-01 --to 2025-03-31 --output entity_list.csv
+    python -m utils.entity_backfill https://www.federalregister.gov/documents/2025/01/02/2025-00001/... --json entities.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from utils.entity_index import normalize_name
+from utils.entity_list_parser import EntityListParser, fetch_entity_list_xml, parse_entity_list
+from utils.http_client import fetch_text
+from utils.records import EntityRecord, json_default
+
+logger = logging.getLogger(__name__)
+
+FR_SEARCH_URL = 'https://www.federalregister.gov/api/v1/documents.json'
+
+# BIS publishes Entity List additions and revisions as rules
+FR_SEARCH_CONDITIONS = {
+    'conditions[agencies][]': 'industry-and-security-bureau',
+    'conditions[type][]': 'RULE',
+    'conditions[term]': '"Entity List"',
+}
+
+# Concurrent downloads, and processes parsing the downloaded rules
+BACKFILL_FETCH_WORKERS = int(os.getenv('BACKFILL_FETCH_WORKERS', '8'))
+BACKFILL_PARSE_WORKERS = int(os.getenv('BACKFILL_PARSE_WORKERS', str(os.cpu_count() or 2)))
+
+_URL_DATE = re.compile(r'/(\d{4})/(\d{2})/(\d{2})/')
+
+def to_xml_url(url: str) -> str:
+    """Return the XML URL of a Federal Register document; XML URLs and local files are kept as they are."""
+    if 'full_text/xml' in url or os.path.exists(url):
+        return url
+    return EntityListParser().convert_fr_url_to_xml_url(url)
+
+def publication_key(url: str) -> Tuple[str, str]:
+    """Sort key putting documents in publication order, by the date in their URL."""
+    match = _URL_DATE.search(url)
+    return (''.join(match.groups()) if match else '', url)
+
+def find_entity_list_documents(start_date: str, end_date: str) -> List[str]:
+    """
+    Search the Federal Register for Entity List rules published in a date range.
+
+    Args:
+        start_date: First publication date, YYYY-MM-DD
+        end_date: Last publication date, YYYY-MM-DD
+
+    Returns:
+        Federal Register document URLs, oldest first
+    """
+    query = {
+        **FR_SEARCH_CONDITIONS,
+        'conditions[publication_date][gte]': start_date,
+        'conditions[publication_date][lte]': end_date,
+        'fields[]': ['html_url', 'title'],
+        'order': 'oldest',
+        'per_page': 100,
+    }
+    url = f"{FR_SEARCH_URL}?{urlencode(query, doseq=True)}"
+
+    documents = []
+    while url:
+        page = json.loads(fetch_text(url))
+        for document in page.get('results') or []:
+            # The term also matches rules that only mention the Entity List in passing
+            if 'entity list' in (document.get('title') or '').lower():
+                documents.append(document['html_url'])
+        url = page.get('next_page_url')
+    return documents
+
+def _init_parse_worker():
+    # One log line per entity from every worker would drown everything else
+    logging.getLogger('utils.entity_list_parser').setLevel(logging.WARNING)
+
+def _parse_document(xml_content: str) -> List[EntityRecord]:
+    # Runs in a worker process
+    return parse_entity_list(xml_content)['entities']
+
+def consolidate_entities(documents: List[Tuple[str, List[EntityRecord]]]) -> Dict[str, Any]:
+    """
+    Merge the entities of several rules into one deduplicated list.
+
+    Args:
+        documents: (source URL, entities) for each parsed rule, in any order
+
+    Returns:
+        The same fields as parse_entity_list (total_entities, countries,
+        entities) plus the number of duplicates merged. Each entity gains
+        source_url, the latest rule listing it, and sources, every rule that did.
+    """
+    merged: List[EntityRecord] = []
+    positions: Dict[Tuple[str, str], int] = {}
+    duplicates = 0
+
+    for source, entities in sorted(documents, key=lambda document: publication_key(document[0])):
+        for entity in entities:
+            country = normalize_name(entity.country)
+            names = [normalize_name(name) for name in [entity.name] + entity.aliases]
+            names = [name for name in names if name]
+            position = next((positions[(country, name)] for name in names if (country, name) in positions), None)
+
+            if position is None:
+                position = len(merged)
+                merged.append(replace(entity, source_url=source, sources=(source,)))
+            else:
+                duplicates += 1
+                sources = merged[position].sources
+                merged[position] = replace(entity, source_url=source,
+                                           sources=sources if source in sources else sources + (source,))
+            for name in names:
+                positions[(country, name)] = position
+
+    countries = {}
+    for entity in merged:
+        country = entity.country
+        countries[country] = countries.get(country, 0) + 1
+
+    return {
+        'total_entities': len(merged),
+        'countries': countries,
+        'entities': merged,
+        'duplicates': duplicates,
+    }
+
+def backfill_entity_list(urls: List[str], fetch_workers: Optional[int] = None,
+                         parse_workers: Optional[int] = None,
+                         on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                         cancel_event=None) -> Dict[str, Any]:
+    """
+    Download and parse many Entity List rules and merge their entities.
+
+    Args:
+        urls: Federal Register document URLs, XML URLs or local XML files;
+            document URLs are converted with convert_fr_url_to_xml_url
+        fetch_workers: Concurrent downloads, defaults to BACKFILL_FETCH_WORKERS
+        parse_workers: Parser processes, defaults to BACKFILL_PARSE_WORKERS
+        on_progress: Called with {"url", "stage", ...} after each document is
+            fetched, parsed or fails
+        cancel_event: threading.Event; once set, no new downloads start
+
+    Returns:
+        consolidate_entities' result plus documents (the parsed URLs) and
+        failed ({url: error})
+    """
+    parsed: List[Tuple[str, List[EntityRecord]]] = []
+    failed: Dict[str, str] = {}
+
+    def report(url, stage, **details):
+        if on_progress:
+            on_progress({'url': url, 'stage': stage, **details})
+
+    xml_urls = []
+    for url in dict.fromkeys(urls):
+        try:
+            xml_urls.append(to_xml_url(url))
+        except ValueError as e:
+            failed[url] = str(e)
+            report(url, 'failed', error=str(e))
+    # Entities keep the XML URL as their source, since the CSV date is read from it
+    urls = list(dict.fromkeys(xml_urls))
+    if not urls:
+        return {**consolidate_entities([]), 'documents': [], 'failed': failed}
+
+    def fetch(url):
+        if cancel_event is not None and cancel_event.is_set():
+            raise RuntimeError('Backfill cancelled')
+        return fetch_entity_list_xml(url)
+
+    # Spawned workers don't inherit the fetch threads or open SQLite handles
+    context = multiprocessing.get_context('spawn')
+    with ThreadPoolExecutor(max_workers=min(fetch_workers or BACKFILL_FETCH_WORKERS, len(urls))) as fetchers, \
+            ProcessPoolExecutor(max_workers=min(parse_workers or BACKFILL_PARSE_WORKERS, len(urls)),
+                                mp_context=context, initializer=_init_parse_worker) as parsers:
+        downloads = {fetchers.submit(fetch, url): url for url in urls}
+        parses = {}
+        for future in as_completed(downloads):
+            url = downloads[future]
+            try:
+                xml_content = future.result()
+            except Exception as e:
+                failed[url] = str(e)
+                report(url, 'failed', error=str(e))
+                continue
+            report(url, 'fetched', bytes=len(xml_content))
+            # Parse while the remaining downloads are still running
+            parses[parsers.submit(_parse_document, xml_content)] = url
+
+        for future in as_completed(parses):
+            url = parses[future]
+            try:
+                entities = future.result()
+            except Exception as e:
+                failed[url] = str(e)
+                report(url, 'failed', error=str(e))
+                continue
+            parsed.append((url, entities))
+            report(url, 'parsed', entities=len(entities))
+
+    result = consolidate_entities(parsed)
+    result['documents'] = sorted((url for url, _ in parsed), key=publication_key)
+    result['failed'] = failed
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='*', help='Federal Register document or XML URLs')
+    parser.add_argument('--from', dest='start_date', help='first publication date to search, YYYY-MM-DD')
+    parser.add_argument('--to', dest='end_date', help='last publication date to search, YYYY-MM-DD')
+    parser.add_argument('--fetch-workers', type=int, default=None)
+    parser.add_argument('--parse-workers', type=int, default=None)
+    parser.add_argument('--output', help='write the merged entities as an Entity List CSV')
+    parser.add_argument('--json', help='write the merged result as JSON')
+    args = parser.parse_args()
+
+    logging.getLogger('utils.entity_list_parser').setLevel(logging.WARNING)
+
+    urls = list(args.urls)
+    if args.start_date or args.end_date:
+        if not (args.start_date and args.end_date):
+            parser.error('--from and --to go together')
+        found = find_entity_list_documents(args.start_date, args.end_date)
+        print(f"Found {len(found)} Entity List rules from {args.start_date} to {args.end_date}")
+        urls.extend(found)
+    if not urls:
+        parser.error('give document URLs or a --from/--to date range')
+
+    def show(progress):
+        if progress['stage'] == 'parsed':
+            print(f"{progress['url']}: {progress['entities']} entities")
+        elif progress['stage'] == 'failed':
+            print(f"{progress['url']}: error: {progress['error']}")
+
+    result = backfill_entity_list(urls, args.fetch_workers, args.parse_workers, on_progress=show)
+    print(f"\n{len(result['documents'])} rules parsed, {len(result['failed'])} failed, "
+          f"{result['total_entities']} entities ({result['duplicates']} duplicates merged)")
+
+    if args.output:
+        from utils.csv_generator import iter_entity_list_csv
+        with open(args.output, 'w', newline='', encoding='utf-8') as f:
+            f.writelines(iter_entity_list_csv(result['entities'], ''))
+        print(f"CSV saved to {args.output}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, default=json_default)
+        print(f"JSON saved to {args.json}")
+
+    return 1 if result['failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Persistent index of Entity List entries seen in earlier Federal Register rules.
+
+Each parsed rule is compared against the index and reported as added,
+modified and unchanged entities. Entities are matched by normalized country
+plus any of their names or aliases, so a listing that gains an alias or is
+renamed is reported as modified rather than added.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from utils.records import EntityRecord, json_default
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = os.getenv('ENTITY_INDEX_PATH', os.path.join('cache', 'entity_index.sqlite3'))
+
+# Fields compared to decide whether a matched entity was modified
+COMPARED_FIELDS = ['name', 'aliases', 'license_requirement', 'license_policy', 'federal_register_citation']
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+
+def normalize_name(text: Optional[str]) -> str:
+    """Lower-case a name or country and strip punctuation and extra whitespace."""
+    if not text:
+        return ""
+    return ' '.join(_NON_WORD.sub(' ', text.casefold()).split())
+
+def _comparable(entity: EntityRecord) -> Dict[str, Any]:
+    """Return the compared fields in a form where cosmetic differences don't count."""
+    values = {}
+    for field in COMPARED_FIELDS:
+        if field == 'aliases':
+            values[field] = sorted(normalize_name(alias) for alias in entity.aliases)
+        else:
+            values[field] = ' '.join((getattr(entity, field) or '').split())
+    return values
+
+class EntityIndex:
+    """SQLite-backed index of Entity List entities, used to diff new rules."""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        """
+        Open (or create) the index database.
+
+        Args:
+            path: Location of the SQLite file
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(
+            'CREATE TABLE IF NOT EXISTS entities ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+            ' country TEXT NOT NULL,'
+            ' record TEXT NOT NULL,'
+            ' first_source TEXT,'
+            ' last_source TEXT,'
+            ' updated_at REAL NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS names ('
+            ' country TEXT NOT NULL,'
+            ' name TEXT NOT NULL,'
+            ' entity_id INTEGER NOT NULL,'
+            ' PRIMARY KEY (country, name));'
+            'CREATE TABLE IF NOT EXISTS documents ('
+            ' source TEXT PRIMARY KEY,'
+            ' ingested_at REAL NOT NULL,'
+            ' diff TEXT NOT NULL);'
+        )
+        self._conn.commit()
+
+    def _find(self, entity: EntityRecord) -> Optional[int]:
+        """Return the id of the indexed entity matching any of this entity's names."""
+        country = normalize_name(entity.country)
+        for name in [entity.name] + entity.aliases:
+            row = self._conn.execute(
+                'SELECT entity_id FROM names WHERE country = ? AND name = ?',
+                (country, normalize_name(name))
+            ).fetchone()
+            if row:
+                return row[0]
+        return None
+
+    def _record_names(self, entity_id: int, entity: EntityRecord) -> None:
+        country = normalize_name(entity.country)
+        for name in [entity.name] + entity.aliases:
+            key = normalize_name(name)
+            if key:
+                self._conn.execute(
+                    'INSERT OR IGNORE INTO names (country, name, entity_id) VALUES (?, ?, ?)',
+                    (country, key, entity_id)
+                )
+
+    def _diff(self, entities: List[EntityRecord]) -> Dict[str, Any]:
+        added, modified, unchanged = [], [], []
+        matches = []
+        for entity in entities:
+            entity_id = self._find(entity)
+            if entity_id is None:
+                added.append(entity)
+                matches.append(None)
+                continue
+
+            previous = EntityRecord.from_dict(json.loads(self._conn.execute(
+                'SELECT record FROM entities WHERE id = ?', (entity_id,)
+            ).fetchone()[0]))
+            old_values, new_values = _comparable(previous), _comparable(entity)
+            changed_fields = [field for field in COMPARED_FIELDS if old_values[field] != new_values[field]]
+            if changed_fields:
+                modified.append({'entity': entity, 'previous': previous, 'changed_fields': changed_fields})
+            else:
+                unchanged.append(entity)
+            matches.append(entity_id)
+
+        return {
+            'added': added,
+            'modified': modified,
+            'unchanged': unchanged,
+            'counts': {'added': len(added), 'modified': len(modified), 'unchanged': len(unchanged)},
+        }, matches
+
+    def diff(self, entities: List[EntityRecord]) -> Dict[str, Any]:
+        """
+        Compare entities against the index without recording them.
+
+        Args:
+            entities: Entities as returned by EntityListParser.extract_entities
+
+        Returns:
+            Dictionary with 'added', 'modified' (entity, previous record and
+            changed fields), 'unchanged' and 'counts'
+        """
+        with self._lock:
+            diff, _ = self._diff(entities)
+            return diff
+
+    def update(self, entities: List[EntityRecord], source: str) -> Dict[str, Any]:
+        """
+        Diff a parsed rule against the index, then record its entities.
+
+        A source that has already been ingested is not diffed again; the diff
+        computed when it was first seen is returned instead.
+
+        Args:
+            entities: Entities parsed from the rule
+            source: Identifier of the rule, usually its XML URL
+
+        Returns:
+            The diff, as returned by diff(), plus 'source' and 'previously_ingested'
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT diff FROM documents WHERE source = ?', (source,)).fetchone()
+            if row:
+                logger.info(f"Entity index already contains {source}, returning stored diff")
+                return {**json.loads(row[0]), 'source': source, 'previously_ingested': True}
+
+            diff, matches = self._diff(entities)
+            now = time.time()
+            for entity, entity_id in zip(entities, matches):
+                record = json.dumps(entity.to_dict())
+                if entity_id is None:
+                    entity_id = self._conn.execute(
+                        'INSERT INTO entities (country, record, first_source, last_source, updated_at) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (normalize_name(entity.country), record, source, source, now)
+                    ).lastrowid
+                else:
+                    self._conn.execute(
+                        'UPDATE entities SET record = ?, last_source = ?, updated_at = ? WHERE id = ?',
+                        (record, source, now, entity_id)
+                    )
+                self._record_names(entity_id, entity)
+
+            self._conn.execute(
+                'INSERT INTO documents (source, ingested_at, diff) VALUES (?, ?, ?)',
+                (source, now, json.dumps(diff, default=json_default))
+            )
+            self._conn.commit()
+            logger.info(f"Entity index updated from {source}: {diff['counts']}")
+            return {**diff, 'source': source, 'previously_ingested': False}
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of indexed entities and ingested documents."""
+        with self._lock:
+            return {
+                'entities': self._conn.execute('SELECT COUNT(*) FROM entities').fetchone()[0],
+                'documents': self._conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0],
+            }
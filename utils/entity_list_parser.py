@@ -5,8 +5,13 @@ Utilities for fetching, parsing, and processing Bureau of Industry and Security
 
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
+from utils.http_client import fetch_text
+from utils.metrics import STAGE_SECONDS
+from utils.records import EntityRecord
 import xml.etree.ElementTree as ET
 import re
+import io
 import logging
 import json
 import os
@@ -16,6 +21,30 @@ from typing import Dict, List, Optional, Tuple, Any, Union
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def _element_text(element) -> str:
+    """Equivalent of BeautifulSoup's get_text(strip=True) for an lxml element."""
+    return ''.join(text.strip() for text in element.itertext() if text.strip())
+
+# A DOCTYPE with an internal subset, which may declare entities used in the text
+_INTERNAL_SUBSET = re.compile(r'<!DOCTYPE[^>\[]*\[')
+
+def _expand_internal_entities(xml_content: str) -> str:
+    """
+    Return the document with entities declared in its internal subset expanded.
+
+    BeautifulSoup's lxml-xml builder stops at an internal subset and drops the
+    rest of the document, so such documents are run through lxml first. Only
+    internal entities are resolved; nothing is fetched from the network.
+    """
+    parser = etree.XMLParser(resolve_entities='internal', no_network=True, recover=True)
+    root = etree.fromstring(xml_content.encode('utf-8'), parser)
+    if root is None:
+        return xml_content
+    return etree.tostring(root, encoding='unicode')
+
+# Characters outside Latin-1 and Latin Extended-A/B, removed by _clean_text
+_ODD_CHARACTERS = re.compile(r'[^\x00-\x7F\u00A0-\u00FF\u0100-\u017F\u0180-\u024F]+')
+
 class EntityListParser:
     """Parser for BIS Entity List XML data from the Federal Register."""
     
@@ -40,9 +69,7 @@ class EntityListParser:
         """
         logger.info(f"Fetching XML from: {url}")
         try:
-            response = requests.get(url, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            return response.text
+            return fetch_text(url, headers=self.headers, timeout=30)
         except requests.RequestException as e:
             logger.error(f"Error fetching XML: {e}")
             raise Exception(f"Failed to fetch XML data: {e}")
@@ -60,17 +87,17 @@ class EntityListParser:
         if not text:
             return ""
         
-        # Replace special characters
-        text = re.sub(r'â', '', text)
-        text = re.sub(r'Â§', '§', text)
-        
-        # Replace other odd Unicode characters
-        text = re.sub(r'[^\x00-\x7F\u00A0-\u00FF\u0100-\u017F\u0180-\u024F]+', '', text)
-        
-        # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)
+        # Plain ASCII can't contain any of the odd characters, so only the
+        # whitespace needs normalizing. This covers most table cells.
+        if not text.isascii():
+            # Replace special characters
+            text = text.replace('â', '').replace('Â§', '§')
+            
+            # Replace other odd Unicode characters
+            text = _ODD_CHARACTERS.sub('', text)
         
-        return text.strip()
+        # Normalize whitespace (same whitespace set as the \s regex class)
+        return ' '.join(text.split())
     
     def _extract_aliases_from_text(self, text: str) -> List[str]:
         """
@@ -108,7 +135,85 @@ class EntityListParser:
         
         return aliases
     
-    def extract_entities(self, xml_content: str) -> List[Dict[str, Any]]:
+    def _entity_from_row(self, country: Optional[str], entity_text: str,
+                         alias_texts: List[str], field_texts: List[str]) -> Optional[EntityRecord]:
+        """
+        Build an entity from the raw text of one entity row (I=22) of the table.
+        
+        Args:
+            country: The country from the most recent country header row
+            entity_text: Raw text of the second cell
+            alias_texts: Raw text of each list item in the second cell
+            field_texts: Raw text of the remaining cells (license requirement,
+                license policy and Federal Register citation)
+            
+        Returns:
+            The entity, or None for separator rows
+        """
+        second_cell_text = self._clean_text(entity_text)
+        
+        # Skip rows with just asterisks (separator rows)
+        if not second_cell_text or second_cell_text.strip() == "******" or re.match(r'^[\*\s]+$', second_cell_text):
+            return None
+        
+        # This is a main entity row
+        # First, check if this is an entity name with a.k.a. in it
+        if "a.k.a." in second_cell_text:
+            # Extract entity name (everything before a.k.a.)
+            entity_name = second_cell_text.split("a.k.a.")[0].strip().rstrip(',')
+        else:
+            # Try to extract entity name from the second cell text
+            entity_name_parts = second_cell_text.split(',', 1)
+            entity_name = entity_name_parts[0].strip()
+        
+        # Create entity object
+        entity = EntityRecord(country=country, name=entity_name)
+        
+        # Extract aliases from list items
+        for li_text in alias_texts:
+            li_text = self._clean_text(li_text)
+            if not li_text:
+                continue
+                
+            # Check if this is an alias (starts with dash/emdash)
+            if li_text.startswith('—') or li_text.startswith('-'):
+                # This is an alias
+                alias = li_text.replace('—', '', 1).replace('-', '', 1).strip()
+                if alias:
+                    # Clean up "and" at the end of aliases
+                    if alias.endswith('and'):
+                        alias = alias[:-3].strip()
+                    entity.aliases.append(alias)
+        
+        # Extract additional fields
+        if len(field_texts) > 0:
+            entity.license_requirement = self._clean_text(field_texts[0])
+        
+        if len(field_texts) > 1:
+            entity.license_policy = self._clean_text(field_texts[1])
+        
+        if len(field_texts) > 2:
+            entity.federal_register_citation = self._clean_text(field_texts[2])
+        
+        # Only add if it's not a separator row
+        if entity_name.startswith('*') or "*" in entity_name:
+            return None
+        
+        logger.info(f"Added entity: {entity_name} from {country}")
+        if entity.aliases:
+            logger.info(f"  Aliases: {', '.join(entity.aliases)}")
+        return entity
+    
+    def _add_text_aliases(self, entities: List[EntityRecord]) -> None:
+        """Post-processing to extract aliases from the name for entities without any."""
+        for entity in entities:
+            if not entity.aliases and entity.name:
+                potential_aliases = self._extract_aliases_from_text(entity.name)
+                if potential_aliases:
+                    entity.aliases = potential_aliases
+                    logger.info(f"  Extracted aliases for {entity.name}: {', '.join(potential_aliases)}")
+    
+    def extract_entities(self, xml_content: str) -> List[EntityRecord]:
         """
         Extract entity information from the XML content.
         
@@ -116,7 +221,7 @@ class EntityListParser:
             xml_content: The raw XML content as a string
             
         Returns:
-            A list of dictionaries containing structured entity information
+            A list of EntityRecords with structured entity information
             
         Raises:
             Exception: If the XML parsing fails
@@ -125,6 +230,9 @@ class EntityListParser:
         entities = []
         
         try:
+            if _INTERNAL_SUBSET.search(xml_content):
+                xml_content = _expand_internal_entities(xml_content)
+            
             # Parse the XML using BeautifulSoup
             soup = BeautifulSoup(xml_content, 'lxml-xml')
             
@@ -139,9 +247,8 @@ class EntityListParser:
             logger.info(f"Found {len(rows)} rows in table")
             
             current_country = None
-            current_entity = None
             
-            for i, row in enumerate(rows):
+            for row in rows:
                 cells = row.find_all('ENT')
                 
                 if not cells:
@@ -154,83 +261,122 @@ class EntityListParser:
                     continue
                 
                 # Look for entity rows (rows with I=22 attribute)
-                if cells[0].get('I') == '22':
-                    # Entity row should have content in the second cell
-                    if len(cells) > 1 and cells[1]:
-                        second_cell_text = self._clean_text(cells[1].get_text(strip=True))
-                        
-                        # Skip rows with just asterisks (separator rows)
-                        if not second_cell_text or second_cell_text.strip() == "******" or re.match(r'^[\*\s]+$', second_cell_text):
-                            continue
-                        
-                        # This is a main entity row
-                        # First, check if this is an entity name with a.k.a. in it
-                        is_entity_with_alias = False
-                        if "a.k.a." in second_cell_text:
-                            is_entity_with_alias = True
-                            # Extract entity name (everything before a.k.a.)
-                            entity_name = second_cell_text.split("a.k.a.")[0].strip().rstrip(',')
-                        else:
-                            # Try to extract entity name from the second cell text
-                            entity_name_parts = second_cell_text.split(',', 1)
-                            entity_name = entity_name_parts[0].strip()
-                        
-                        # Create entity object
-                        entity = {
-                            'country': current_country,
-                            'name': entity_name,
-                            'aliases': [],
-                            'license_requirement': "",
-                            'license_policy': "",
-                            'federal_register_citation': ""
-                        }
-                        
-                        # Extract aliases from list items
-                        list_items = cells[1].find_all('LI')
-                        
-                        if list_items:
-                            # Process list items
-                            for li in list_items:
-                                li_text = self._clean_text(li.get_text(strip=True))
-                                if not li_text:
-                                    continue
-                                    
-                                # Check if this is an alias (starts with dash/emdash)
-                                if li_text.startswith('—') or li_text.startswith('-'):
-                                    # This is an alias
-                                    alias = li_text.replace('—', '', 1).replace('-', '', 1).strip()
-                                    if alias:
-                                        # Clean up "and" at the end of aliases
-                                        if alias.endswith('and'):
-                                            alias = alias[:-3].strip()
-                                        entity['aliases'].append(alias)
-                        
-                        # Extract additional fields
-                        if len(cells) > 2:
-                            entity['license_requirement'] = self._clean_text(cells[2].get_text(strip=True))
-                        
-                        if len(cells) > 3:
-                            entity['license_policy'] = self._clean_text(cells[3].get_text(strip=True))
-                        
-                        if len(cells) > 4:
-                            entity['federal_register_citation'] = self._clean_text(cells[4].get_text(strip=True))
-                        
-                        # Only add if it's not a separator row
-                        if not entity_name.startswith('*') and "*" not in entity_name:
+                # Entity row should have content in the second cell
+                if cells[0].get('I') == '22' and len(cells) > 1:
+                    entity = self._entity_from_row(
+                        current_country,
+                        cells[1].get_text(strip=True),
+                        [li.get_text(strip=True) for li in cells[1].find_all('LI')],
+                        [cell.get_text(strip=True) for cell in cells[2:5]]
+                    )
+                    if entity:
+                        entities.append(entity)
+            
+            self._add_text_aliases(entities)
+            return entities
+            
+        except Exception as e:
+            logger.error(f"Error parsing XML content: {e}", exc_info=True)
+            raise Exception(f"Failed to parse XML content: {e}")
+    
+    def extract_entities_streaming(self, xml_content: str) -> List[EntityRecord]:
+        """
+        Extract entity information with lxml's iterparse, one ROW at a time.
+        
+        Produces the same output as extract_entities, but never builds the whole
+        document tree: each row is cleared as soon as it has been processed, so
+        memory stays flat on large Entity List rules. Documents the row-by-row
+        walk can't match exactly go to extract_entities instead: a default XML
+        namespace (tags no longer match GPOTABLE/ROW), a DOCTYPE with an internal
+        subset (declared entities) or a GPOTABLE nested in another.
+        
+        Args:
+            xml_content: The raw XML content as a string
+            
+        Returns:
+            A list of EntityRecords with structured entity information
+            
+        Raises:
+            Exception: If the XML parsing fails
+        """
+        if _INTERNAL_SUBSET.search(xml_content):
+            logger.info("XML declares its own entities, parsing the whole tree")
+            return self.extract_entities(xml_content)
+        
+        logger.info("Streaming XML content to extract entities")
+        entities = []
+        
+        try:
+            # Like BeautifulSoup, parse the decoded text regardless of the declared encoding
+            source = io.BytesIO(xml_content.encode('utf-8'))
+            events = etree.iterparse(
+                source,
+                events=('start-ns', 'start', 'end'),
+                tag=('GPOTABLE', 'ROW'),
+                encoding='utf-8',
+                recover=True,
+                huge_tree=True
+            )
+            
+            # Only rows of the first GPOTABLE are read, as in extract_entities
+            table_depth = 0
+            found_table = False
+            row_count = 0
+            current_country = None
+            
+            for event, element in events:
+                if event == 'start-ns':
+                    if element[0] == '':
+                        logger.info("XML has a default namespace, parsing the whole tree")
+                        return self.extract_entities(xml_content)
+                    continue
+                
+                if element.tag == 'GPOTABLE':
+                    if event == 'start':
+                        table_depth += 1
+                        found_table = True
+                        if table_depth > 1:
+                            logger.info("XML has nested GPOTABLEs, parsing the whole tree")
+                            return self.extract_entities(xml_content)
+                    else:
+                        table_depth -= 1
+                        if table_depth == 0:
+                            break
+                    continue
+                
+                if event != 'end':
+                    continue
+                
+                if table_depth > 0:
+                    row_count += 1
+                    cells = list(element.iter('ENT'))
+                    
+                    if cells and cells[0].get('I') == '01':
+                        current_country = self._clean_text(_element_text(cells[0]))
+                        logger.info(f"Found country: {current_country}")
+                    elif cells and cells[0].get('I') == '22' and len(cells) > 1:
+                        entity = self._entity_from_row(
+                            current_country,
+                            _element_text(cells[1]),
+                            [_element_text(li) for li in cells[1].iter('LI')],
+                            [_element_text(cell) for cell in cells[2:5]]
+                        )
+                        if entity:
                             entities.append(entity)
-                            current_entity = entity
-                            logger.info(f"Added entity: {entity_name} from {current_country}")
-                            if entity['aliases']:
-                                logger.info(f"  Aliases: {', '.join(entity['aliases'])}")
+                
+                # Free the row and any siblings already processed
+                element.clear()
+                parent = element.getparent()
+                if parent is not None:
+                    while element.getprevious() is not None:
+                        del parent[0]
             
-            # Post-processing to extract aliases from text if needed
-            for entity in entities:
-                if not entity['aliases'] and entity['name']:
-                    potential_aliases = self._extract_aliases_from_text(entity['name'])
-                    if potential_aliases:
-                        entity['aliases'] = potential_aliases
-                        logger.info(f"  Extracted aliases for {entity['name']}: {', '.join(potential_aliases)}")
+            if not found_table:
+                logger.error("No GPOTABLE found in XML content")
+                return entities
             
+            logger.info(f"Streamed {row_count} rows in table")
+            self._add_text_aliases(entities)
             return entities
             
         except Exception as e:
@@ -267,12 +413,12 @@ class EntityListParser:
             logger.error(f"Error converting URL: {e}")
             raise ValueError(f"Failed to convert URL: {e}")
     
-    def process_entities(self, entities: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def process_entities(self, entities: List[EntityRecord]) -> Dict[str, Any]:
         """
         Process the extracted entities into a structured format.
         
         Args:
-            entities: List of entity dictionaries
+            entities: List of entity records
             
         Returns:
             Processed data with statistics and structured entities
@@ -280,7 +426,7 @@ class EntityListParser:
         logger.info(f"Processing {len(entities)} entities")
         
         # Filter out entities with empty license requirements
-        filtered_entities = [entity for entity in entities if entity.get('license_requirement', '').strip()]
+        filtered_entities = [entity for entity in entities if entity.license_requirement.strip()]
         
         if len(filtered_entities) < len(entities):
             logger.info(f"Filtered out {len(entities) - len(filtered_entities)} entities with empty license requirements")
@@ -288,7 +434,7 @@ class EntityListParser:
         # Process entities and generate statistics
         countries = {}
         for entity in filtered_entities:
-            country = entity.get('country', 'Unknown')
+            country = entity.country
             countries[country] = countries.get(country, 0) + 1
         
         return {
@@ -334,17 +480,23 @@ def fetch_entity_list_xml(url: str) -> str:
         logger.error(f"Error fetching XML from URL: {e}")
         raise Exception(f"Failed to fetch XML data: {e}")
 
-def parse_entity_list(xml_content_or_path: str) -> Dict[str, Any]:
+@STAGE_SECONDS.time(stage='xml_parse')
+def parse_entity_list(xml_content_or_path: str, streaming: bool = True) -> Dict[str, Any]:
     """
     Parse Entity List XML content or file into structured data.
     
     Args:
         xml_content_or_path: Either raw XML content or a path to an XML file
+        streaming: Use the lxml iterparse extractor instead of BeautifulSoup.
+            Both produce the same entities; streaming is faster and uses far
+            less memory on large rules.
         
     Returns:
-        Structured entity list data
+        Structured entity list data (total_entities, countries and the
+        entities as EntityRecords)
     """
     parser = EntityListParser()
+    extract = parser.extract_entities_streaming if streaming else parser.extract_entities
     
     # Check if input is a file path
     if os.path.exists(xml_content_or_path):
@@ -352,12 +504,12 @@ def parse_entity_list(xml_content_or_path: str) -> Dict[str, Any]:
         try:
             with open(xml_content_or_path, 'r', encoding='utf-8') as f:
                 xml_content = f.read()
-            entities = parser.extract_entities(xml_content)
+            entities = extract(xml_content)
             return parser.process_entities(entities)
         except Exception as e:
             logger.error(f"Error processing file: {e}")
             raise Exception(f"Failed to process XML file: {e}")
     
     # If not a file, treat as raw XML content
-    entities = parser.extract_entities(xml_content_or_path)
+    entities = extract(xml_content_or_path)
     return parser.process_entities(entities) 
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+Persistent cache for LLM-processed SDN entries.
+
+Results are stored in SQLite keyed by a stable digest of the normalized entry
+text, category, prompt version and model, so they survive restarts and are
+shared between every process on the machine.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from utils.parse_sanctions import normalize_category
+from utils.records import SdnRecord, json_default
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.getenv('ENTRY_CACHE_PATH', os.path.join('cache', 'entries.sqlite3'))
+
+def normalize_entry_text(entry_text: str) -> str:
+    """Collapse whitespace so the same entry scraped twice gets the same key."""
+    return ' '.join(entry_text.split())
+
+def make_entry_key(entry_text: str, category: str, prompt_version: str, model: str) -> str:
+    """
+    Build a stable cache key for an entry.
+
+    Args:
+        entry_text: The raw entry text
+        category: The category of the entry
+        prompt_version: Version (content hash) of the prompt template
+        model: Name of the model used to process the entry
+
+    Returns:
+        Hex SHA-256 digest of the normalized inputs
+    """
+    parts = [normalize_entry_text(entry_text), normalize_category(category), prompt_version, model]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+class EntryCache:
+    """SQLite-backed store of processed entries with hit/miss counters."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Location of the SQLite file
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, '
+            'result TEXT NOT NULL, '
+            'created_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, entry_text: str, category: str, prompt_version: str, model: str) -> Optional[SdnRecord]:
+        """
+        Look up a processed entry.
+
+        Returns:
+            The cached result, or None if the entry has not been processed before
+        """
+        key = make_entry_key(entry_text, category, prompt_version, model)
+        with self._lock:
+            row = self._conn.execute('SELECT result FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return SdnRecord.from_dict(json.loads(row[0]))
+
+    def set(self, entry_text: str, category: str, prompt_version: str, model: str, result: SdnRecord) -> None:
+        """Store a processed entry, replacing any previous result for the same key."""
+        key = make_entry_key(entry_text, category, prompt_version, model)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries (key, result, created_at) VALUES (?, ?, ?)',
+                (key, json.dumps(result, default=json_default), time.time())
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process and the number of stored entries."""
+        with self._lock:
+            size = self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': size
+            }
@@ -0,0 +1,238 @@
+"""
+Shared HTTP layer for OFAC and Federal Register fetches.
+
+All requests go through one pooled requests.Session. Successful responses are
+stored on disk with their ETag/Last-Modified validators, and later fetches of
+the same URL send If-None-Match/If-Modified-Since so an unchanged document
+costs a 304 instead of a full download. The cache survives restarts and is
+shared by every process on the machine; it is bounded by entry count, total
+body size and age, dropping the least recently validated responses first.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.metrics import STAGE_SECONDS, CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HTTP_CACHE_PATH = os.getenv('HTTP_CACHE_PATH', os.path.join('cache', 'http_cache.sqlite3'))
+
+# Seconds a stored response is served without revalidating (0 always revalidates)
+DEFAULT_MAX_AGE = float(os.getenv('HTTP_CACHE_MAX_AGE', '0'))
+
+# Bounds of the stored responses: count, total body characters and seconds
+# since last validated (0 disables a bound)
+DEFAULT_MAX_ENTRIES = int(os.getenv('HTTP_CACHE_MAX_ENTRIES', '1000'))
+DEFAULT_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+DEFAULT_TTL = float(os.getenv('HTTP_CACHE_TTL', str(7 * 24 * 3600)))
+
+# Request headers that make a GET conditional
+CONDITIONAL_HEADERS = ('if-none-match', 'if-modified-since')
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+class ResponseCache:
+    """SQLite store of response bodies and their validators, keyed by URL."""
+
+    def __init__(self, path: str = DEFAULT_HTTP_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Location of the SQLite file
+            max_entries: Most responses kept (0 for no limit)
+            max_bytes: Most body characters kept across all responses (0 for no limit)
+            ttl: Seconds a response is kept after it was last fetched or
+                revalidated (0 keeps it until evicted by size)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'url TEXT PRIMARY KEY, '
+            'body TEXT NOT NULL, '
+            'etag TEXT, '
+            'last_modified TEXT, '
+            'fetched_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def count(self, counter: str) -> None:
+        """Add one to a counter ("hits", "revalidated" or "misses")."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, url: str) -> Optional[Dict[str, object]]:
+        """Return the stored response for url, or None if there is none or it expired."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at = row
+        if self.ttl and time.time() - fetched_at > self.ttl:
+            return None
+        return {'body': body, 'etag': etag, 'last_modified': last_modified, 'fetched_at': fetched_at}
+
+    def set(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Store a response, then evict old ones past the cache's bounds."""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (url, body, etag, last_modified, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (url, body, etag, last_modified, time.time())
+            )
+            self._evict(keep=url)
+            self._conn.commit()
+
+    def _evict(self, keep: str) -> None:
+        """Drop expired rows, then the least recently validated ones until within bounds."""
+        if self.ttl:
+            self.evictions += self._conn.execute(
+                'DELETE FROM responses WHERE fetched_at < ? AND url != ?', (time.time() - self.ttl, keep)
+            ).rowcount
+        if not self.max_entries and not self.max_bytes:
+            return
+        count, size = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses').fetchone()
+        if (not self.max_entries or count <= self.max_entries) and (not self.max_bytes or size <= self.max_bytes):
+            return
+        rows = self._conn.execute(
+            'SELECT url, LENGTH(body) FROM responses WHERE url != ? ORDER BY fetched_at', (keep,)
+        ).fetchall()
+        evicted = []
+        for url, length in rows:
+            if (not self.max_entries or count <= self.max_entries) and (not self.max_bytes or size <= self.max_bytes):
+                break
+            evicted.append((url,))
+            count -= 1
+            size -= length
+        self._conn.executemany('DELETE FROM responses WHERE url = ?', evicted)
+        self.evictions += len(evicted)
+
+    def touch(self, url: str) -> None:
+        """Mark a stored response as freshly validated."""
+        with self._lock:
+            self._conn.execute('UPDATE responses SET fetched_at = ? WHERE url = ?', (time.time(), url))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters for this process and the number and size of stored responses."""
+        with self._lock:
+            size, total = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses'
+            ).fetchone()
+            return {
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'responses': size,
+                'bytes': total
+            }
+
+_response_cache = None
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache, opening it on first use."""
+    global _response_cache
+    with _session_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+        return _response_cache
+
+@STAGE_SECONDS.time(stage='fetch')
+def fetch_text(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 30,
+               max_age: Optional[float] = None) -> str:
+    """
+    Fetch a URL as text, using the on-disk cache and conditional requests.
+
+    Args:
+        url: The URL to fetch
+        headers: Extra request headers
+        timeout: Request timeout in seconds
+        max_age: Seconds a stored response is used without asking the server,
+            defaults to HTTP_CACHE_MAX_AGE
+
+    Returns:
+        The response body, decoded as requests would decode it
+
+    Raises:
+        requests.RequestException: If the request fails or returns an error status
+    """
+    if max_age is None:
+        max_age = DEFAULT_MAX_AGE
+    cache = get_response_cache()
+    cached = cache.get(url)
+
+    if cached and time.time() - cached['fetched_at'] < max_age:
+        cache.count('hits')
+        CACHE_REQUESTS.inc(cache='http', result='hit')
+        return cached['body']
+
+    request_headers = dict(headers or {})
+    if cached:
+        if cached['etag']:
+            request_headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            request_headers['If-Modified-Since'] = cached['last_modified']
+
+    response = get_session().get(url, headers=request_headers, timeout=timeout)
+
+    if response.status_code == 304:
+        if cached:
+            logger.info(f"Not modified, using cached copy of {url}")
+            cache.count('revalidated')
+            CACHE_REQUESTS.inc(cache='http', result='revalidated')
+            cache.touch(url)
+            return cached['body']
+        # Nothing to fall back on (the caller sent its own validators), so ask for the body
+        logger.info(f"Got 304 for {url} without a cached copy, fetching it again unconditionally")
+        request_headers = {name: value for name, value in request_headers.items()
+                           if name.lower() not in CONDITIONAL_HEADERS}
+        response = get_session().get(url, headers=request_headers, timeout=timeout)
+        if response.status_code == 304:
+            raise requests.HTTPError(f"304 Not Modified for {url} without conditional headers", response=response)
+
+    response.raise_for_status()
+    cache.count('misses')
+    CACHE_REQUESTS.inc(cache='http', result='miss')
+
+    body = response.text
+    cache.set(url, body, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+    return body
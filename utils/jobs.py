@@ -0,0 +1,182 @@
+"""
+Background job queue for long-running work such as LLM processing.
+
+Jobs go into a bounded queue and are run by a fixed pool of worker threads.
+Each job has an ID and a state (queued, running, done, failed, cancelled).
+Jobs submitted with the same key while one is still queued or running share
+that job instead of starting a second one.
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+class Job:
+    """A unit of work tracked by JobQueue."""
+
+    def __init__(self, func: Callable[['Job'], Any], key: Optional[str] = None):
+        self.id = str(uuid.uuid4())
+        self.key = key
+        self.func = func
+        self.state = QUEUED
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Set by cancel(); long-running job functions should check it
+        self.cancel_event = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'key': self.key,
+            'state': self.state,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+class JobQueue:
+    """Bounded job queue served by a fixed pool of daemon worker threads."""
+
+    def __init__(self, num_workers: int = 2, max_queued: int = 20, max_history: int = 200):
+        """
+        Args:
+            num_workers: Number of jobs run at the same time
+            max_queued: Number of jobs that can wait for a worker
+            max_history: Number of finished jobs kept for status lookups
+        """
+        self.num_workers = num_workers
+        self.max_history = max_history
+        self._queue: 'queue.Queue[Job]' = queue.Queue(maxsize=max_queued)
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._active_keys: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+        for i in range(num_workers):
+            worker = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+
+    def submit(self, func: Callable[[Job], Any], key: Optional[str] = None,
+               on_created: Optional[Callable[[Job], None]] = None) -> Tuple[Job, bool]:
+        """
+        Queue a job, or return the active job already queued under the same key.
+
+        Args:
+            func: Called with the Job once a worker picks it up
+            key: Deduplication key, e.g. the result hash being processed
+            on_created: Called with a new Job before it is queued, so anything it
+                records (such as a "queued" status) is in place before a worker
+                can start the job; not called when an existing job is returned
+
+        Returns:
+            (job, created) where created is False if an existing job was returned
+
+        Raises:
+            JobQueueFull: If the queue is at capacity
+        """
+        with self._lock:
+            if key is not None:
+                existing = self._active_keys.get(key)
+                if existing is not None and existing.state in ACTIVE_STATES:
+                    return existing, False
+
+            # Only submit() adds to the queue and it holds the lock, so a
+            # queue with room now still has room after on_created
+            if self._queue.full():
+                raise JobQueueFull("Too many jobs are queued, try again later")
+
+            job = Job(func, key)
+            if on_created is not None:
+                on_created(job)
+            self._queue.put_nowait(job)
+
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active_keys[key] = job
+            self._trim_history()
+            return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job. Queued jobs never start; running jobs are asked to stop.
+
+        Returns:
+            The job, or None if it is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state in ACTIVE_STATES:
+                job.cancel_event.set()
+                if job.state == QUEUED:
+                    self._finish(job, CANCELLED)
+            return job
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {state: 0 for state in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+            for job in self._jobs.values():
+                counts[job.state] += 1
+            return {**counts, 'workers': self.num_workers, 'capacity': self._queue.maxsize}
+
+    def _finish(self, job: Job, state: str, error: Optional[str] = None) -> None:
+        # Caller holds self._lock
+        job.state = state
+        job.error = error
+        job.finished_at = time.time()
+        job.func = None
+        if job.key is not None and self._active_keys.get(job.key) is job:
+            del self._active_keys[job.key]
+
+    def _trim_history(self) -> None:
+        # Caller holds self._lock; drop the oldest finished jobs
+        finished = [job_id for job_id, job in self._jobs.items() if job.state not in ACTIVE_STATES]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                with self._lock:
+                    if job.state != QUEUED:
+                        continue
+                    job.state = RUNNING
+                    job.started_at = time.time()
+                    func = job.func
+
+                try:
+                    func(job)
+                except Exception as e:
+                    logger.error(f"Job {job.id} failed: {e}", exc_info=True)
+                    with self._lock:
+                        self._finish(job, FAILED, str(e))
+                else:
+                    with self._lock:
+                        self._finish(job, CANCELLED if job.cancel_event.is_set() else DONE)
+            finally:
+                self._queue.task_done()
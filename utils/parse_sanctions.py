@@ -1,4 +1,5 @@
 import re
+from utils.metrics import STAGE_SECONDS
 from utils.scrape_sanctions import scrape_sanctions_update
 
 def normalize_category(category):
@@ -38,51 +39,91 @@ def normalize_category(category):
     
     return category_mapping.get(category, category.capitalize())
 
-def parse_sanctions_text(text):
+# Category headers as counted by parse_sanctions_text (any case, known verbs only)
+_COUNT_HEADER = re.compile(
+    r"The following (\w+)(?:s)? (?:has|have) been (?:added|removed|modified|updated)", re.IGNORECASE
+)
+# Category headers as split by extract_entries (exact case, any participle)
+_ENTRY_HEADER = re.compile(r"The following (\w+)(?:s)? (?:has|have) been")
+
+# Entries start with a capital letter or a digit
+_ENTRY_START = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+
+@STAGE_SECONDS.time(stage='entry_extraction')
+def tokenize_sanctions_text(text):
     """
-    Parse sanctions update text and count entries by category.
+    Walk sanctions update text once, counting entries and collecting them by category.
+    
+    Produces exactly what parse_sanctions_text and extract_entries return for
+    the same text. The two disagree slightly on what a category header is, so
+    each keeps its own state while sharing the one pass over the lines.
     
     Args:
         text (str): The sanctions update text to parse
         
     Returns:
-        dict: Dictionary with categories as keys and entry counts as values
+        tuple: (counts, entries) where counts maps normalized categories to entry
+        counts and entries maps the raw category names to lists of entry texts
     """
-    # Split the text into lines
-    lines = text.split('\n')
-    
-    results = {}
-    current_category = None
+    counts = {}
+    count_category = None
     current_count = 0
     
-    # Regular expression to match category headers - handles various formats
-    category_pattern = r"The following (\w+)(?:s)? (?:has|have) been (?:added|removed|modified|updated)"
-    # Pattern to match the start of an entry (typically starts with a name or identifier)
-    entry_pattern = r"^[A-Z0-9]"  # Entries typically start with capital letters or numbers
+    entries = {}
+    entry_list = None
+    current_entry = []
     
-    for line in lines:
-        # Check for category headers
-        category_match = re.search(category_pattern, line, re.IGNORECASE)
-        if category_match:
+    for line in text.split('\n'):
+        stripped = line.strip()
+        is_entry_start = bool(stripped) and stripped[0] in _ENTRY_START
+        
+        # Both header patterns need the word "following", so most lines skip the regexes
+        has_header = 'llow' in line.lower()
+        
+        count_match = _COUNT_HEADER.search(line) if has_header else None
+        if count_match:
             # If we were counting a previous category, save its count
-            if current_category:
-                results[current_category] = current_count
-            
-            # Start counting new category
-            raw_category = category_match.group(1)
-            current_category = normalize_category(raw_category)
+            if count_category:
+                counts[count_category] = current_count
+            count_category = normalize_category(count_match.group(1))
             current_count = 0
-            continue
-            
-        # Count entries (non-empty lines that start with capital letters or numbers)
-        if current_category and line.strip() and re.match(entry_pattern, line.strip()):
+        elif count_category and is_entry_start:
             current_count += 1
+        
+        entry_match = _ENTRY_HEADER.search(line) if has_header else None
+        if entry_match:
+            # Save the previous category's last entry
+            if entry_list is not None and current_entry:
+                entry_list.append('\n'.join(current_entry))
+                current_entry = []
+            entry_list = entries.setdefault(entry_match.group(1), [])
+        elif entry_list is not None and is_entry_start:
+            if current_entry:
+                entry_list.append('\n'.join(current_entry))
+            current_entry = [stripped]
+        elif current_entry and stripped:
+            # Continuation of the current entry
+            current_entry.append(stripped)
+    
+    # Save the count for the last category, and the last entry
+    if count_category:
+        counts[count_category] = current_count
+    if entry_list is not None and current_entry:
+        entry_list.append('\n'.join(current_entry))
     
-    # Save the count for the last category
-    if current_category:
-        results[current_category] = current_count
+    return counts, entries
+
+def parse_sanctions_text(text):
+    """
+    Parse sanctions update text and count entries by category.
+    
+    Args:
+        text (str): The sanctions update text to parse
         
-    return results
+    Returns:
+        dict: Dictionary with categories as keys and entry counts as values
+    """
+    return tokenize_sanctions_text(text)[0]
 
 def main():
     # Get URL from user
@@ -0,0 +1,130 @@
+"""
+Incremental store for SDN entries processed by a job that is still running.
+
+Each entry is appended as soon as the LLM returns it, numbered in completion
+order. Readers pass the sequence number of the last row they have seen (the
+cursor) and get only the newer rows, so reviewers can start on the first
+entries while the rest are still being processed.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.records import SdnRecord, json_default
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTIAL_RESULTS_PATH = os.getenv(
+    'PARTIAL_RESULTS_PATH', os.path.join('cache', 'partial_results.sqlite3')
+)
+
+# Rows older than this are dropped whenever a new run starts
+MAX_ROW_AGE = 7 * 24 * 3600
+
+class PartialResultStore:
+    """SQLite-backed, append-only rows per result hash, read with a cursor."""
+
+    def __init__(self, path: str = DEFAULT_PARTIAL_RESULTS_PATH):
+        """
+        Open (or create) the store.
+
+        Args:
+            path: Location of the SQLite file
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS rows ('
+            'result_hash TEXT NOT NULL, '
+            'seq INTEGER NOT NULL, '
+            'task_index INTEGER NOT NULL, '
+            'entry TEXT NOT NULL, '
+            'created_at REAL NOT NULL, '
+            'PRIMARY KEY (result_hash, seq))'
+        )
+        self._conn.commit()
+
+    def reset(self, result_hash: str) -> None:
+        """Drop any rows left by an earlier run for this result, and any stale rows."""
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM rows WHERE result_hash = ? OR created_at < ?',
+                (result_hash, time.time() - MAX_ROW_AGE)
+            )
+            self._conn.commit()
+
+    def append(self, result_hash: str, task_index: int, entry: SdnRecord) -> int:
+        """
+        Add a processed entry.
+
+        Args:
+            result_hash: The scrape result the entry belongs to
+            task_index: Position of the entry in the final, ordered results
+            entry: The processed entry, stored in its JSON form
+
+        Returns:
+            The sequence number (cursor) of the new row
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT MAX(seq) FROM rows WHERE result_hash = ?', (result_hash,)
+            ).fetchone()
+            seq = (row[0] or 0) + 1
+            self._conn.execute(
+                'INSERT INTO rows (result_hash, seq, task_index, entry, created_at) VALUES (?, ?, ?, ?, ?)',
+                (result_hash, seq, task_index, json.dumps(entry, default=json_default), time.time())
+            )
+            self._conn.commit()
+            return seq
+
+    def fetch(self, result_hash: str, cursor: int = 0,
+              limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Return the rows added after a cursor.
+
+        Args:
+            result_hash: The scrape result to read
+            cursor: Sequence number of the last row already seen (0 for all rows)
+            limit: Maximum number of rows to return
+
+        Returns:
+            (rows, next_cursor) where each row has 'seq', 'index' and 'entry', and
+            next_cursor is the value to pass on the next call
+        """
+        query = 'SELECT seq, task_index, entry FROM rows WHERE result_hash = ? AND seq > ? ORDER BY seq'
+        params: List[Any] = [result_hash, cursor]
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            found = self._conn.execute(query, params).fetchall()
+
+        rows = [{'seq': seq, 'index': task_index, 'entry': json.loads(entry)}
+                for seq, task_index, entry in found]
+        next_cursor = rows[-1]['seq'] if rows else cursor
+        return rows, next_cursor
+
+    def ordered_entries(self, result_hash: str) -> List[Dict[str, Any]]:
+        """Return every stored entry for a result in the original entry order."""
+        with self._lock:
+            found = self._conn.execute(
+                'SELECT entry FROM rows WHERE result_hash = ? ORDER BY task_index', (result_hash,)
+            ).fetchall()
+        return [json.loads(entry) for (entry,) in found]
+
+    def count(self, result_hash: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM rows WHERE result_hash = ?', (result_hash,)
+            ).fetchone()[0]
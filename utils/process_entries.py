@@ -1,16 +1,30 @@
 import re
 from utils.scrape_sanctions import scrape_sanctions_update
-from utils.parse_sanctions import parse_sanctions_text, normalize_category
+from utils.parse_sanctions import parse_sanctions_text, normalize_category, tokenize_sanctions_text
+from utils.entry_cache import EntryCache
+from utils.sdn_rules import parse_sdn_entry
+from utils.rate_limit import RateLimiter
+from utils.csv_generator import iter_csv_lines
+from utils.metrics import STAGE_SECONDS, LLM_REQUESTS, JSON_PARSES, CACHE_REQUESTS, ENTRIES_PROCESSED
+from utils.records import SdnRecord
 import anthropic
 import json
 from dotenv import load_dotenv
 import os
 from datetime import datetime
 import csv
+import hashlib
+import functools
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Initialize the Anthropic client with proper API key handling
 try:
     api_key = os.getenv("ANTHROPIC_API_KEY")
@@ -18,11 +32,43 @@ try:
         print("Warning: ANTHROPIC_API_KEY not found in environment variables")
         client = None
     else:
-        client = anthropic.Anthropic(api_key=api_key)
+        # Retries are handled by rate_limiter below, which also adapts concurrency
+        client = anthropic.Anthropic(api_key=api_key, max_retries=0)
 except Exception as e:
     print(f"Error initializing Anthropic client: {e}")
     client = None
 
+# Model used to extract structured data from entries
+MODEL = "claude-3-5-haiku-20241022"
+
+# Maximum number of entries sent to the LLM at the same time
+DEFAULT_CONCURRENCY = int(os.getenv("PROCESS_CONCURRENCY", "4"))
+
+# Largest response MODEL can produce, and the share of it each batched entry gets
+MAX_OUTPUT_TOKENS = 8192
+TOKENS_PER_ENTRY = 1000
+
+# Most entries whose answers fit in one response
+MAX_BATCH_SIZE = MAX_OUTPUT_TOKENS // TOKENS_PER_ENTRY
+
+# Number of entries packed into a single LLM request (1 disables batching)
+DEFAULT_BATCH_SIZE = int(os.getenv("PROCESS_BATCH_SIZE", "1"))
+
+# Parse well-formed entries with local rules and only send the rest to the LLM
+DEFAULT_USE_RULES = os.getenv("SDN_RULES", "1") != "0"
+
+# Log one in every LOG_SAMPLE_EVERY processed entries at INFO (0 disables);
+# full prompts and responses are only logged at DEBUG
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "100"))
+_entry_counter = itertools.count(1)
+
+# Shared by every worker: request budget, in-flight limit and retry policy
+rate_limiter = RateLimiter(
+    requests_per_minute=float(os.getenv("ANTHROPIC_RPM", "0")),
+    max_concurrency=int(os.getenv("ANTHROPIC_MAX_IN_FLIGHT", "8")),
+    max_retries=int(os.getenv("ANTHROPIC_MAX_RETRIES", "5"))
+)
+
 def extract_regimes(text):
     """
     Extract regime codes from brackets in the text.
@@ -47,60 +93,29 @@ def extract_entries(text):
     Returns:
         dict: Dictionary with categories as keys and lists of entries as values
     """
-    lines = text.split('\n')
-    entries = {}
-    current_category = None
-    current_entry = []
-    
-    category_pattern = r"The following (\w+)(?:s)? (?:has|have) been"
-    entry_pattern = r"^[A-Z0-9]"
-    
-    for line in lines:
-        category_match = re.search(category_pattern, line)
-        if category_match:
-            # Save previous category's entries if they exist
-            if current_category and current_entry:
-                if current_category not in entries:
-                    entries[current_category] = []
-                entries[current_category].append('\n'.join(current_entry))
-                current_entry = []
-            
-            current_category = category_match.group(1)
-            if current_category not in entries:
-                entries[current_category] = []
-            continue
-        
-        # If line starts with capital letter or number, it's a new entry
-        if current_category and line.strip() and re.match(entry_pattern, line.strip()):
-            if current_entry:  # Save previous entry if it exists
-                entries[current_category].append('\n'.join(current_entry))
-                current_entry = []
-            current_entry = [line.strip()]
-        elif current_entry and line.strip():  # Continue current entry
-            current_entry.append(line.strip())
-    
-    # Save the last entry
-    if current_category and current_entry:
-        entries[current_category].append('\n'.join(current_entry))
-    
-    return entries
+    return tokenize_sanctions_text(text)[1]
+
+# The prompt template lives in prompts/ at the project root
+PROMPT_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    'prompts', 'SDN_individuals.txt')
 
+# Everything before this marker (the examples and instructions) is the same for
+# every request and is sent as a cacheable prefix
+RAW_DATA_MARKER = '<raw_data>'
+
+# Shortest prefix Anthropic caches for MODEL; shorter ones are billed as normal
+# input, so the template's examples and field guide are kept above it
+PROMPT_CACHE_MIN_TOKENS = 2048
+
+@functools.lru_cache(maxsize=None)
 def load_prompt_template():
-    """Load the prompt template from the file"""
+    """Load the prompt template from the file, once per process"""
     try:
-        # Attempt to open the prompt file from the project root
-        with open('prompts/SDN_individuals.txt', 'r') as f:
-            content = f.read()
-            return content  # Return the entire template including examples
+        with open(PROMPT_TEMPLATE_PATH, 'r') as f:
+            return f.read()  # Return the entire template including examples
     except FileNotFoundError:
-        # Try with a relative path from the utils directory
-        try:
-            with open('../prompts/SDN_individuals.txt', 'r') as f:
-                content = f.read()
-                return content
-        except FileNotFoundError:
-            # As a last resort, return a basic prompt
-            return """Please extract the following information from the sanctions entry:
+        # As a last resort, return a basic prompt
+        return """Please extract the following information from the sanctions entry:
             - Name
             - Category (Individual, Entity, etc.)
             - Nationality 
@@ -111,10 +126,89 @@ def load_prompt_template():
             Raw Data:
             {{RAW_DATA}}"""
 
+@functools.lru_cache(maxsize=None)
+def get_prompt_version():
+    """Return a short content hash of the prompt template, used to key cached results"""
+    return hashlib.sha256(load_prompt_template().encode('utf-8')).hexdigest()[:12]
+
+def split_prompt_template():
+    """
+    Split the template into the shared prefix and the per-request part.
+    
+    Returns:
+        tuple: (prefix, suffix) where the suffix holds {{RAW_DATA}}. The prefix
+        is empty if the template has no <raw_data> section.
+    """
+    template = load_prompt_template()
+    index = template.find(RAW_DATA_MARKER)
+    if index == -1:
+        return '', template
+    return template[:index], template[index:]
+
+def build_message_content(request_text):
+    """
+    Build the user message content for a request.
+    
+    The shared prefix goes first, marked with cache_control so repeated
+    requests read it from Anthropic's prompt cache instead of processing it
+    again. The text the model sees is the same as the unsplit template.
+    
+    Args:
+        request_text (str): The per-request part of the prompt
+    
+    Returns:
+        list: Content blocks for messages.create
+    """
+    prefix, _ = split_prompt_template()
+    content = []
+    if prefix:
+        content.append({"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}})
+    content.append({"type": "text", "text": request_text})
+    return content
+
+class TokenUsage:
+    """Thread-safe running totals of token usage for one processing run."""
+    
+    FIELDS = ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens')
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.cache_hits = 0
+        self.totals = dict.fromkeys(self.FIELDS, 0)
+    
+    def add(self, usage):
+        """Add the usage object of one API response."""
+        if usage is None:
+            return
+        with self._lock:
+            self.requests += 1
+            for field in self.FIELDS:
+                self.totals[field] += getattr(usage, field, 0) or 0
+            if getattr(usage, 'cache_read_input_tokens', 0):
+                self.cache_hits += 1
+    
+    def to_dict(self):
+        with self._lock:
+            prompt_tokens = (self.totals['input_tokens'] + self.totals['cache_creation_input_tokens']
+                             + self.totals['cache_read_input_tokens'])
+            return {
+                'requests': self.requests,
+                'cache_hits': self.cache_hits,
+                **self.totals,
+                # Share of prompt tokens served from the prompt cache
+                'cache_hit_rate': round(self.totals['cache_read_input_tokens'] / prompt_tokens, 3)
+                if prompt_tokens else 0.0
+            }
+
 def extract_json_from_response(response_text):
     """
     Carefully extract JSON from Claude's response, handling various formats.
     """
+    with STAGE_SECONDS.time(stage='json_parse'):
+        return _extract_json_from_response(response_text)
+
+def _extract_json_from_response(response_text):
     # Clean up the text first
     cleaned = response_text.strip()
     
@@ -122,6 +216,7 @@ def extract_json_from_response(response_text):
     try:
         result = json.loads(cleaned)
         # If we got here, it's valid JSON
+        JSON_PARSES.inc(method='direct')
         return result
     except json.JSONDecodeError:
         pass
@@ -168,18 +263,19 @@ def extract_json_from_response(response_text):
                 except json.JSONDecodeError:
                     continue
         
+        JSON_PARSES.inc(method='extracted')
         return result
         
     except (ValueError, json.JSONDecodeError) as e:
-        print(f"JSON parsing error: {str(e)}")
-        print("Original response:")
-        print(response_text)
+        logger.warning(f"JSON parsing error: {str(e)}")
+        logger.debug(f"Original response:\n{response_text}")
         
         # Fallback: Try to extract individual fields
         try:
             # Look for name field
             name_match = re.search(r'"name"\s*:\s*"([^"]+)"', cleaned)
             if name_match:
+                JSON_PARSES.inc(method='field_fallback')
                 return {
                     "name": name_match.group(1),
                     "notes": cleaned,
@@ -191,115 +287,500 @@ def extract_json_from_response(response_text):
         except Exception:
             pass
         
+        JSON_PARSES.inc(method='failed')
         raise ValueError("Could not extract valid JSON from response")
 
-def process_entry(entry_text, category):
+def call_model(request_text, max_tokens=1000, usage=None):
+    """
+    Send a request to Claude and return the stripped response text.
+    
+    The request goes through rate_limiter, so overload and rate-limit errors
+    are retried with backoff before they turn into a failed entry.
+    
+    Args:
+        request_text (str): The per-request part of the prompt; the shared
+            template prefix is added by build_message_content
+        max_tokens (int): Maximum number of tokens in the response
+        usage (TokenUsage): Optional totals to add this response's token usage to
+    
+    Returns:
+        str: The response text
+    """
+    # Check if client is properly initialized
+    if client is None:
+        raise Exception("Anthropic client is not initialized. Check your API key.")
+    
+    try:
+        content = build_message_content(request_text)
+        
+        def send():
+            with STAGE_SECONDS.time(stage='llm_request'):
+                return client.messages.create(
+                    model=MODEL,
+                    max_tokens=max_tokens,
+                    messages=[{"role": "user", "content": content}],
+                    # Newer SDKs dropped the temperature argument; the API still accepts the field
+                    extra_body={"temperature": 0}
+                )
+        
+        message = rate_limiter.call(send)
+        LLM_REQUESTS.inc(outcome='ok')
+        if usage is not None:
+            usage.add(getattr(message, 'usage', None))
+        
+        # Get the response text
+        return message.content[0].text.strip()
+        
+    except Exception as api_error:
+        LLM_REQUESTS.inc(outcome='error')
+        logger.error(f"API error ({type(api_error).__name__}): {str(api_error)}")
+        raise Exception(f"Failed to call Anthropic API: {str(api_error)}")
+
+def finalize_result(result, entry_text, normalized_category):
+    """
+    Turn a parsed LLM result into a record, applying the fields we trust more than the LLM.
+    
+    Args:
+        result (dict): Parsed JSON result from the LLM
+        entry_text (str): The raw entry text
+        normalized_category (str): Category taken from the section heading
+    
+    Returns:
+        SdnRecord: The processed entry
+    """
+    record = SdnRecord.from_dict(result)
+    
+    # Use the normalized category from the heading
+    record.category = normalized_category
+    
+    # Manually extract regimes and override the LLM's extraction
+    regimes = extract_regimes(entry_text)
+    if regimes:
+        record.regimes = regimes
+    
+    return record
+
+def fallback_result(entry_text, category):
+    """
+    Build a basic structured result for an entry the LLM could not process.
+    
+    Args:
+        entry_text (str): The raw entry text
+        category (str): The category of the entry
+    
+    Returns:
+        SdnRecord: Structured information flagged with issue=True
+    """
+    # Extract regimes even in error case
+    regimes = extract_regimes(entry_text)
+    name = entry_text.split(',')[0].strip() if ',' in entry_text else entry_text.split()[0]
+    return SdnRecord(
+        name=name,
+        notes=entry_text,
+        nationality="Unknown",
+        category=normalize_category(category),
+        regimes=regimes if regimes else [],
+        issue=True
+    )
+
+def process_entry(entry_text, category, usage=None):
     """
     Process a single entry using Claude to extract structured information.
     
     Args:
         entry_text (str): The raw entry text
         category (str): The category of the entry (individual, entity, vessel, etc.)
+        usage (TokenUsage): Optional totals to add the request's token usage to
     
     Returns:
-        dict: Structured information about the entry
+        SdnRecord: Structured information about the entry
     """
     try:
         # Normalize the category
         normalized_category = normalize_category(category)
         
-        print(f"\nProcessing entry for category: {normalized_category}")
-        print("-" * 50)
-        print("Raw entry text:")
-        print(entry_text)
-        print("-" * 50)
+        entry_number = next(_entry_counter)
+        if LOG_SAMPLE_EVERY and entry_number % LOG_SAMPLE_EVERY == 0:
+            logger.info(f"Processing entry {entry_number} for category: {normalized_category}")
+        logger.debug(f"Raw entry text:\n{entry_text}")
         
-        # Debug API key
-        api_key = os.getenv("ANthropic_API_KEY")
-        #if not api_key:
-        #    print("Warning: ANTHROPIC_API_KEY not found in environment variables")
+        # Fill in the per-request part; the examples go in the cached prefix
+        _, request_template = split_prompt_template()
+        request_text = request_template.replace('{{RAW_DATA}}', entry_text)
         
-        # Check if client is properly initialized
-        if client is None:
-            raise Exception("Anthropic client is not initialized. Check your API key.")
-            
-        # Load the prompt template
-        prompt_template = load_prompt_template()
-        #print("\nUsing prompt template:")
-        #print(prompt_template)
-        #print("-" * 50)
-        
-        # Create the full prompt with examples and raw data
-        prompt = prompt_template.replace('{{RAW_DATA}}', entry_text)
-        #print("\nFull prompt being sent to API:")
-        #print(prompt)
-        #print("-" * 50)
-        
-        try:            
-            #print("\nMaking API call to Anthropic...")
-            # Now try the actual call
-            message = client.messages.create(
-                model="claude-3-5-haiku-20241022",
-                max_tokens=1000,
-                temperature=0,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            # Get the response text
-            response_text = message.content[0].text.strip()
-            #print("\nAPI Response:")
-            #print(response_text)
-            #print("-" * 50)
-            
-        except Exception as api_error:
-            print(f"\nAPI Error details: {str(api_error)}")
-            print(f"Error type: {type(api_error)}")
-            raise Exception(f"Failed to call Anthropic API: {str(api_error)}")
+        response_text = call_model(request_text, usage=usage)
         
         # Try to parse the JSON response
         try:
-            print("\nAttempting to parse JSON response...")
             result = extract_json_from_response(response_text)
-            print("\nParsed JSON result:")
-            print(json.dumps(result, indent=2))
-            
-            # Use the normalized category from the heading
-            result['category'] = normalized_category
-            
-            # Manually extract regimes and override the LLM's extraction
-            regimes = extract_regimes(entry_text)
-            if regimes:
-                result['Regime'] = regimes
-            
-            #print("\nFinal processed result:")
-            #print(json.dumps(result, indent=2))
-            #print("-" * 50)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Parsed JSON result:\n{json.dumps(result, indent=2)}")
             
-            return result
+            return finalize_result(result, entry_text, normalized_category)
         except Exception as json_error:
-            print(f"\nError parsing JSON response: {str(json_error)}")
-            print("Raw response that failed to parse:")
-            print(response_text)
+            logger.warning(f"Error parsing JSON response: {str(json_error)}")
+            logger.debug(f"Raw response that failed to parse:\n{response_text}")
             raise
     
     except Exception as e:
-        print(f"\nError processing entry: {str(e)}")
-        print(f"Entry text: {entry_text[:100]}...")
-        # Extract regimes even in error case
-        regimes = extract_regimes(entry_text)
-        # Create a basic structured response
-        name = entry_text.split(',')[0].strip() if ',' in entry_text else entry_text.split()[0]
-        error_result = {
-            "name": name,
-            "notes": entry_text,
-            "nationality": "Unknown",
-            "category": normalized_category,
-            "Regime": regimes if regimes else [],
-            "issue": True
-        }
-        print("\nError fallback result:")
-        print(json.dumps(error_result, indent=2))
-        return error_result
+        logger.warning(f"Error processing entry {entry_text[:100]!r}: {str(e)}")
+        return fallback_result(entry_text, category)
+
+def build_batch_prompt(entry_texts):
+    """
+    Build the per-request part of a prompt that asks for several entries at once.
+    
+    The few-shot prefix is sent once (see build_message_content), and the
+    entries are numbered so the response can be matched back to them.
+    
+    Args:
+        entry_texts (list): Raw entry texts
+    
+    Returns:
+        str: The request text
+    """
+    _, request_template = split_prompt_template()
+    
+    numbered_entries = '\n'.join(
+        f"<entry_{i}>\n{entry_text}\n</entry_{i}>"
+        for i, entry_text in enumerate(entry_texts, 1)
+    )
+    batch_instructions = (
+        f"The raw data below contains {len(entry_texts)} separate entries, numbered "
+        f"<entry_1> to <entry_{len(entry_texts)}>. Convert each one exactly as in the examples. "
+        f"Your output should be ONLY a JSON array with {len(entry_texts)} objects, in the same "
+        f"order as the entries, nothing else at all."
+    )
+    
+    return request_template.replace(
+        '<raw_data>\n{{RAW_DATA}}',
+        f"<batch_instructions>\n{batch_instructions}\n</batch_instructions>\n\n<raw_data>\n{numbered_entries}"
+    ).replace('{{RAW_DATA}}', numbered_entries)
+
+def extract_json_array_from_response(response_text):
+    """
+    Extract a list of JSON objects from a batch response.
+    
+    Items that cannot be parsed are returned as None so they can be
+    retried on their own.
+    
+    Args:
+        response_text (str): The raw response text
+    
+    Returns:
+        list: Parsed dictionaries (or None for unparseable items)
+    """
+    cleaned = response_text.strip()
+    
+    # First try to parse the whole array in one go
+    start_idx = cleaned.find('[')
+    end_idx = cleaned.rfind(']')
+    if start_idx != -1 and end_idx > start_idx:
+        try:
+            result = json.loads(cleaned[start_idx:end_idx + 1])
+            if isinstance(result, list):
+                return [item if isinstance(item, dict) else None for item in result]
+        except json.JSONDecodeError:
+            pass
+    
+    # Otherwise split out each top-level object and parse it on its own
+    items = []
+    depth = 0
+    in_string = False
+    escaped = False
+    object_start = -1
+    for i, char in enumerate(cleaned):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        
+        if char == '"':
+            in_string = True
+        elif char == '{':
+            if depth == 0:
+                object_start = i
+            depth += 1
+        elif char == '}' and depth > 0:
+            depth -= 1
+            if depth == 0:
+                try:
+                    items.append(extract_json_from_response(cleaned[object_start:i + 1]))
+                except ValueError:
+                    items.append(None)
+    
+    return items
+
+def process_entry_batch(entry_texts, category, usage=None):
+    """
+    Process several entries of the same category with a single Claude request.
+    
+    Entries whose results are missing or fail to parse are sent again
+    through process_entry on their own. More than MAX_BATCH_SIZE entries
+    are split over several requests so the answers fit in MAX_OUTPUT_TOKENS.
+    
+    Args:
+        entry_texts (list): Raw entry texts
+        category (str): The category shared by all entries
+        usage (TokenUsage): Optional totals to add the requests' token usage to
+    
+    Returns:
+        list: Structured information, one SdnRecord per entry, in order
+    """
+    if len(entry_texts) == 1:
+        return [process_entry(entry_texts[0], category, usage=usage)]
+    if len(entry_texts) > MAX_BATCH_SIZE:
+        return [result for start in range(0, len(entry_texts), MAX_BATCH_SIZE)
+                for result in process_entry_batch(entry_texts[start:start + MAX_BATCH_SIZE], category, usage=usage)]
+    
+    normalized_category = normalize_category(category)
+    logger.debug(f"Processing batch of {len(entry_texts)} entries for category: {normalized_category}")
+    
+    try:
+        prompt = build_batch_prompt(entry_texts)
+        response_text = call_model(prompt, max_tokens=TOKENS_PER_ENTRY * len(entry_texts), usage=usage)
+        items = extract_json_array_from_response(response_text)
+    except Exception as e:
+        logger.warning(f"Error processing batch: {str(e)}")
+        items = []
+    
+    if len(items) != len(entry_texts):
+        # We can't line the answers up with the entries, so retry them all
+        logger.warning(f"Batch returned {len(items)} results for {len(entry_texts)} entries, retrying individually")
+        items = [None] * len(entry_texts)
+    
+    results = []
+    for entry_text, item in zip(entry_texts, items):
+        if item is None or 'name' not in item:
+            results.append(process_entry(entry_text, category, usage=usage))
+        else:
+            results.append(finalize_result(item, entry_text, normalized_category))
+    
+    return results
+
+def process_entries_concurrently(tasks, process_func=None, max_workers=None, on_complete=None, batch_size=None,
+                                 entry_cache=None, cancel_event=None, use_rules=None, usage=None):
+    """
+    Process many entries with a bounded pool of worker threads.
+    
+    Args:
+        tasks (list): List of (entry_text, category) tuples
+        process_func (callable): Function called as process_func(entry_text, category),
+            returning an SdnRecord or its dict form; defaults to process_entry.
+            Ignored in batch mode.
+        max_workers (int): Maximum number of concurrent calls, defaults to PROCESS_CONCURRENCY
+        on_complete (callable): Optional callback called as on_complete(index, result)
+            each time a task finishes, in completion order
+        batch_size (int): Number of entries packed into one request, defaults to
+            PROCESS_BATCH_SIZE. Values above 1 use process_entry_batch; values
+            above MAX_BATCH_SIZE are lowered to it.
+        entry_cache (EntryCache): Optional persistent cache. Cached entries skip the LLM,
+            and new results without issues are stored in it.
+        cancel_event (threading.Event): Optional event; once set, entries that have
+            not started yet are skipped and left as None in the results
+        use_rules (bool): Parse well-formed entries with utils.sdn_rules instead of
+            the LLM, defaults to DEFAULT_USE_RULES (SDN_RULES=0 turns it off)
+        usage (TokenUsage): Optional totals to add token usage to. Not passed to a
+            custom process_func.
+    
+    Returns:
+        list: SdnRecords in the same order as tasks
+    """
+    if process_func is None:
+        process_func = functools.partial(process_entry, usage=usage)
+    if max_workers is None:
+        max_workers = DEFAULT_CONCURRENCY
+    if batch_size is None:
+        batch_size = DEFAULT_BATCH_SIZE
+    if batch_size > MAX_BATCH_SIZE:
+        logger.warning(f"Batch size {batch_size} would overflow the model's {MAX_OUTPUT_TOKENS}-token output, "
+                       f"using {MAX_BATCH_SIZE}")
+        batch_size = MAX_BATCH_SIZE
+    if use_rules is None:
+        use_rules = DEFAULT_USE_RULES
+    
+    results = [None] * len(tasks)
+    pending = list(range(len(tasks)))
+    
+    # Entries in the usual layout are parsed locally in microseconds
+    if use_rules:
+        unparsed = []
+        for index in pending:
+            parsed = parse_sdn_entry(*tasks[index])
+            if parsed is None:
+                unparsed.append(index)
+                continue
+            results[index] = parsed
+            if on_complete:
+                on_complete(index, parsed)
+        ENTRIES_PROCESSED.inc(len(pending) - len(unparsed), source='rules')
+        logger.info(f"Rule-based parser handled {len(pending) - len(unparsed)} of {len(pending)} entries")
+        pending = unparsed
+    
+    # Answer what we can from the cache before anything goes to the LLM
+    if entry_cache is not None:
+        prompt_version = get_prompt_version()
+        uncached = []
+        for index in pending:
+            entry_text, category = tasks[index]
+            cached = entry_cache.get(entry_text, category, prompt_version, MODEL)
+            if cached is None:
+                CACHE_REQUESTS.inc(cache='entry', result='miss')
+                uncached.append(index)
+                continue
+            CACHE_REQUESTS.inc(cache='entry', result='hit')
+            ENTRIES_PROCESSED.inc(source='cache')
+            results[index] = cached
+            if on_complete:
+                on_complete(index, cached)
+        pending = uncached
+    
+    # Group consecutive tasks of the same category into chunks of indexes
+    chunks = []
+    for index in pending:
+        category = tasks[index][1]
+        if (batch_size > 1 and chunks and len(chunks[-1]) < batch_size
+                and tasks[chunks[-1][0]][1] == category):
+            chunks[-1].append(index)
+        else:
+            chunks.append([index])
+    
+    def run_chunk(chunk):
+        if cancel_event is not None and cancel_event.is_set():
+            return []
+        category = tasks[chunk[0]][1]
+        entry_texts = [tasks[index][0] for index in chunk]
+        try:
+            if batch_size > 1:
+                return process_entry_batch(entry_texts, category, usage=usage)
+            # A custom process_func may still hand back the JSON form
+            return [SdnRecord.from_dict(process_func(entry_texts[0], category))]
+        except Exception as e:
+            logger.error(f"Error processing entry: {e}")
+            return [fallback_result(entry_text, category) for entry_text in entry_texts]
+    
+    max_workers = max(1, min(max_workers, len(chunks) or 1))
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run_chunk, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            for index, result in zip(futures[future], future.result()):
+                results[index] = result
+                ENTRIES_PROCESSED.inc(source='fallback' if result.issue else 'llm')
+                # Failed entries are not cached so they get another try next run
+                if entry_cache is not None and not result.issue:
+                    entry_text, category = tasks[index]
+                    entry_cache.set(entry_text, category, prompt_version, MODEL, result)
+                if on_complete:
+                    on_complete(index, result)
+            
+            if cancel_event is not None and cancel_event.is_set():
+                # Drop everything still queued; running requests finish on their own
+                for pending_future in futures:
+                    pending_future.cancel()
+    
+    return results
+
+SDN_CSV_HEADER = ['Date', 'Action', 'Name', 'Additional information', 'Country', 'Category', 'Regime']
+
+def sdn_csv_rows(processed_entries, date=""):
+    """
+    Turn processed entries into SDN CSV rows (without the header).
+    
+    Args:
+        processed_entries (dict): Category name -> list of SdnRecords
+        date (str): Value for the Date column, e.g. YYYYMMDD from the action URL
+    
+    Yields:
+        list: One row per entry, in SDN_CSV_HEADER order
+    """
+    for category, entries_list in processed_entries.items():
+        # Skip entries categorized as "change" or "changes"
+        if category.lower() in ["change", "changes"]:
+            continue
+        
+        # Determine action based on category
+        action = "Delisting" if category.lower() in ["deletion", "deletions"] else "Designation"
+        
+        for entry in entries_list:
+            # Extract nationality/country
+            country = entry.nationality
+            
+            # Get name
+            name = entry.name
+            
+            # Get additional information (notes)
+            additional_info = entry.notes
+            
+            # Standardize category to one of the accepted values
+            raw_category = entry.category or category.capitalize()
+            if raw_category.lower() in ['individual', 'individuals', 'person', 'persons']:
+                entry_category = 'Individual'
+            elif raw_category.lower() in ['entity', 'entities', 'organization', 'organisations', 'organizations']:
+                entry_category = 'Entity'
+            elif raw_category.lower() in ['vessel', 'vessels', 'ship', 'ships']:
+                entry_category = 'Vessel'
+            elif raw_category.lower() in ['aircraft', 'plane', 'planes', 'airplane', 'airplanes']:
+                entry_category = 'Aircraft'
+            else:
+                # Default to Entity if not one of the standard categories
+                entry_category = 'Entity'
+            
+            # Get regimes as comma-separated string
+            regimes = ', '.join(entry.regimes)
+            
+            yield [date, action, name, additional_info, country, entry_category, regimes]
+
+def sdn_date_from_url(url):
+    """
+    Read the action date from an OFAC recent actions URL.
+    
+    Args:
+        url (str): e.g. https://ofac.treasury.gov/recent-actions/20250102
+    
+    Returns:
+        str: The YYYYMMDD date if the URL ends in eight digits, otherwise ""
+    """
+    # Extract date from URL if last 8 characters are digits (YYYYMMDD format)
+    return url[-8:] if url[-8:].isdigit() else ""
+
+def iter_sdn_csv(processed_entries, date=""):
+    """
+    Stream an SDN CSV file line by line, header first, e.g. as a Flask response body.
+    
+    Time spent formatting lines is recorded under the csv stage once the
+    stream ends.
+    
+    Args:
+        processed_entries (dict): Category name -> list of SdnRecords
+        date (str): Value for the Date column
+    
+    Yields:
+        str: One CSV-formatted line per row
+    """
+    return STAGE_SECONDS.time_iter(
+        iter_csv_lines(itertools.chain([SDN_CSV_HEADER], sdn_csv_rows(processed_entries, date))), stage='csv'
+    )
+
+def write_sdn_csv(f, processed_entries, date=""):
+    """
+    Write processed entries as an SDN CSV file.
+    
+    Args:
+        f: Text file object opened with newline=''
+        processed_entries (dict): Category name -> list of SdnRecords
+        date (str): Value for the Date column
+    """
+    with STAGE_SECONDS.time(stage='csv'):
+        writer = csv.writer(f)
+        writer.writerow(SDN_CSV_HEADER)
+        writer.writerows(sdn_csv_rows(processed_entries, date))
 
 def main():
     # Get URL from user
@@ -324,71 +805,35 @@ def main():
         print("Operation cancelled by user.")
         return
     
-    # Process each entry with the LLM
+    # Process each entry with the LLM, reusing results from earlier runs
     processed_entries = {}
+    entry_cache = EntryCache()
+    usage = TokenUsage()
     
     print("\nProcessing entries...")
     for category, category_entries in entries.items():
         print(f"\nProcessing {category} entries...")
-        processed_entries[category] = []
         
-        for i, entry in enumerate(category_entries, 1):
-            print(f"  Processing {category} entry {i}/{len(category_entries)}")
-            processed = process_entry(entry, category)
-            processed_entries[category].append(processed)
+        def report_progress(index, result):
+            print(f"  Processed {category} entry {index + 1}/{len(category_entries)}")
+        
+        processed_entries[category] = process_entries_concurrently(
+            [(entry, category) for entry in category_entries],
+            on_complete=report_progress,
+            entry_cache=entry_cache,
+            usage=usage
+        )
     
-    # Extract date from URL if last 8 characters are digits (YYYYMMDD format)
-    date = ""
-    if url[-8:].isdigit():
-        date = url[-8:]
+    print(f"\nToken usage: {usage.to_dict()}")
+    
+    date = sdn_date_from_url(url)
     
     # Save results to a CSV file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_file = f"sanctions_processed_{timestamp}.csv"
     
     with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        # Write header
-        writer.writerow(['Date', 'Action', 'Name', 'Additional information', 'Country', 'Category', 'Regime'])
-        
-        # Write data
-        for category, entries_list in processed_entries.items():
-            for entry in entries_list:
-                # Determine action based on category
-                action = "Delisting" if category.lower() in ["deletion", "deletions"] else "Designation"
-                
-                # Skip entries categorized as "change" or "changes"
-                if category.lower() in ["change", "changes"]:
-                    continue
-                
-                # Extract nationality/country
-                country = entry.get('nationality', '')
-                
-                # Get name
-                name = entry.get('name', '')
-                
-                # Get additional information (notes)
-                additional_info = entry.get('notes', '')
-                
-                # Standardize category to one of the accepted values
-                raw_category = entry.get('category', category.capitalize())
-                if raw_category.lower() in ['individual', 'individuals', 'person', 'persons']:
-                    entry_category = 'Individual'
-                elif raw_category.lower() in ['entity', 'entities', 'organization', 'organisations', 'organizations']:
-                    entry_category = 'Entity'
-                elif raw_category.lower() in ['vessel', 'vessels', 'ship', 'ships']:
-                    entry_category = 'Vessel'
-                elif raw_category.lower() in ['aircraft', 'plane', 'planes', 'airplane', 'airplanes']:
-                    entry_category = 'Aircraft'
-                else:
-                    # Default to Entity if not one of the standard categories
-                    entry_category = 'Entity'
-                
-                # Get regimes as comma-separated string
-                regimes = ', '.join(entry.get('Regime', []))
-                
-                # Write row
-                writer.writerow([date, action, name, additional_info, country, entry_category, regimes])
+        write_sdn_csv(f, processed_entries, date)
     
     print(f"\nProcessing complete! Results saved to {output_file}")
     
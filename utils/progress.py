@@ -0,0 +1,55 @@
+"""
+In-process publish/subscribe for job progress updates.
+
+Background jobs publish each new status record here, and the Server-Sent
+Events endpoint waits on it so progress is pushed to the browser as soon as
+it changes instead of being polled.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+class ProgressBroker:
+    """Keeps the latest status per session and wakes up anyone waiting for a newer one."""
+
+    def __init__(self, max_sessions: int = 1000):
+        self.max_sessions = max_sessions
+        self._condition = threading.Condition()
+        # session_id -> (version, status)
+        self._latest: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+    def publish(self, session_id: str, status: Dict[str, Any]) -> None:
+        """Record a new status for a session and notify waiting subscribers."""
+        with self._condition:
+            version = self._latest.get(session_id, (0, None))[0] + 1
+            self._latest.pop(session_id, None)
+            self._latest[session_id] = (version, status)
+            # Forget the oldest sessions (dicts keep insertion order)
+            while len(self._latest) > self.max_sessions:
+                del self._latest[next(iter(self._latest))]
+            self._condition.notify_all()
+
+    def wait(self, session_id: str, after_version: int = 0,
+             timeout: float = 15) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """
+        Wait for a status newer than ``after_version``.
+
+        Args:
+            session_id: The session to watch
+            after_version: Version of the last status the caller has seen
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            (version, status), or None if nothing newer was published in time
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                latest = self._latest.get(session_id)
+                if latest and latest[0] > after_version:
+                    return latest
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
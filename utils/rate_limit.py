@@ -0,0 +1,250 @@
+"""
+Client-side rate limiting and retries for Anthropic API calls.
+
+One RateLimiter is shared by every worker thread in the process. Each call
+goes through three layers:
+
+- a token bucket that spaces requests to stay under a requests-per-minute budget,
+- an adaptive concurrency gate that halves the number of requests in flight
+  whenever the API reports overload (429/529) and grows it back one step at a
+  time after a window of successes,
+- retries with jittered exponential backoff, waiting for the server's
+  retry-after instead when it sends one and holding back every worker for
+  that long.
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import anthropic
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying, and the subset that means "slow down"
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+OVERLOAD_STATUSES = {429, 503, 529}
+
+def _status_code(error: BaseException) -> Optional[int]:
+    return getattr(error, 'status_code', None)
+
+def is_retryable(error: BaseException) -> bool:
+    """Return True for errors a later attempt may not hit (overload, timeouts, 5xx)."""
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    return _status_code(error) in RETRY_STATUSES
+
+def is_overloaded(error: BaseException) -> bool:
+    return _status_code(error) in OVERLOAD_STATUSES
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Read the server's requested wait from an error response.
+
+    Args:
+        error: The exception raised by the client
+
+    Returns:
+        Seconds to wait, or None if the response didn't say
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    # HTTP-date form
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a request may be sent."""
+
+    def __init__(self, rate: Optional[float], capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second, or None/0 for no rate limit
+            capacity: Largest burst allowed, defaults to one second's worth
+        """
+        self.rate = rate or 0
+        self.capacity = capacity or max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for the given number of seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif not self.rate:
+                    return
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class AdaptiveConcurrency:
+    """
+    Gate on the number of requests in flight, tuned by additive increase /
+    multiplicative decrease.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, cooldown: float = 1.0):
+        """
+        Args:
+            max_limit: Largest number of requests allowed in flight
+            min_limit: The limit never drops below this
+            cooldown: Seconds after a decrease during which the limit doesn't
+                change again, so errors from requests already in flight don't
+                cut it twice and it doesn't grow straight back
+        """
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.cooldown = cooldown
+        self.limit = max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, overloaded: bool = False) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if overloaded:
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit // 2)
+                    self._last_decrease = now
+                    self._successes = 0
+                    logger.warning(f"API overloaded, reducing concurrency to {self.limit}")
+            elif now - self._last_decrease >= self.cooldown:
+                self._successes += 1
+                # One more slot after a full window of successes at the current limit
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+class RateLimiter:
+    """Rate limit, concurrency limit and retry policy shared by all API calls."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, max_concurrency: int = 8,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        """
+        Args:
+            requests_per_minute: Request budget, or None/0 for no rate limit
+            max_concurrency: Upper bound for requests in flight
+            max_retries: Retries after the first attempt before giving up
+            base_delay: Backoff before the first retry, doubled on each attempt
+            max_delay: Longest single wait, also caps retry-after
+        """
+        self.bucket = TokenBucket(requests_per_minute / 60 if requests_per_minute else None)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.overloads = 0
+        self.failures = 0
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with jitter: between half and all of base * 2**attempt."""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def call(self, func: Callable[[], Any]) -> Any:
+        """
+        Call func under the rate and concurrency limits, retrying transient errors.
+
+        Args:
+            func: Function sending one API request
+
+        Returns:
+            Whatever func returns
+
+        Raises:
+            The last error, once it is not retryable or retries are used up
+        """
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            self.concurrency.acquire()
+            try:
+                result = func()
+            except Exception as e:
+                overloaded = is_overloaded(e)
+                self.concurrency.release(overloaded)
+                with self._lock:
+                    self.calls += 1
+                    self.overloads += overloaded
+                    if not is_retryable(e) or attempt == self.max_retries:
+                        self.failures += 1
+                        raise
+                    self.retries += 1
+
+                wait = retry_after(e)
+                if wait is not None:
+                    wait = min(wait, self.max_delay)
+                    # The server asked everyone to back off, not just this request
+                    self.bucket.pause(wait)
+                else:
+                    wait = self.backoff(attempt)
+                logger.warning(f"API call failed ({e.__class__.__name__}, status {_status_code(e)}), "
+                               f"retry {attempt + 1}/{self.max_retries} in {wait:.1f}s")
+                time.sleep(wait)
+                continue
+
+            self.concurrency.release()
+            with self._lock:
+                self.calls += 1
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retries,
+                'overloads': self.overloads,
+                'failures': self.failures,
+                'concurrency_limit': self.concurrency.limit,
+                'in_flight': self.concurrency.in_flight,
+                'requests_per_minute': self.bucket.rate * 60,
+            }
@@ -0,0 +1,119 @@
+"""
+Record types for parsed Entity List entities and processed SDN entries.
+
+Both are slotted dataclasses: no per-instance __dict__, so tens of thousands
+of them take far less memory than the equivalent dicts, and field access is
+a plain attribute lookup. They stay records everywhere inside the app and are
+converted only where JSON goes in or out (API requests and responses, the
+SQLite caches and stores):
+
+    record.to_dict()          # JSON-ready dict, same keys as before
+    EntityRecord.from_dict()  # back from JSON; records pass through unchanged
+    json.dumps(value, default=json_default)
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+@dataclass(slots=True)
+class EntityRecord:
+    """One entity row of an Entity List rule."""
+    country: Optional[str]
+    name: str
+    aliases: List[str] = field(default_factory=list)
+    license_requirement: str = ""
+    license_policy: str = ""
+    federal_register_citation: str = ""
+    # Set on entities merged from several rules (see utils.entity_backfill)
+    source_url: str = ""
+    sources: Tuple[str, ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the JSON form, as parse_entity_list has always produced it."""
+        data = {
+            'country': self.country,
+            'name': self.name,
+            'aliases': self.aliases,
+            'license_requirement': self.license_requirement,
+            'license_policy': self.license_policy,
+            'federal_register_citation': self.federal_register_citation,
+        }
+        if self.source_url:
+            data['source_url'] = self.source_url
+        if self.sources:
+            data['sources'] = list(self.sources)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Any) -> 'EntityRecord':
+        """Build a record from its JSON form; a record is returned as it is."""
+        if isinstance(data, cls):
+            return data
+        return cls(
+            country=data.get('country'),
+            name=data.get('name') or '',
+            aliases=list(data.get('aliases') or []),
+            license_requirement=data.get('license_requirement') or '',
+            license_policy=data.get('license_policy') or '',
+            federal_register_citation=data.get('federal_register_citation') or '',
+            source_url=data.get('source_url') or '',
+            sources=tuple(data.get('sources') or ()),
+        )
+
+# Keys of an SDN result with a field of their own; anything else the LLM adds goes to extra
+_SDN_KEYS = {'name', 'notes', 'nationality', 'category', 'Regime', 'issue'}
+
+@dataclass(slots=True)
+class SdnRecord:
+    """One processed SDN entry, from the rules, the LLM or the fallback."""
+    name: str
+    notes: str = ""
+    nationality: str = ""
+    category: str = ""
+    regimes: List[str] = field(default_factory=list)
+    # True when the entry could not be processed and holds the fallback fields
+    issue: bool = False
+    # Any other keys of the LLM's answer; None rather than an empty dict per record
+    extra: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the JSON form, with the Regime key the prompt and downloads use."""
+        return {
+            'name': self.name,
+            'notes': self.notes,
+            'nationality': self.nationality,
+            'category': self.category,
+            'Regime': self.regimes,
+            'issue': self.issue,
+            **(self.extra or {}),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Any) -> 'SdnRecord':
+        """Build a record from its JSON form (e.g. an LLM answer); a record is returned as it is."""
+        if isinstance(data, cls):
+            return data
+        regimes = data.get('Regime') or []
+        return cls(
+            name=data.get('name') or '',
+            notes=data.get('notes') or '',
+            nationality=data.get('nationality') or '',
+            category=data.get('category') or '',
+            regimes=[regimes] if isinstance(regimes, str) else list(regimes),
+            issue=bool(data.get('issue')),
+            extra={key: value for key, value in data.items() if key not in _SDN_KEYS} or None,
+        )
+
+def entity_records(entities: Iterable[Any]) -> List[EntityRecord]:
+    """Convert entities in JSON form (or already records) to EntityRecords."""
+    return [EntityRecord.from_dict(entity) for entity in entities]
+
+def sdn_records(entries: Iterable[Any]) -> List[Optional[SdnRecord]]:
+    """Convert processed entries in JSON form (or already records) to SdnRecords, keeping Nones."""
+    return [None if entry is None else SdnRecord.from_dict(entry) for entry in entries]
+
+def json_default(value: Any) -> Any:
+    """``default`` hook for json.dumps that writes records in their JSON form."""
+    if isinstance(value, (EntityRecord, SdnRecord)):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,370 @@
+"""
+Columnar store of processed SDN entries and parsed Entity List entities.
+
+Each finished result is kept as one pandas DataFrame with typed columns:
+categoricals for the low-cardinality fields (action, category, country,
+source), datetimes for the dates, and regimes/aliases joined into one string
+instead of a Python list per row. Frames are written to RESULT_STORE_PATH,
+as Parquet when pyarrow is installed and as pickles otherwise, so every
+gunicorn worker sees the same results. They are also read back lazily and
+kept in memory until the files change.
+
+Stored copies are keyed on their source (see result_key), not on the run
+that produced them, so processing the same action or rule again replaces its
+rows instead of adding a second copy. Entities merged by a backfill are
+stored per source rule, so they replace single parses of those rules too.
+
+Aggregate views across many updates (filter, group by country or regime,
+export) are vectorized over the concatenated frames:
+
+    store = ResultStore()
+    store.add_sdn(result_hash, processed_entries, source_url)
+    frame = filter_frame(store.frame('sdn'), country='Russia', regime='RUSSIA-EO14024')
+    summarize(frame, 'regime')
+"""
+
+import hashlib
+import io
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.process_entries import sdn_csv_rows, sdn_date_from_url
+from utils.records import EntityRecord, SdnRecord
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULT_STORE_PATH = os.getenv('RESULT_STORE_PATH', os.path.join('cache', 'results'))
+
+KINDS = ('sdn', 'entities')
+
+# Separator of the regimes and aliases kept in one string column
+LIST_SEPARATOR = '; '
+
+SDN_COLUMNS = ['result', 'date', 'action', 'name', 'notes', 'country', 'category', 'regime', 'issue']
+ENTITY_COLUMNS = ['result', 'date', 'country', 'name', 'aliases', 'license_requirement',
+                  'license_policy', 'federal_register_citation', 'source_url']
+
+# Columns compared by equality across many rows; stored as categoricals
+_CATEGORICAL = {
+    'sdn': ['result', 'action', 'country', 'category'],
+    'entities': ['result', 'country', 'source_url'],
+}
+
+# Columns holding several values joined with LIST_SEPARATOR
+_LIST_COLUMNS = {'regime', 'aliases'}
+
+_FR_DATE = re.compile(r'/(\d{4})/(\d{2})/(\d{2})/')
+
+# Document number in a Federal Register page or XML URL, e.g. .../2024/01/02/2023-12345.xml
+_FR_DOCUMENT = re.compile(r'federalregister\.gov/.*/\d{4}/\d{2}/\d{2}/([\w-]+?)(?:\.xml)?(?:[/?#]|$)')
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+def result_key(source: str) -> str:
+    """
+    Stable key of the stored copy of a result: the same source always maps to the same copy.
+
+    Federal Register rules are keyed on their document number, so a rule's
+    page URL and its XML URL share one copy. Anything else (OFAC action URLs,
+    digests of scraped text) is keyed on its own sha256 digest.
+
+    Args:
+        source: Source URL of the result, or a stable identifier of its content
+
+    Returns:
+        Hex digest, safe to use in a file name
+    """
+    match = _FR_DOCUMENT.search(source)
+    normalized = f"federal-register:{match.group(1)}" if match else source
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:32]
+
+def _typed(frame: pd.DataFrame, kind: str) -> pd.DataFrame:
+    for column in _CATEGORICAL[kind]:
+        frame[column] = frame[column].astype('category')
+    frame['date'] = pd.to_datetime(frame['date'], format='%Y%m%d', errors='coerce')
+    return frame
+
+def sdn_frame(processed_entries: Dict[str, List[SdnRecord]], result: str = '',
+              date: str = '') -> pd.DataFrame:
+    """
+    Build the columnar form of one run's processed SDN entries.
+
+    Rows are the ones the SDN CSV would have, so "change" categories are left
+    out and category/action are standardized the same way.
+
+    Args:
+        processed_entries: Category name -> list of SdnRecords
+        result: The run's result_hash, kept in the result column
+        date: YYYYMMDD date of the action, as from sdn_date_from_url
+
+    Returns:
+        DataFrame with SDN_COLUMNS
+    """
+    rows = []
+    entries = (entry for category, entry_list in processed_entries.items()
+               if category.lower() not in ('change', 'changes') for entry in entry_list)
+    for (_, action, name, notes, country, category, _), entry in zip(
+            sdn_csv_rows(processed_entries, date), entries):
+        rows.append((result, date, action, name, notes, country, category,
+                     LIST_SEPARATOR.join(entry.regimes), entry.issue))
+    return _typed(pd.DataFrame(rows, columns=SDN_COLUMNS), 'sdn')
+
+def entity_frame(entities: Iterable[EntityRecord], result: str = '', source_url: str = '') -> pd.DataFrame:
+    """
+    Build the columnar form of parsed Entity List entities.
+
+    Args:
+        entities: EntityRecords as produced by parse_entity_list; merged
+            entities carry their own source_url
+        result: The parse's result_id, kept in the result column
+        source_url: The rule's URL, used for entities without a source_url
+
+    Returns:
+        DataFrame with ENTITY_COLUMNS; the date is the rule's publication date
+    """
+    rows = []
+    for entity in entities:
+        source = entity.source_url or source_url or ''
+        match = _FR_DATE.search(source)
+        rows.append((
+            result,
+            ''.join(match.groups()) if match else '',
+            entity.country or '',
+            entity.name,
+            LIST_SEPARATOR.join(entity.aliases),
+            entity.license_requirement,
+            entity.license_policy,
+            entity.federal_register_citation,
+            source,
+        ))
+    return _typed(pd.DataFrame(rows, columns=ENTITY_COLUMNS), 'entities')
+
+def _concat(frames: List[pd.DataFrame], kind: str) -> pd.DataFrame:
+    columns = SDN_COLUMNS if kind == 'sdn' else ENTITY_COLUMNS
+    if not frames:
+        return _typed(pd.DataFrame({column: [] for column in columns}), kind)
+    frame = pd.concat(frames, ignore_index=True)
+    # Concatenating categoricals with different categories falls back to object
+    for column in _CATEGORICAL[kind]:
+        frame[column] = frame[column].astype('category')
+    return frame
+
+def _matches(column: pd.Series, values) -> pd.Series:
+    wanted = {value.lower() for value in ([values] if isinstance(values, str) else values)}
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Compare the few categories rather than every row
+        return column.isin([value for value in column.cat.categories if str(value).lower() in wanted])
+    return column.str.lower().isin(wanted)
+
+def filter_frame(frame: pd.DataFrame, country=None, category=None, action=None, regime: Optional[str] = None,
+                 result=None, name: Optional[str] = None, since: Optional[str] = None,
+                 until: Optional[str] = None) -> pd.DataFrame:
+    """
+    Select rows of an SDN or entity frame; unset filters match everything.
+
+    Args:
+        frame: A frame from sdn_frame, entity_frame or ResultStore.frame
+        country, category, action, result: One value or a list of values,
+            compared case-insensitively
+        regime: A regime code the row must list (SDN frames only)
+        name: Case-insensitive substring of the name
+        since, until: Inclusive date bounds, anything pd.Timestamp accepts
+
+    Returns:
+        The matching rows
+    """
+    mask = pd.Series(True, index=frame.index)
+    for column, values in (('country', country), ('category', category), ('action', action), ('result', result)):
+        if values and column in frame:
+            mask &= _matches(frame[column], values)
+    if regime and 'regime' in frame:
+        mask &= (LIST_SEPARATOR + frame['regime'] + LIST_SEPARATOR).str.contains(
+            LIST_SEPARATOR + regime + LIST_SEPARATOR, case=False, regex=False)
+    if name:
+        mask &= frame['name'].str.contains(name, case=False, regex=False)
+    if since:
+        mask &= frame['date'] >= pd.Timestamp(since)
+    if until:
+        mask &= frame['date'] <= pd.Timestamp(until)
+    return frame[mask]
+
+def summarize(frame: pd.DataFrame, by: str) -> pd.DataFrame:
+    """
+    Count rows per value of a column, largest groups first.
+
+    Args:
+        frame: A frame from sdn_frame, entity_frame or ResultStore.frame
+        by: Column to group on; for regime and aliases, a row counts once
+            under each value it lists
+
+    Returns:
+        DataFrame with the by column and count
+    """
+    if by not in frame:
+        raise ValueError(f"Unknown column {by!r}")
+    column = frame[by]
+    if by in _LIST_COLUMNS:
+        column = column[column != ''].str.split(LIST_SEPARATOR, regex=False).explode()
+    counts = column.value_counts(sort=True)
+    counts = counts[counts > 0]
+    return counts.rename_axis(by).reset_index(name='count')
+
+def to_csv_bytes(frame: pd.DataFrame) -> bytes:
+    """Export a frame as CSV, dates as YYYY-MM-DD."""
+    return frame.to_csv(index=False, date_format='%Y-%m-%d').encode('utf-8')
+
+def to_parquet_bytes(frame: pd.DataFrame) -> bytes:
+    """
+    Export a frame as Parquet.
+
+    Raises:
+        ImportError: If pyarrow isn't installed
+    """
+    if not PARQUET_AVAILABLE:
+        raise ImportError("Parquet export needs pyarrow (pip install pyarrow)")
+    buffer = io.BytesIO()
+    frame.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+class ResultStore:
+    """Directory of per-result frames, read back as one frame per kind."""
+
+    def __init__(self, path: str = DEFAULT_RESULT_STORE_PATH):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        # kind -> (file signature, concatenated frame)
+        self._frames: Dict[str, Tuple[Tuple, pd.DataFrame]] = {}
+
+    def _file(self, kind: str, key: str) -> str:
+        extension = 'parquet' if PARQUET_AVAILABLE else 'pkl'
+        return os.path.join(self.path, f"{kind}_{key}.{extension}")
+
+    def _save(self, kind: str, key: str, frame: pd.DataFrame) -> None:
+        path = self._file(kind, key)
+        # Write under a temporary name so readers never see half a file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        if PARQUET_AVAILABLE:
+            frame.to_parquet(tmp_path, index=False)
+        else:
+            frame.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        # A copy in the other format, written by a worker with(out) pyarrow, is stale now
+        other = os.path.splitext(path)[0] + ('.pkl' if PARQUET_AVAILABLE else '.parquet')
+        if os.path.exists(other):
+            os.remove(other)
+
+    def add_sdn(self, result: str, processed_entries: Dict[str, List[SdnRecord]],
+                source_url: str = '') -> pd.DataFrame:
+        """
+        Store one run's processed SDN entries, replacing the earlier copy of the same action.
+
+        Args:
+            result: The run's result_hash, kept in the result column
+            processed_entries: Category name -> list of SdnRecords
+            source_url: The recent-action URL, for the date column and as the
+                key of the stored copy; without one the copy is keyed on result
+
+        Returns:
+            The stored frame
+        """
+        frame = sdn_frame(processed_entries, result, sdn_date_from_url(source_url or ''))
+        self._save('sdn', result_key(source_url or result), frame)
+        return frame
+
+    def add_entities(self, result: str, entities: Iterable[EntityRecord], source_url: str = '',
+                     key: Optional[str] = None) -> pd.DataFrame:
+        """
+        Store one parsed rule's (or backfill's) entities, replacing earlier copies of the same rules.
+
+        Entities are stored per source rule: their own source_url (set on
+        entities merged by a backfill), else source_url, else key.
+
+        Args:
+            result: The parse's result_id, kept in the result column
+            entities: EntityRecords as produced by parse_entity_list
+            source_url: The rule's URL, for the date column
+            key: Stable identifier for entities without any source URL, such as
+                a digest of the XML; defaults to result
+
+        Returns:
+            The stored frame
+        """
+        groups: Dict[str, List[EntityRecord]] = {}
+        for entity in entities:
+            groups.setdefault(entity.source_url or source_url or '', []).append(entity)
+        frames = []
+        for source, group in groups.items():
+            frame = entity_frame(group, result, source)
+            self._save('entities', result_key(source or key or result), frame)
+            frames.append(frame)
+        return _concat(frames, 'entities')
+
+    def _paths(self, kind: str) -> List[str]:
+        return sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.startswith(f"{kind}_") and name.endswith(('.parquet', '.pkl'))
+        )
+
+    def _read(self, path: str) -> pd.DataFrame:
+        if path.endswith('.parquet'):
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    def frame(self, kind: str) -> pd.DataFrame:
+        """
+        Return every stored result of a kind ("sdn" or "entities") as one frame.
+
+        The frame is rebuilt only when files were added, replaced or removed;
+        treat it as read-only.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown result kind {kind!r}")
+        with self._lock:
+            paths = self._paths(kind)
+            signature = tuple((path, os.stat(path).st_mtime_ns) for path in paths)
+            cached = self._frames.get(kind)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+            frames = []
+            for path in paths:
+                try:
+                    frames.append(self._read(path))
+                except Exception as e:
+                    # A Parquet file from a worker with pyarrow, read by one without it
+                    logger.warning(f"Could not read stored result {path}: {e}")
+            frame = _concat(frames, kind)
+            self._frames[kind] = (signature, frame)
+            return frame
+
+    def remove(self, kind: str, source: str) -> bool:
+        """Delete the stored copy of a source (as given to add_sdn/add_entities); returns whether it existed."""
+        stem = os.path.splitext(self._file(kind, result_key(source)))[0]
+        removed = False
+        for extension in ('.parquet', '.pkl'):
+            if os.path.exists(stem + extension):
+                os.remove(stem + extension)
+                removed = True
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Rows, results and in-memory size per kind."""
+        stats = {'format': 'parquet' if PARQUET_AVAILABLE else 'pickle'}
+        for kind in KINDS:
+            frame = self.frame(kind)
+            stats[kind] = {
+                'rows': len(frame),
+                'results': int(frame['result'].nunique()),
+                'memory_bytes': int(frame.memory_usage(deep=True).sum()),
+            }
+        return stats
@@ -1,6 +1,196 @@
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
 import re
+from html.entities import html5 as _HTML5_ENTITIES
+from utils.http_client import fetch_text
+from utils.metrics import STAGE_SECONDS
+
+START_PHRASE = "Specially Designated Nationals List Update"
+END_PHRASE = "Unrelated Administrative List Updates"
+NOT_FOUND_MESSAGE = "Could not find one or both of the specified phrases in the webpage."
+
+# Tags whose text BeautifulSoup's get_text leaves out
+_SKIPPED_TAGS = {'script', 'style', 'template'}
+
+# Tags inside which BeautifulSoup keeps whitespace-only strings as they are
+_PRESERVE_WHITESPACE_TAGS = {'pre', 'textarea'}
+
+_ASCII_SPACES = str.maketrans('', '', '\x20\x0a\x09\x0c\x0d')
+
+# html.parser leaves an unclosed <p> open until its parent ends, libxml2 closes
+# it at the next block element; pages with unclosed paragraphs go to BeautifulSoup
+_P_START = re.compile(r'<p[\s/>]', re.IGNORECASE)
+_P_END = re.compile(r'</p\s*>', re.IGNORECASE)
+
+# Markup the two parsers read differently: libxml2 keeps an unknown named
+# reference such as "&T;" as written where html.parser drops the semicolon,
+# and treats raw-text tags and CDATA sections its own way
+_ENTITY_REFERENCE = re.compile(r'&([A-Za-z][A-Za-z0-9]*);')
+_RAW_TEXT_MARKUP = re.compile(r'<(?:xmp|plaintext)[\s/>]|<!\[CDATA\[', re.IGNORECASE)
+
+_PHRASE_XPATH = etree.XPath(
+    '//text()[contains(., $phrase)][not(ancestor::script or ancestor::style or ancestor::template)]'
+)
+
+def _clean_section(text_content, start_pos, end_pos):
+    # Include the start phrase but exclude the end phrase
+    extracted_text = text_content[start_pos:end_pos].strip()
+    
+    # Clean up multiple consecutive newlines while preserving paragraph structure
+    return re.sub(r'\n\s*\n', '\n\n', extracted_text)
+
+def _extract_update_text_soup(html):
+    # Parse the HTML content
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Convert <br> and </p> tags to newlines before getting text
+    for br in soup.find_all('br'):
+        br.replace_with('\n')
+    for p in soup.find_all('p'):
+        p.append('\n')
+    
+    # Get text content with preserved newlines
+    text_content = soup.get_text(separator='\n')
+    
+    # Find the start and end positions
+    start_pos = text_content.find(START_PHRASE)
+    end_pos = text_content.find(END_PHRASE)
+    
+    if start_pos == -1 or end_pos == -1:
+        return NOT_FOUND_MESSAGE
+    
+    return _clean_section(text_content, start_pos, end_pos)
+
+def _owner(text_node):
+    """Return (element whose content holds the text node, (element, is_tail) key of the node)."""
+    parent = text_node.getparent()
+    if text_node.is_tail:
+        return parent.getparent(), (parent, True)
+    return parent, (parent, False)
+
+def _strings(element, preserve=False):
+    """
+    Yield ((element, is_tail), string) for an element's content in document
+    order, the way BeautifulSoup's get_text sees it after the <br>/<p> rewrite.
+    """
+    tag = element.tag if isinstance(element.tag, str) else None
+    if tag is None or tag in _SKIPPED_TAGS:
+        # Comments, processing instructions and script-like tags add no text of their own
+        pass
+    elif tag == 'br':
+        yield None, '\n'
+    else:
+        preserve = preserve or tag in _PRESERVE_WHITESPACE_TAGS
+        if element.text:
+            yield (element, False), _normalize_whitespace(element.text, preserve)
+        for child in element:
+            yield from _strings(child, preserve)
+            if child.tail:
+                yield (child, True), _normalize_whitespace(child.tail, preserve)
+        if tag == 'p':
+            yield None, '\n'
+
+def _normalize_whitespace(text, preserve):
+    # BeautifulSoup stores a whitespace-only string as a single newline or space
+    if preserve or text.translate(_ASCII_SPACES):
+        return text
+    return '\n' if '\n' in text else ' '
+
+def _differs_from_soup(html):
+    """Whether the page holds markup that libxml2 and html.parser turn into different text."""
+    start = html.find(START_PHRASE)
+    start = 0 if start == -1 else start
+    end = html.find(END_PHRASE, start)
+    end = len(html) if end == -1 else end + len(END_PHRASE)
+    # An <xmp> or <plaintext> before the section can swallow it, so look from the top
+    if _RAW_TEXT_MARKUP.search(html, 0, end):
+        return True
+    return any(name + ';' not in _HTML5_ENTITIES for name in _ENTITY_REFERENCE.findall(html, start, end))
+
+def _extract_update_text_lxml(html):
+    """
+    Same result as _extract_update_text_soup, found by locating the two
+    phrases with XPath and converting only the smallest subtree holding both.
+    
+    Returns None when the page can't be handled this way, so the caller falls
+    back to BeautifulSoup.
+    """
+    if len(_P_START.findall(html)) != len(_P_END.findall(html)):
+        return None
+    if _differs_from_soup(html):
+        return None
+    
+    parser = etree.HTMLParser()
+    try:
+        root = etree.fromstring(html, parser)
+    except (ValueError, etree.LxmlError):
+        # e.g. a str document carrying an XML encoding declaration
+        return None
+    if root is None:
+        return None
+    # libxml2 repairs broken markup differently from html.parser (stray or
+    # mismatched end tags), so only well-formed pages take this path
+    if any(error.type_name != 'HTML_UNKNOWN_TAG' for error in parser.error_log):
+        return None
+    
+    starts = _PHRASE_XPATH(root, phrase=START_PHRASE)
+    ends = _PHRASE_XPATH(root, phrase=END_PHRASE)
+    if not starts or not ends:
+        return None
+    
+    start_owner, start_key = _owner(starts[0])
+    end_owner, end_key = _owner(ends[0])
+    
+    # Smallest element containing both phrases
+    start_ancestors = [start_owner] + list(start_owner.iterancestors())
+    end_ancestors = set([end_owner] + list(end_owner.iterancestors()))
+    common = next((element for element in start_ancestors if element in end_ancestors), None)
+    if common is None:
+        return None
+    preserve = any(element.tag in _PRESERVE_WHITESPACE_TAGS for element in common.iterancestors())
+    
+    # Walk the subtree up to the end phrase, recording where the start phrase sits
+    strings = []
+    start_index = None
+    end_offset = None
+    for key, string in _strings(common, preserve):
+        if key == start_key and start_index is None:
+            start_index = len(strings)
+        if key == end_key:
+            end_offset = sum(len(part) + 1 for part in strings) + string.find(END_PHRASE)
+            strings.append(string)
+            break
+        strings.append(string)
+    if start_index is None or end_offset is None:
+        # The end phrase comes first: the slice is empty, as it is with BeautifulSoup
+        return '' if end_offset is not None else None
+    
+    text_content = '\n'.join(strings)
+    start_pos = sum(len(part) + 1 for part in strings[:start_index]) + strings[start_index].find(START_PHRASE)
+    return _clean_section(text_content, start_pos, end_offset)
+
+@STAGE_SECONDS.time(stage='html_parse')
+def extract_update_text(html, fast=True):
+    """
+    Extract the SDN update section from an OFAC recent actions page.
+    
+    The lxml path only converts the part of the page between the two phrases
+    to text; it falls back to parsing the whole page with BeautifulSoup when
+    it can't find them, so both paths return the same text.
+    
+    Args:
+        html (str): The page HTML
+        fast (bool): Try the lxml path before BeautifulSoup
+        
+    Returns:
+        str: Text between the specified phrases with preserved formatting
+    """
+    if fast:
+        text = _extract_update_text_lxml(html)
+        if text is not None:
+            return text
+    return _extract_update_text_soup(html)
 
 def scrape_sanctions_update(url):
     """
@@ -14,40 +204,9 @@ def scrape_sanctions_update(url):
         str: Extracted text between the specified phrases with preserved formatting
     """
     try:
-        # Send HTTP request to the URL
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        
-        # Parse the HTML content
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Convert <br> and </p> tags to newlines before getting text
-        for br in soup.find_all('br'):
-            br.replace_with('\n')
-        for p in soup.find_all('p'):
-            p.append('\n')
-        
-        # Get text content with preserved newlines
-        text_content = soup.get_text(separator='\n')
-        
-        # Find the start and end positions
-        start_phrase = "Specially Designated Nationals List Update"
-        end_phrase = "Unrelated Administrative List Updates"
-        
-        start_pos = text_content.find(start_phrase)
-        end_pos = text_content.find(end_phrase)
-        
-        if start_pos == -1 or end_pos == -1:
-            return "Could not find one or both of the specified phrases in the webpage."
-        
-        # Extract the text between these positions
-        # Include the start phrase but exclude the end phrase
-        extracted_text = text_content[start_pos:end_pos].strip()
-        
-        # Clean up multiple consecutive newlines while preserving paragraph structure
-        cleaned_text = re.sub(r'\n\s*\n', '\n\n', extracted_text)
-        
-        return cleaned_text
+        # Send HTTP request to the URL (revalidated against the on-disk cache)
+        html = fetch_text(url)
+        return extract_update_text(html)
         
     except requests.RequestException as e:
         return f"Error fetching the webpage: {str(e)}"
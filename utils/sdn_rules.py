@@ -0,0 +1,168 @@
+"""
+Rule-based extraction for well-formed OFAC SDN entries.
+
+Most SDN entries follow a fixed grammar, e.g.
+
+    NAME, Given (a.k.a. ...), address; DOB ...; nationality X; ... (individual) [PROGRAM]
+    COMPANY LTD (a.k.a. ...), address, Country; ... Registration Number N (Country) [PROGRAM]
+
+parse_sdn_entry reads the name, nationality and regimes from entries like
+these without calling the LLM. It returns None whenever any field is
+ambiguous, so only the entries it is sure about skip the LLM.
+"""
+
+import re
+from typing import Optional, Tuple
+
+from utils.parse_sanctions import normalize_category
+from utils.records import SdnRecord
+
+# "SURNAME, Given names" up to the first "(", "," or ";"
+_INDIVIDUAL_NAME = re.compile(r"([^,(;]+),\s*([^,(;]+?)\s*(?=[(,;])")
+
+# Entity name up to the first " (" or ","
+_ENTITY_NAME = re.compile(r"([^,(;]+?)\s*(?=[(,;])")
+
+_NATIONALITY = re.compile(r"(?<![\w.])nationality ([^;()]+?)\s*(?:;|\(|$)")
+
+_REGIME_BLOCK = re.compile(r"\[([^\[\]]+)\]")
+
+_PARENTHESIZED = re.compile(r"\(([^()]*)\)")
+
+# Words after a comma that still belong to a company name ("CO., LIMITED")
+_COMPANY_SUFFIXES = {
+    'LIMITED', 'LTD', 'LTD.', 'LLC', 'L.L.C.', 'INC', 'INC.', 'S.A.', 'S.A', 'SA', 'SARL', 'S.A.R.L.',
+    'GMBH', 'AG', 'PLC', 'JSC', 'PJSC', 'OJSC', 'CJSC', 'FZE', 'FZCO', 'FZ-LLC', 'DMCC', 'B.V.', 'N.V.',
+}
+
+# Special administrative regions the examples report instead of China
+_REGIONS = {'Hong Kong', 'Macau', 'Macao'}
+
+def _strip_aka(text: str) -> str:
+    """Drop a leading parenthesized block such as "(a.k.a. ...)" and the comma after it."""
+    text = text.lstrip(' ,')
+    if not text.startswith('('):
+        return text
+    depth = 0
+    for i, char in enumerate(text):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return text[i + 1:].lstrip(' ,')
+    return text
+
+def _regimes(text: str) -> list:
+    return [code for block in _REGIME_BLOCK.findall(text) for code in block.split()]
+
+def _individual_name(text: str) -> Optional[Tuple[str, str]]:
+    """Return (name, rest of the entry) for an individual, or None."""
+    match = _INDIVIDUAL_NAME.match(text)
+    if not match:
+        return None
+    surname, given = match.group(1).strip(), match.group(2).strip()
+    # Surnames are upper-case; anything else is not the usual layout
+    if not surname or surname != surname.upper() or not any(c.isalpha() for c in surname) or not given:
+        return None
+    return f"{surname}, {given}", text[match.end():]
+
+def _entity_name(text: str) -> Optional[Tuple[str, str]]:
+    """Return (name, rest of the entry) for an entity, or None."""
+    match = _ENTITY_NAME.match(text)
+    if not match:
+        return None
+    name = match.group(1).strip()
+    rest = text[match.end():]
+
+    # Pull company suffixes split off by a comma back into the name
+    while rest.startswith(','):
+        next_part = rest[1:].lstrip().split(',', 1)[0].split(';', 1)[0].split(' (', 1)[0].strip()
+        if next_part.upper() not in _COMPANY_SUFFIXES:
+            break
+        name = f"{name}, {next_part}"
+        rest = rest[1:].lstrip()[len(next_part):]
+
+    if not name or name != name.upper() or not any(c.isalpha() for c in name):
+        return None
+    # An upper-case part straight after the name could be more of the name
+    following = _strip_aka(rest).split(',', 1)[0].split(';', 1)[0].strip()
+    if following and following == following.upper() and any(c.isalpha() for c in following):
+        return None
+    return name, rest
+
+def _entity_country(text: str, rest: str) -> Optional[str]:
+    """
+    Read the country from the end of the first address, and accept it only if
+    an identifier elsewhere in the entry names the same country, e.g.
+    "Business Registration Number 123 (Bangladesh)".
+    """
+    address = _strip_aka(rest).split(';', 1)[0]
+    parts = [part.strip().rstrip('.') for part in address.split(',') if part.strip()]
+    if len(parts) < 2:
+        return None
+
+    mentioned = {value.strip() for value in _PARENTHESIZED.findall(text)}
+    last, previous = parts[-1], parts[-2]
+    if previous in _REGIONS and previous in mentioned:
+        return previous
+    if last in mentioned:
+        return last
+    return None
+
+def parse_sdn_entry(entry_text: str, category: str) -> Optional[SdnRecord]:
+    """
+    Extract structured data from an SDN entry without the LLM.
+
+    Args:
+        entry_text: The raw entry text
+        category: The category heading the entry was listed under
+
+    Returns:
+        A result with the same fields process_entry returns, or None if the
+        entry doesn't match the usual layout closely enough to trust
+    """
+    text = ' '.join(entry_text.split())
+    normalized_category = normalize_category(category)
+
+    # Unbalanced brackets mean the entry was cut or merged with another one
+    if not text or text.count('(') != text.count(')') or text.count('[') != text.count(']'):
+        return None
+
+    regimes = _regimes(text)
+    if not regimes:
+        return None
+
+    if normalized_category == 'Individual':
+        if '(individual)' not in text:
+            return None
+        parsed = _individual_name(text)
+        if not parsed:
+            return None
+        name, rest = parsed
+        nationalities = _NATIONALITY.findall(text)
+        # Dual nationals are left to the LLM
+        if len(set(nationalities)) != 1:
+            return None
+        nationality = nationalities[0]
+    elif normalized_category == 'Entity':
+        if '(individual)' in text or '(vessel)' in text or '(aircraft)' in text:
+            return None
+        parsed = _entity_name(text)
+        if not parsed:
+            return None
+        name, rest = parsed
+        nationality = _entity_country(text, rest)
+        if not nationality:
+            return None
+    else:
+        # Vessel and aircraft nationality depends on context the rules can't see
+        return None
+
+    return SdnRecord(
+        name=name,
+        notes=rest.lstrip(' ,;'),
+        nationality=nationality,
+        category=normalized_category,
+        regimes=regimes
+    )